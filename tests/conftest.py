@@ -0,0 +1,98 @@
+from typing import Callable
+
+import pytest
+from st_mongo_connection import MongoDBConnection
+
+from understudy.api.courses import lookup
+from understudy.api.mongo.memory import MemoryCollection
+from understudy.api.search.courses import index_courses, index_key
+from understudy.api.search.names import build_name_index, names_key
+from understudy.api.snapshot.snapshot import write_snapshot
+from understudy.api.store.base import Store
+from understudy.api.store.client import _Db
+from understudy.api.store.memory import MemoryStore
+from understudy.api.store.mongo import MongoStore
+from understudy.api.store.snapshot import SnapshotStore
+from understudy.api.store.sqlite import SqliteStore
+
+
+class _Connection(MongoDBConnection):
+    """
+    Streamlit Mongo connection over an in-memory collection.
+    """
+
+    def _connect(self, **kwargs) -> MemoryCollection:
+        return MemoryCollection()
+
+
+@pytest.fixture
+def mongo_store() -> MongoStore:
+    """
+    A Mongo store whose collections are Streamlit connections (with
+    their result caching), backed by in-memory collections.
+    """
+
+    connections: dict[str, _Connection] = {}
+
+    def connect(name: str) -> _Connection:
+        if name not in connections:
+            connections[name] = _Connection(name, collection=name)
+        return connections[name]
+
+    return MongoStore(collection=connect)
+
+
+def _precompute(store: Store):
+    # The search documents prefetch stores
+    for course, index in index_courses(store.all_ratings()).items():
+        store.put_document(index_key(course), index.to_dict())
+    store.put_document(
+        names_key(), build_name_index(store.all_professors()).to_dict())
+
+
+@pytest.fixture(params=['memory', 'mongo', 'sqlite', 'prefetched', 'snapshot'])
+def open_store(request, mongo_store, tmp_path) -> Callable:
+    """
+    Opens each kind of store (one per test run), filled by a function.
+    'prefetched' is a memory store with prefetch's search documents, and
+    'snapshot' a snapshot of one.
+    """
+
+    def open(fill: Callable[[Store], None]) -> Store:
+        if request.param == 'mongo':
+            store = mongo_store
+        elif request.param == 'sqlite':
+            store = SqliteStore(str(tmp_path / 'understudy.db'))
+        else:
+            store = MemoryStore()
+        fill(store)
+
+        if request.param in ('prefetched', 'snapshot'):
+            _precompute(store)
+        if request.param == 'snapshot':
+            path = str(tmp_path / 'snapshot')
+            write_snapshot(
+                path,
+                store.all_professors(),
+                store.all_ratings(),
+                store.all_documents(),
+            )
+            return SnapshotStore(path)
+        return store
+
+    return open
+
+
+@pytest.fixture
+def lookup_db(monkeypatch) -> Callable[[Store], _Db]:
+    """
+    Points course lookups at a store.
+    """
+
+    def use(store: Store) -> _Db:
+        db = _Db()
+        db.use(store)
+        monkeypatch.setattr(lookup, 'db', db)
+        return db
+
+    return use
@@ -0,0 +1,126 @@
+from aiohttp import web
+
+from understudy.api.rmp import data, queries
+
+
+def teacher(id: str, name: str, department: str | None) -> dict:
+    first, last = name.split()
+    return {
+        'id': id,
+        'firstName': first,
+        'lastName': last,
+        'department': department,
+        'legacyId': 0,
+        'avgRating': 4.0,
+        'avgDifficulty': 3.0,
+        'wouldTakeAgainPercent': 80.0,
+        'courseCodes': [{'courseName': 'COP3502', 'courseCount': 1}],
+    }
+
+
+def rating_node(id: str, comment: str = "fair exams") -> dict:
+    return {
+        'id': id,
+        'helpfulRating': 4,
+        'difficultyRating': 3,
+        'comment': comment,
+        'grade': 'A',
+        'isForCredit': True,
+        'isForOnlineClass': False,
+        'attendanceMandatory': 'mandatory',
+        'textbookUse': 1,
+        'ratingTags': 'Caring--Tough grader',
+        'thumbsUpTotal': 1,
+        'thumbsDownTotal': 0,
+    }
+
+
+class FakeRMP:
+    """
+    RMP GraphQL endpoint serving fixed teachers and ratings, recording
+    the queries it gets.
+    """
+
+    def __init__(
+        self,
+        *,
+        teachers: list[dict] | None = None,
+        departments: list[str] | None = None,
+        ratings: dict[tuple[str, str], list[dict]] | None = None,
+        failures: int = 0,  # initial requests to fail with a 503
+    ):
+        self.failures = failures
+        self.teachers = teachers or []
+        self.departments = departments or []
+        self.ratings = ratings or {}
+        self.requests: list[tuple[str, dict]] = []
+
+    def _teachers(self, query: dict) -> list[dict]:
+        text = query.get('text', '').lower()
+        return [
+            t for t in self.teachers
+            if query.get('departmentID') in (None, t['department'])
+            and any(
+                name.lower().startswith(text)
+                for name in (t['firstName'], t['lastName'])
+            )
+        ]
+
+    def _page(self, nodes: list, variables: dict) -> dict:
+        start = int(variables.get('cursor') or 0)
+        end = min(start + variables['count'], len(nodes))
+        return {
+            'resultCount': len(nodes),
+            'edges': [{'node': node} for node in nodes[start:end]],
+            'pageInfo': {
+                'endCursor': str(end),
+                'hasNextPage': end < len(nodes),
+            },
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.failures > 0:
+            self.failures -= 1
+            return web.Response(status=503)
+
+        body = await request.json()
+        name = queries.name_of(body['query'])
+        variables = body['variables']
+        self.requests.append((name, variables))
+
+        if name == 'count_teachers':
+            teachers = {'resultCount': len(self._teachers(variables['query']))}
+            return web.json_response({'data': {'result': {
+                'teachers': teachers}}})
+        if name == 'get_departments':
+            return web.json_response({'data': {'node': {'departments': [
+                {'id': dept, 'name': dept} for dept in self.departments]}}})
+        if name == 'get_teachers':
+            return web.json_response({'data': {'result': {
+                'teachers': self._page(
+                    self._teachers(variables['query']), variables),
+            }}})
+        if name == 'get_ratings':
+            nodes = self.ratings.get(
+                (variables['id'], variables['courseFilter']), [])
+            return web.json_response({'data': {'node': {
+                'ratings': self._page(nodes, variables)}}})
+        return web.Response(status=400)
+
+    async def start(self, monkeypatch) -> web.AppRunner:
+        """
+        Serves the endpoint on a free local port, pointing the client
+        at it.
+        """
+
+        app = web.Application()
+        app.router.add_post('/graphql', self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(
+            data, '_RMP_ENDPOINT', 'http://127.0.0.1:%d/graphql' % port)
+        return runner
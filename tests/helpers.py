@@ -0,0 +1,45 @@
+from understudy.api.rmp.course import CourseMeta
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+
+
+def professor(
+    id: str,
+    *courses: str,
+    name: str | None = None,
+    dept: str = "Computer Science",
+) -> Professor:
+    return Professor(
+        id=id,
+        name=name or "Prof %s" % id,
+        dept=dept,
+        quality=4.0,
+        difficulty=3.0,
+        take_again=80.0,
+        courses=set(courses),
+    )
+
+
+def rating(
+    id: str,
+    comment: str = "fair exams",
+    *,
+    quality: float = 4.0,
+    date: str | None = None,
+) -> Rating:
+    return Rating(
+        id=id,
+        quality=quality,
+        difficulty=3.0,
+        comment=comment,
+        grade='A',
+        for_credit=True,
+        meta=CourseMeta(
+            online=False,
+            attendance_required=None,
+            textbook_required=None,
+            tags=set(),
+        ),
+        votes=(1, 0),
+        date=date,
+    )
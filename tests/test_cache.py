@@ -0,0 +1,75 @@
+import pandas as pd
+
+from understudy.api.courses import lookup
+from understudy.api.courses.cache import ResultCache, deep_size
+from understudy.api.store import client
+from understudy.api.store.generations import (
+    begin_generation,
+    generation_namespace,
+    publish_generation,
+)
+
+from tests.helpers import professor, rating
+
+
+def test_deep_size_counts_contents_once():
+    comment = "x" * 10_000
+    assert deep_size([comment]) > 10_000
+    assert deep_size([comment, comment]) < 20_000
+
+    frame = pd.DataFrame({'quality': [4.0] * 10_000})
+    assert deep_size({'frame': frame}) > 80_000
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    entry = deep_size(["x" * 1000])
+    cache = ResultCache(max_bytes=entry * 2)
+
+    cache.put('a', ["x" * 1000])
+    cache.put('b', ["y" * 1000])
+    assert cache.get('a') is not None
+
+    # 'b' is least recently used
+    cache.put('c', ["z" * 1000])
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.nbytes == entry * 2
+    assert cache.stats()['evictions'] == 1
+
+    # Too big to keep at all
+    assert cache.put('d', ["w" * 10_000]) == ["w" * 10_000]
+    assert cache.get('d', 'missing') == 'missing'
+    assert len(cache) == 2
+
+
+def _generation(store, prof: str) -> str:
+    generation = begin_generation(store)
+    data = store.scoped(generation_namespace('', generation))
+    data.replace_professors([professor(prof, 'COP3502')])
+    data.write_ratings(prof, 'COP3502', [rating('r%d' % i) for i in range(3)])
+    publish_generation(store, generation)
+    return generation
+
+
+def test_lookups_are_cached_per_generation(
+    mongo_store,
+    lookup_db,
+    monkeypatch,
+):
+    monkeypatch.setattr(client, '_GENERATION_TTL', -1)
+    lookup_db(mongo_store)
+    monkeypatch.setattr(
+        lookup, 'result_cache', ResultCache(max_bytes=2**20))
+
+    _generation(mongo_store, 'p1')
+    first = lookup.collect_sections('COP3502')
+    again = lookup.collect_sections('COP3502')
+    assert [s.professor.id for s in again] == ['p1']
+    assert again[0] is first[0]
+    assert lookup.result_cache.stats()['hits'] == 1
+
+    # A new generation's results aren't served from the old one's
+    _generation(mongo_store, 'p2')
+    assert [s.professor.id for s in lookup.collect_sections('COP3502')] \
+        == ['p2']
+    assert len(lookup.result_cache) == 2
@@ -0,0 +1,50 @@
+from understudy.api.courses import lookup
+from understudy.api.courses.catalog import Catalog, build_catalog, catalog_key
+from understudy.api.store.memory import MemoryStore
+
+from tests.helpers import professor, rating
+
+
+def _ratings() -> list:
+    return [
+        ('p1', 'COP3502', rating('r1')),
+        ('p1', 'COP3502', rating('r2')),
+        ('p2', 'COP3502', rating('r3')),
+        ('p2', 'COP3503', rating('r4')),
+        ('p3', 'MAC2311', rating('r5')),
+    ]
+
+
+def test_catalog_lookups():
+    catalog = Catalog.from_dict(build_catalog(_ratings()).to_dict())
+
+    assert catalog.lookup() == ['COP3502', 'COP3503', 'MAC2311']
+    assert catalog.lookup('cop') == ['COP3502', 'COP3503']
+    assert catalog.lookup('COP3502') == ['COP3502']
+    assert catalog.lookup('COT') == []
+    assert catalog.lookup(min_ratings=2) == ['COP3502']
+    assert catalog.departments() == {'COP': 2, 'MAC': 1}
+    assert catalog.departments(min_ratings=2) == {'COP': 1}
+    assert catalog.stats('COP3502') == (3, 2)
+    assert catalog.stats('COT3100') == (0, 0)
+
+
+def test_lookup_with_and_without_catalog(lookup_db):
+    store = MemoryStore()
+    store.replace_professors([
+        professor('p1', 'COP3502'),
+        professor('p2', 'COP3502'),
+        professor('p3', 'MAC2311'),
+    ])
+    for prof, course, r in _ratings():
+        store.write_ratings(prof, course, [r])
+
+    lookup_db(store)
+
+    for _ in range(2):
+        assert lookup.collect_courses(1, prefix='COP') \
+            == ['COP3502', 'COP3503']
+        assert lookup.collect_departments(2) == {'COP': 1}
+
+        store.put_document(
+            catalog_key(), build_catalog(store.all_ratings()).to_dict())
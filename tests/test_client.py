@@ -0,0 +1,55 @@
+from understudy.api.store import client
+from understudy.api.store.generations import (
+    begin_generation,
+    generation_namespace,
+    publish_generation,
+)
+
+from tests.helpers import professor, rating
+
+
+def _generation(store, prof: str, course: str) -> str:
+    generation = begin_generation(store)
+    data = store.scoped(generation_namespace('', generation))
+    data.replace_professors([professor(prof, course)])
+    data.write_ratings(prof, course, [rating('r1')])
+    data.put_document('sections:%s' % course, {prof: {}})
+    publish_generation(store, generation)
+    return generation
+
+
+def test_reads_follow_published_generation(mongo_store, monkeypatch):
+    monkeypatch.setattr(client, '_GENERATION_TTL', -1)
+    db = client._Db()
+    db.use(mongo_store)
+
+    first = _generation(mongo_store, 'p1', 'COP3502')
+    assert db.generation == first
+    assert db.courses() == ['COP3502']
+
+    # Every read switches over together, with nothing cached from before
+    second = _generation(mongo_store, 'p2', 'COP3503')
+    assert second != first
+    assert db.generation == second
+    assert db.courses() == ['COP3503']
+    assert [p.id for p in db.professors('COP3503')] == ['p2']
+    assert [p.id for p, _ in db.sections('COP3503')] == ['p2']
+    assert db.get_document('sections:COP3503') == {'p2': {}}
+
+
+def test_pinned_reads_keep_their_generation(mongo_store, monkeypatch):
+    monkeypatch.setattr(client, '_GENERATION_TTL', -1)
+    db = client._Db()
+    db.use(mongo_store)
+
+    first = _generation(mongo_store, 'p1', 'COP3502')
+    assert db.pin() == first
+
+    # A switchover mid-render doesn't show until the next pin
+    second = _generation(mongo_store, 'p2', 'COP3503')
+    assert db.generation == first
+    assert db.courses() == ['COP3502']
+    assert db.get_document('sections:COP3502') == {'p1': {}}
+
+    assert db.pin() == second
+    assert db.courses() == ['COP3503']
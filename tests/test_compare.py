@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+from understudy.api.courses import lookup
+from understudy.api.courses.compare import (
+    QUANTILES,
+    compare_sections,
+    comparison_key,
+)
+from understudy.api.store.memory import MemoryStore
+
+from tests.helpers import professor, rating
+
+
+def test_compare_sections_matches_per_course_ranks():
+    rng = random.Random(0)
+    professors = []
+    ratings = []
+    for i in range(60):
+        course = 'COP%d' % rng.randrange(5)
+        prof = professor('p%d' % i, course)
+        prof.take_again = rng.choice([-1, 20.0, 50.0, 80.0])
+        professors.append(prof)
+        for j in range(rng.randrange(1, 6)):
+            ratings.append((prof.id, course, rating(
+                'r%d.%d' % (i, j), quality=rng.randrange(1, 6))))
+
+    res = compare_sections(ratings, professors)
+
+    for course, comparison in res.items():
+        means = {}
+        for prof, c, r in ratings:
+            if c == course:
+                means.setdefault(prof, []).append(r.quality)
+        means = {prof: np.mean(q) for prof, q in means.items()}
+        values = np.array(list(means.values()))
+
+        # Ties count as half below
+        for prof, mean in means.items():
+            expected = ((values < mean).sum() + (values == mean).sum() / 2) \
+                / len(values) * 100
+            assert comparison['percentiles'][prof]['quality'] \
+                == round(expected, 1)
+
+        quantiles = comparison['distributions']['quality']
+        assert len(quantiles) == len(QUANTILES)
+        assert quantiles == sorted(quantiles)
+        assert quantiles[0] >= values.min() and quantiles[-1] <= values.max()
+
+        # Unanswered take-again isn't ranked
+        for prof in means:
+            unanswered = next(
+                p for p in professors if p.id == prof).take_again < 0
+            assert (comparison['percentiles'][prof]['take_again'] is None) \
+                == unanswered
+
+
+def test_sections_carry_comparisons(lookup_db):
+    store = MemoryStore()
+    store.replace_professors([
+        professor('p1', 'COP3502'),
+        professor('p2', 'COP3502'),
+    ])
+    store.write_ratings('p1', 'COP3502', [rating('r1', quality=2)])
+    store.write_ratings('p2', 'COP3502', [rating('r2', quality=5)])
+
+    lookup_db(store)
+
+    for course, comparison in compare_sections(
+        store.all_ratings(),
+        store.all_professors(),
+    ).items():
+        store.put_document(comparison_key(course), comparison)
+
+    sections = {
+        section.professor.id: section
+        for section in lookup.collect_sections('COP3502', min_reviews=1)
+    }
+    assert sections['p1'].percentiles['quality'] == 25
+    assert sections['p2'].percentiles['quality'] == 75
+    assert sections['p1'].distributions['quality'][0] == 2
+
+
+def test_unanswered_take_again_is_none():
+    prof = professor('p1', 'COP3502')
+    prof.take_again = -1
+    res = compare_sections([('p1', 'COP3502', rating('r1'))], [prof])
+
+    assert res['COP3502']['distributions']['take_again'] \
+        == [None] * len(QUANTILES)
+    assert res['COP3502']['percentiles']['p1']['take_again'] is None
+    assert res['COP3502']['distributions']['quality'] == [4.0] * 5
+    assert type(res['COP3502']['distributions']['quality'][0]) is float
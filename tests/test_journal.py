@@ -0,0 +1,58 @@
+from understudy.api.store.journal import Journal
+
+from tests.helpers import rating
+
+
+def test_records_sections_per_namespace(tmp_path):
+    journal = Journal(str(tmp_path / 'journal.db'))
+    journal.record('g1', 'p1', 'COP3502', [rating('r1'), rating('r2')])
+    journal.record('g1', 'p2', 'COP3502', [])
+    journal.record('g2', 'p1', 'COP3503', [rating('r3')])
+
+    assert journal.completed('g1') == {('p1', 'COP3502'), ('p2', 'COP3502')}
+    assert journal.completed('g2') == {('p1', 'COP3503')}
+    assert journal.completed('g3') == set()
+
+    replayed = {
+        (prof, course): [r.id for r in ratings]
+        for prof, course, ratings in journal.replay('g1')
+    }
+    assert replayed == {('p1', 'COP3502'): ['r1', 'r2'], ('p2', 'COP3502'): []}
+
+    # Ratings come back whole
+    [(_, _, [replayed_rating])] = journal.replay('g2')
+    assert replayed_rating.comment == "fair exams"
+    assert replayed_rating.quality == 4.0
+    assert tuple(replayed_rating.votes) == (1, 0)
+
+
+def test_rerecording_replaces_a_section(tmp_path):
+    journal = Journal(str(tmp_path / 'journal.db'))
+    journal.record('g1', 'p1', 'COP3502', [rating('r1')])
+    journal.record('g1', 'p1', 'COP3502', [rating('r1'), rating('r2')])
+
+    [(_, _, ratings)] = journal.replay('g1')
+    assert [r.id for r in ratings] == ['r1', 'r2']
+
+
+def test_meta_survives_reopening_until_reset(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    Journal(path).set_meta('run', {'schools': {'s': {'generation': 'g1'}}})
+    journal = Journal(path)
+    journal.record('g1', 'p1', 'COP3502', [])
+    assert journal.get_meta('run') == {'schools': {'s': {'generation': 'g1'}}}
+
+    journal.reset()
+    assert journal.get_meta('run') is None
+    assert journal.completed('g1') == set()
+
+
+def test_remove_deletes_the_files(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    journal = Journal(path)
+    journal.record('g1', 'p1', 'COP3502', [rating('r1')])
+    journal.remove()
+    assert list(tmp_path.iterdir()) == []
+
+    # A new journal at the path starts empty
+    assert Journal(path).completed('g1') == set()
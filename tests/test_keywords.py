@@ -0,0 +1,51 @@
+from understudy.api.search.keywords import section_keywords
+
+from tests.helpers import rating
+
+
+def _ratings() -> list:
+    return [
+        ('p1', 'COP3502', rating('r1', "recursion recursion exams")),
+        ('p1', 'COP3502', rating('r2', "recursion projects exams")),
+        ('p2', 'COP3502', rating('r3', "exams fair projects")),
+        ('p2', 'COP3502', rating('r4', "exams fair lectures")),
+        ('p3', 'COP3503', rating('r5', "pointers")),
+    ]
+
+
+def test_distinctive_terms_rank_first():
+    res = section_keywords(_ratings(), min_ratings=1)
+    assert res['COP3502']['p1'][0] == 'recursion'
+    assert res['COP3502']['p2'][0] == 'fair'
+
+    # Terms in every one of the course's ratings don't set sections apart
+    assert not any('exam' in terms for terms in res['COP3502'].values())
+
+
+def test_terms_need_min_ratings():
+    # Each section mentions projects (and p2 lectures) only once
+    assert section_keywords(_ratings())['COP3502'] == {
+        'p1': ['recursion'],
+        'p2': ['fair'],
+    }
+    assert 'project' in section_keywords(
+        _ratings(), min_ratings=1)['COP3502']['p1']
+
+
+def test_top_cuts_off_each_section():
+    res = section_keywords(_ratings(), min_ratings=1, top=2)
+    assert res['COP3502']['p1'] == ['recursion', 'project']
+    assert len(res['COP3502']['p2']) == 2
+    assert res['COP3502']['p2'][0] == 'fair'
+
+    res = section_keywords(_ratings(), min_ratings=1, top=1)
+    assert res['COP3502'] == {'p1': ['recursion'], 'p2': ['fair']}
+
+
+def test_every_course_gets_an_entry():
+    # A course whose only section has no keywords still gets one
+    res = section_keywords(_ratings())
+    assert set(res) == {'COP3502', 'COP3503'}
+    assert res['COP3503'] == {}
+
+    assert section_keywords([]) == {}
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from understudy.api.courses import lookup
+from understudy.api.store.memory import MemoryStore
+
+from tests.helpers import professor, rating
+
+
+class _SlowStore(MemoryStore):
+    """
+    Memory store with slow section queries, counting them.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.queries = 0
+        self.error: Exception | None = None
+
+    def sections(self, course, *, min_take_again=0):
+        self.queries += 1
+        time.sleep(0.2)
+        if self.error is not None:
+            raise self.error
+        return super().sections(course, min_take_again=min_take_again)
+
+
+@pytest.fixture
+def store(lookup_db) -> _SlowStore:
+    store = _SlowStore()
+    store.replace_professors([professor('p1', 'COP3502')])
+    store.write_ratings('p1', 'COP3502', [
+        rating('r%d' % i) for i in range(5)])
+
+    lookup_db(store)
+    return store
+
+
+def _concurrently(fn, num: int = 8) -> list:
+    results: list = [None] * num
+
+    def run(i: int):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(num)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_lookups_share_one_query(store):
+    results = _concurrently(lambda: lookup.collect_sections('COP3502'))
+    assert store.queries == 1
+    assert all(len(res) == 1 for res in results)
+
+    # Each caller gets its own list
+    assert len({id(res) for res in results}) == len(results)
+
+    # Nothing is kept once the lookup finishes
+    lookup.collect_sections('COP3502')
+    assert store.queries == 2
+
+
+def test_different_lookups_run_separately(store):
+    calls = iter(range(8))
+    results = _concurrently(lambda: lookup.collect_sections(
+        'COP3502', min_reviews=3 + next(calls) % 2 * 3))
+    assert store.queries == 2
+    assert sorted(len(res) for res in results) == [0] * 4 + [1] * 4
+
+
+def test_errors_are_shared(store):
+    store.error = RuntimeError("database is down")
+    results = _concurrently(lambda: lookup.collect_sections('COP3502'))
+    assert store.queries == 1
+    assert all(res is store.error for res in results)
@@ -0,0 +1,45 @@
+from tests.helpers import professor, rating
+
+
+def test_full_reads_dont_collide_across_collections(mongo_store):
+    mongo_store.replace_professors([professor('p1', 'COP3502')])
+    mongo_store.write_ratings('p1', 'COP3502', [rating('r1')])
+    mongo_store.put_document('sections:COP3502', {'p1': {}})
+
+    # Each collection's find({}) must return its own documents
+    assert [r.id for _, _, r in mongo_store.all_ratings()] == ['r1']
+    assert [p.id for p in mongo_store.all_professors()] == ['p1']
+    assert dict(mongo_store.all_documents()) == {
+        'sections:COP3502': {'p1': {}},
+    }
+
+
+def test_reads_follow_writes_across_namespaces(mongo_store):
+    first = mongo_store.scoped('g1')
+    first.replace_professors([professor('p1', 'COP3502')])
+    assert [p.id for p in first.professors('COP3502')] == ['p1']
+
+    # A new namespace's reads aren't served from the old one's results
+    second = mongo_store.scoped('g2')
+    second.replace_professors([professor('p2', 'COP3502')])
+    assert [p.id for p in second.professors('COP3502')] == ['p2']
+
+    # Nor are reads after a write to the same collection
+    second.write_ratings('p2', 'COP3502', [rating('r1')])
+    assert second.courses() == ['COP3502']
+    second.write_ratings('p2', 'COP3503', [rating('r2')])
+    assert second.courses() == ['COP3502', 'COP3503']
+
+
+def test_prepare_indexes_lookups(mongo_store):
+    store = mongo_store.scoped('g1')
+    store.prepare()
+    assert 'course' in store.ratings_collection.indexes
+    assert {'courses', 'id'} <= store.professors_collection.indexes.keys()
+    assert 'key' in store.documents_collection.indexes
+
+    # Indexes cover what's written after them
+    store.replace_professors([professor('p1', 'COP3502')])
+    store.write_ratings('p1', 'COP3502', [rating('r1')])
+    assert [p.id for p in store.professors('COP3502')] == ['p1']
+    assert [r.id for r in store.ratings('p1', 'COP3502')] == ['r1']
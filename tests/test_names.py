@@ -0,0 +1,94 @@
+import pytest
+
+from understudy.api.courses import lookup
+from understudy.api.search.names import build_name_index
+from understudy.api.snapshot.snapshot import write_snapshot
+from understudy.api.store import base
+from understudy.api.store.memory import MemoryStore
+from understudy.api.store.snapshot import SnapshotStore
+
+from tests.helpers import professor, rating
+
+
+def _fill(store):
+    store.replace_professors([
+        professor('p1', 'COP3502', 'COP3503', name="Richard Leinecker"),
+        professor('p2', 'PHY2048', name="Ann Smith", dept="Physics"),
+        professor('p3', 'MAC2311', name="Anne Smithers", dept="Mathematics"),
+        professor('p4', 'MAC2311', name="John Smith", dept="Mathematics"),
+    ])
+    store.write_ratings('p1', 'COP3502', [rating('a1'), rating('a2')])
+    store.write_ratings('p1', 'COP3503', [rating('a3')])
+
+
+@pytest.fixture
+def store(open_store):
+    return open_store(_fill)
+
+
+def test_search_professors_tolerates_typos(store):
+    assert store.search_professors('leineker')[0].professor_id == 'p1'
+    assert store.search_professors('richard leinecker', limit=1)[0].name \
+        == "Richard Leinecker"
+    assert store.search_professors('xyz') == []
+
+
+def test_search_professors_by_department(store):
+    assert [m.professor_id for m in store.search_professors('smith')][:2] \
+        == ['p2', 'p4']
+    assert store.search_professors('smith math')[0].professor_id == 'p4'
+    assert store.search_professors('smith physics')[0].professor_id == 'p2'
+
+
+def test_professor_by_id(store):
+    prof = store.professor('p1')
+    assert (prof.name, prof.courses) \
+        == ("Richard Leinecker", {'COP3502', 'COP3503'})
+    assert store.professor('p9') is None
+
+
+def test_collect_professor(store, lookup_db):
+    lookup_db(store)
+
+    sections = lookup.collect_professor('p1')
+    assert [(s.course, s.num_ratings) for s in sections] \
+        == [('COP3502', 2), ('COP3503', 1)]
+    assert lookup.collect_professor('p4') == []
+    assert lookup.collect_professor('p9') == []
+
+
+def test_replaced_snapshot_is_searched(tmp_path):
+    path = str(tmp_path / 'snapshot')
+    write_snapshot(path, [professor('p1', 'COP3502', name="Alice Anderson")],
+                   [('p1', 'COP3502', rating('a1'))])
+    store = SnapshotStore(path)
+    assert store.search_professors('anderson')[0].professor_id == 'p1'
+
+    write_snapshot(path, [professor('p2', 'COP3502', name="Bob Brown")],
+                   [('p2', 'COP3502', rating('b1'))])
+    assert store.search_professors('anderson') == []
+    assert store.search_professors('brown')[0].professor_id == 'p2'
+
+
+def test_name_index_is_kept_per_version(monkeypatch):
+    store = MemoryStore()
+    store.replace_professors([professor('p1', name="Alice Anderson")])
+    builds = []
+    monkeypatch.setattr(
+        base, 'build_name_index',
+        lambda profs: builds.append(1) or build_name_index(profs))
+
+    # Unversioned contents can change in place, so aren't kept
+    assert store.search_professors('alice')[0].professor_id == 'p1'
+    store.replace_professors([professor('p2', name="Alice Brown")])
+    assert store.search_professors('alice')[0].professor_id == 'p2'
+    assert len(builds) == 2
+
+    store.version = 'g1'
+    for _ in range(3):
+        store.search_professors('alice')
+    assert len(builds) == 3
+
+    store.version = 'g2'
+    store.search_professors('alice')
+    assert len(builds) == 4
@@ -0,0 +1,206 @@
+import asyncio
+import contextlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from understudy import prefetch
+from understudy.api.rmp.school import parse_school_id, school_namespace
+from understudy.api.rmp.telemetry import telemetry
+from understudy.api.store.base import scoped_path
+from understudy.api.store.client import _Db
+from understudy.api.store.generations import (
+    begin_generation,
+    current_generation,
+    generation_namespace,
+)
+from understudy.api.store.snapshot import SnapshotStore
+from understudy.api.store.sqlite import SqliteStore
+
+from tests.helpers import professor, rating
+
+
+def test_finish_run_on_mongo(mongo_store, monkeypatch, tmp_path):
+    monkeypatch.setattr(prefetch, 'db', _Db())
+    monkeypatch.setattr(prefetch, '_SNAPSHOT_PATH', str(tmp_path / 'snap'))
+    prefetch.db.use(mongo_store)
+
+    # Two schools' fetched generations, as left by the ratings shards
+    run: dict = {'schools': {}}
+    for school_id, prof in (
+        (prefetch.DEFAULT_SCHOOL_ID, 'p1'),
+        (parse_school_id('99'), 'p2'),
+    ):
+        namespace = school_namespace(school_id)
+        generation = begin_generation(mongo_store.scoped(namespace))
+        store = mongo_store.scoped(generation_namespace(namespace, generation))
+        store.replace_professors([professor(prof, 'COP3502')])
+        store.write_ratings(prof, 'COP3502', [rating('r1'), rating('r2')])
+        run['schools'][school_id] = {'generation': generation}
+
+    prefetch._finish_run(run)
+
+    for school_id, school in run['schools'].items():
+        namespace = school_namespace(school_id)
+        base = mongo_store.scoped(namespace)
+        assert current_generation(base) == school['generation']
+
+        store = base.scoped(
+            generation_namespace(namespace, school['generation']))
+        assert store.get_document('sections:COP3502') is not None
+        assert store.get_document('catalog')['courses'] == ['COP3502']
+
+        path = scoped_path(str(tmp_path / 'snap'), namespace)
+        assert os.path.isdir(path)
+        snapshot = SnapshotStore(path)
+        assert [p.id for p in snapshot.all_professors()] \
+            == [p.id for p in store.all_professors()]
+        assert len(list(snapshot.all_ratings())) == 2
+
+
+def test_failed_run_still_reports(monkeypatch, tmp_path):
+    def fail(*args, **kwargs):
+        with telemetry.phase('teachers'):
+            raise RuntimeError("RMP is down")
+
+    report = str(tmp_path / 'report.json')
+    monkeypatch.setattr(prefetch, '_REPORT_PATH', report)
+    monkeypatch.setattr(prefetch, '_prefetch', fail)
+    telemetry.reset()
+
+    with pytest.raises(RuntimeError):
+        prefetch.main([prefetch.DEFAULT_SCHOOL_ID])
+
+    with open(report) as f:
+        data = json.load(f)
+    assert data['counters'] == {'failed': 1}
+    assert 'teachers' in data['phases']
+
+
+@pytest.mark.parametrize('spec', ['memory', 'snapshot'])
+def test_unshared_store_is_refused(spec, monkeypatch, tmp_path):
+    monkeypatch.setattr(prefetch, 'db', _Db())
+    monkeypatch.setattr(prefetch, '_JOURNAL_PATH', str(tmp_path / 'journal'))
+    monkeypatch.setattr(prefetch, '_REPORT_PATH', str(tmp_path / 'report'))
+    monkeypatch.setenv('UNDERSTUDY_STORE', '%s:%s' % (spec, tmp_path / 'db'))
+
+    # Refused before anything is fetched or journaled
+    with pytest.raises(ValueError, match='shared'):
+        prefetch.main([prefetch.DEFAULT_SCHOOL_ID])
+    assert not os.path.exists(tmp_path / 'journal')
+
+
+class _FakeFetch:
+    """
+    Prefetch with professors and ratings served in-process and shards
+    run on threads, recording the sections fetched. Sections in fail
+    write their first page, then fail the run.
+    """
+
+    def __init__(self, monkeypatch, tmp_path):
+        self.store = SqliteStore(str(tmp_path / 'store.db'))
+        self.professors = {
+            'p1': professor('p1', 'COP3502', 'COP3503'),
+            'p2': professor('p2', 'COP3502'),
+        }
+        self.fetched: list[tuple[str, str]] = []
+        self.fail: set[tuple[str, str]] = set()
+
+        monkeypatch.setattr(prefetch, 'db', _Db())
+        monkeypatch.setattr(
+            prefetch, '_JOURNAL_PATH', str(tmp_path / 'journal'))
+        monkeypatch.setattr(prefetch, '_SNAPSHOT_PATH', str(tmp_path / 'snap'))
+        monkeypatch.setattr(prefetch, 'get_professors', self.get_professors)
+        monkeypatch.setattr(prefetch, 'stream_ratings', self.stream_ratings)
+        monkeypatch.setattr(
+            prefetch,
+            'parse_pool',
+            lambda workers=None: contextlib.nullcontext(),
+        )
+        monkeypatch.setattr(
+            prefetch,
+            'ProcessPoolExecutor',
+            lambda workers, mp_context: ThreadPoolExecutor(1),
+        )
+        prefetch.db.use(self.store)
+
+    async def get_professors(self, school_id: str) -> dict:
+        return dict(self.professors)
+
+    async def stream_ratings(self, professor_id: str, course: str, **kwargs):
+        self.fetched.append((professor_id, course))
+        yield [rating('%s-%s-1' % (professor_id, course))]
+        if (professor_id, course) in self.fail:
+            # Fail once the others have finished
+            await asyncio.sleep(0.05)
+            raise RuntimeError("connection reset")
+        yield [rating('%s-%s-2' % (professor_id, course))]
+
+    def run(self, *, resume: bool = False):
+        prefetch._prefetch(
+            [prefetch.DEFAULT_SCHOOL_ID],
+            workers=1,
+            shard_size=10,
+            parse_workers=1,
+            page_size=None,
+            resume=resume,
+        )
+
+    def generation(self) -> SqliteStore:
+        namespace = school_namespace(prefetch.DEFAULT_SCHOOL_ID)
+        generation = current_generation(self.store.scoped(namespace))
+        return self.store.scoped(generation_namespace(namespace, generation))
+
+
+def test_resume_fetches_only_the_rest(monkeypatch, tmp_path):
+    fake = _FakeFetch(monkeypatch, tmp_path)
+    fake.fail = {('p1', 'COP3503')}
+    with pytest.raises(RuntimeError):
+        fake.run()
+    assert sorted(fake.fetched) == [
+        ('p1', 'COP3502'), ('p1', 'COP3503'), ('p2', 'COP3502')]
+
+    # Only the failed section is fetched again, over its partial write
+    fake.fetched.clear()
+    fake.fail.clear()
+    fake.run(resume=True)
+    assert fake.fetched == [('p1', 'COP3503')]
+
+    store = fake.generation()
+    ids = [r.id for _, _, r in store.all_ratings()]
+    assert sorted(ids) == [
+        'p1-COP3502-1', 'p1-COP3502-2',
+        'p1-COP3503-1', 'p1-COP3503-2',
+        'p2-COP3502-1', 'p2-COP3502-2',
+    ]
+    assert store.get_document('catalog') is not None
+    assert not os.path.exists(prefetch._JOURNAL_PATH)
+
+
+def test_resume_leaves_published_generations(monkeypatch, tmp_path):
+    fake = _FakeFetch(monkeypatch, tmp_path)
+
+    # Interrupted after publishing, before old generations are dropped
+    def interrupt(*args):
+        raise KeyboardInterrupt
+
+    collect = prefetch.collect_generations
+    monkeypatch.setattr(prefetch, 'collect_generations', interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        fake.run()
+    monkeypatch.setattr(prefetch, 'collect_generations', collect)
+    fake.fetched.clear()
+
+    cleared = []
+    monkeypatch.setattr(
+        SqliteStore, 'clear_ratings', lambda store: cleared.append(store))
+    telemetry.reset()
+    fake.run(resume=True)
+
+    # The live generation isn't cleared, replayed, fetched or rewritten
+    assert cleared == []
+    assert fake.fetched == []
+    assert 'replayed' not in telemetry.counters
+    assert len(list(fake.generation().all_ratings())) == 6
@@ -0,0 +1,110 @@
+import asyncio
+
+from understudy.api.rmp import data
+from understudy.api.rmp.telemetry import telemetry
+
+from tests.fake_rmp import FakeRMP, rating_node, teacher
+
+
+def _run(fake: FakeRMP, monkeypatch, coro_fn):
+    async def run():
+        runner = await fake.start(monkeypatch)
+        try:
+            return await coro_fn()
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_get_professors_fills_gaps_by_name(monkeypatch):
+    # Two professors have no department
+    fake = FakeRMP(
+        teachers=[
+            teacher('t1', "Ada Lovelace", 'cs'),
+            teacher('t2', "Alan Turing", 'cs'),
+            teacher('t3', "Grace Hopper", None),
+            teacher('t4', "Edsger Dijkstra", None),
+            teacher('t5', "Barbara Liskov", 'cs'),
+        ],
+        departments=['cs'],
+    )
+    professors = _run(fake, monkeypatch, lambda: data.get_professors('s'))
+    assert set(professors) == {'t1', 't2', 't3', 't4', 't5'}
+
+    # Only partitions with missing professors are searched, and the
+    # full listing is never walked
+    searched = [
+        variables['query'].get('departmentID') or variables['query']['text']
+        for name, variables in fake.requests
+        if name == 'get_teachers'
+    ]
+    assert sorted(searched) == ['cs', 'd', 'e', 'g', 'h']
+
+
+def test_get_professors_walks_listing_as_last_resort(monkeypatch):
+    # Names the prefix searches can't match
+    fake = FakeRMP(
+        teachers=[
+            teacher('t1', "Ada Lovelace", 'cs'),
+            teacher('t2', "Ömer Öz", None),
+        ],
+        departments=['cs'],
+    )
+    professors = _run(fake, monkeypatch, lambda: data.get_professors('s'))
+    assert set(professors) == {'t1', 't2'}
+
+
+def test_failed_attempts_record_latency(monkeypatch):
+    monkeypatch.setattr(data, '_RETRY_BACKOFF', 0)
+    telemetry.reset()
+
+    fake = FakeRMP(failures=2)
+    assert _run(fake, monkeypatch, lambda: data.count_professors('s')) == 0
+
+    assert telemetry.counters['rmp.retries'] == 2
+    assert telemetry.histograms['rmp.latency.count_teachers.failed'].num == 2
+    assert telemetry.histograms['rmp.latency.count_teachers'].num == 1
+
+
+def test_stream_ratings_follows_cursors(monkeypatch):
+    # The honors section repeats one of the course's ratings
+    fake = FakeRMP(ratings={
+        ('t1', 'COP3502'): [rating_node('r%d' % i) for i in range(25)],
+        ('t1', 'COP3502H'): [rating_node('r0'), rating_node('h1')],
+    })
+
+    async def stream() -> list[list[str]]:
+        return [
+            [rating.id for rating in page]
+            async for page in data.stream_ratings(
+                't1', 'COP3502', page_size=10)
+        ]
+
+    pages = _run(fake, monkeypatch, stream)
+    assert [len(page) for page in pages] == [10, 10, 5, 1]
+    assert sum(pages, []) == ['r%d' % i for i in range(25)] + ['h1']
+
+    # Each filter is paged until its last page
+    cursors = [
+        (variables['courseFilter'], variables['cursor'])
+        for name, variables in fake.requests
+        if name == 'get_ratings'
+    ]
+    assert cursors == [
+        ('COP3502', None),
+        ('COP3502', '10'),
+        ('COP3502', '20'),
+        ('COP3502H', None),
+        ('COP3502C', None),
+    ]
+
+
+def test_get_ratings_by_course_isnt_truncated(monkeypatch):
+    fake = FakeRMP(ratings={
+        ('t1', 'COP3502'): [rating_node('r%d' % i) for i in range(1200)],
+    })
+    course, ratings = _run(
+        fake, monkeypatch, lambda: data.get_ratings_by_course('t1', 'COP3502'))
+    assert course == 'COP3502'
+    assert len(ratings) == 1200
@@ -0,0 +1,70 @@
+import pytest
+
+from understudy.api.search.courses import CourseIndex, index_courses
+from understudy.api.store.memory import MemoryStore
+
+from tests.helpers import professor, rating
+
+
+def _fill(store):
+    # Far more matching reviews than a search would return
+    store.replace_professors([
+        professor('p1', 'COP3502'),
+        professor('p2', 'COP3502'),
+        professor('p3', 'COP3502'),
+    ])
+    store.write_ratings('p1', 'COP3502', [
+        rating('a%d' % i, "the curve saved me") for i in range(300)
+    ])
+    store.write_ratings('p2', 'COP3502', [
+        rating('b1', "no curves at all"),
+        rating('b2', "hard exams"),
+    ])
+    store.write_ratings('p3', 'COP3502', [rating('c1', "hard exams")])
+
+
+@pytest.fixture
+def store(open_store):
+    return open_store(_fill)
+
+
+def test_comment_hits_count_every_match(store):
+    assert store.comment_hits('curve', course='COP3502') == {
+        'p1': 300,
+        'p2': 1,
+    }
+    assert store.comment_hits('curve', course='COP3503') == {}
+
+
+def test_search_within_a_section(store):
+    matches = store.search_comments(
+        'curve', course='COP3502', professor_id='p2', limit=3)
+    assert [(m.professor_id, m.rating.id) for m in matches] == [('p2', 'b1')]
+
+    matches = store.search_comments('hard exams', course='COP3502', limit=5)
+    assert {m.rating.id for m in matches} == {'b2', 'c1'}
+
+
+def test_stored_index_round_trips():
+    store = MemoryStore()
+    _fill(store)
+    index = index_courses(store.all_ratings())['COP3502']
+    loaded = CourseIndex.from_dict(index.to_dict())
+    assert loaded.hits('exam') == index.hits('exam') == {'p2': 1, 'p3': 1}
+    assert loaded.search('exam') == index.search('exam')
+
+
+def test_course_index_follows_changes_in_place():
+    store = MemoryStore()
+    _fill(store)
+    assert store.comment_hits('labs', course='COP3502') == {}
+
+    # Unversioned, so the new rating is searched
+    store.write_ratings('p3', 'COP3502', [rating('c2', "weekly labs")])
+    assert store.comment_hits('labs', course='COP3502') == {'p3': 1}
+
+    # Versioned contents don't change, so the index is kept
+    store.version = 'g1'
+    store.comment_hits('labs', course='COP3502')
+    store.write_ratings('p2', 'COP3502', [rating('b3', "labs")])
+    assert store.comment_hits('labs', course='COP3502') == {'p3': 1}
@@ -0,0 +1,96 @@
+import os
+import threading
+
+from understudy.api.snapshot.snapshot import remove_snapshot, write_snapshot
+from understudy.api.store.snapshot import SnapshotStore
+
+from tests.helpers import professor, rating
+
+
+def _write(path: str, prof: str):
+    write_snapshot(
+        path,
+        [professor(prof, 'COP3502')],
+        [(prof, 'COP3502', rating('r1'))],
+    )
+
+
+def test_replaced_snapshot_is_reloaded(tmp_path):
+    path = str(tmp_path / 'snapshot')
+    _write(path, 'p1')
+    store = SnapshotStore(path)
+    assert [p.id for p in store.all_professors()] == ['p1']
+
+    _write(path, 'p2')
+    assert os.path.islink(path)
+    assert [p.id for p in store.all_professors()] == ['p2']
+
+    # Only the current and previous versions are kept
+    _write(path, 'p3')
+    assert len([e for e in os.listdir(tmp_path) if '.v' in e]) == 2
+
+    remove_snapshot(path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_readers_never_see_a_missing_snapshot(tmp_path):
+    path = str(tmp_path / 'snapshot')
+    _write(path, 'p0')
+    store = SnapshotStore(path)
+    store.snapshot
+
+    errors: list[Exception] = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                list(store.all_professors())
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(20):
+            _write(path, 'p%d' % i)
+    finally:
+        done.set()
+        reader.join()
+
+    assert errors == []
+
+
+def test_legacy_directory_is_replaced(tmp_path):
+    path = str(tmp_path / 'snapshot')
+    os.makedirs(path)
+    _write(path, 'p1')
+    assert os.path.islink(path)
+    assert [p.id for p in SnapshotStore(path).all_professors()] == ['p1']
+
+
+def test_documents_are_read_when_asked_for(tmp_path):
+    path = str(tmp_path / 'snapshot')
+    documents = {
+        'catalog': {'courses': ['COP3502']},
+        'summary:COP3502': {'p1': {'terms': ['recursion']}},
+        'search:COP3502': {'terms': []},
+    }
+    write_snapshot(
+        path,
+        [professor('p1', 'COP3502')],
+        [('p1', 'COP3502', rating('r1'))],
+        documents.items(),
+    )
+    store = SnapshotStore(path)
+
+    # One file per document; course comment indexes are left out
+    assert sorted(os.listdir(os.path.join(path, 'documents'))) == [
+        'catalog.json', 'summary%3ACOP3502.json']
+    assert store.get_document('summary:COP3502') \
+        == documents['summary:COP3502']
+    assert store.get_document('comparison:COP3502') is None
+    assert dict(store.all_documents()) == {
+        'catalog': documents['catalog'],
+        'summary:COP3502': documents['summary:COP3502'],
+    }
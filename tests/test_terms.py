@@ -0,0 +1,96 @@
+import pytest
+
+from understudy.api.courses import lookup
+from understudy.api.courses.summary import summarize_sections, summary_key
+from understudy.api.courses.terms import (
+    combine_terms,
+    rollup_terms,
+    term_label,
+    term_of,
+)
+from understudy.api.rmp.parse import parse_ratings_page
+from understudy.api.snapshot.snapshot import write_snapshot
+from understudy.api.store.memory import MemoryStore
+from understudy.api.store.snapshot import SnapshotStore
+
+from tests.helpers import professor, rating
+
+
+def test_terms():
+    assert term_of('2023-01-15') == '2023-1'
+    assert term_of('2023-06-01') == '2023-2'
+    assert term_of('2023-12-01') == '2023-3'
+    assert term_of(None) is None
+    assert term_label('2023-3') == "Fall 2023"
+
+
+def test_combine_terms():
+    terms = rollup_terms([
+        rating('r1', quality=1, date='2022-09-01'),  # fall 2022
+        rating('r2', quality=5, date='2023-10-01'),  # fall 2023
+        rating('r3', quality=4, date='2023-10-02'),
+        rating('r4', quality=5),  # undated
+    ])
+    assert {term: r.count for term, r in terms.items()} \
+        == {'2022-3': 1, '2023-3': 2}
+
+    recent = combine_terms(terms, latest='2023-3', last=3)
+    assert (recent.count, recent.mean_quality) == (2, 4.5)
+
+    everything = combine_terms(terms, latest='2023-3')
+    assert everything.count == 3
+
+    # Fall 2022 is three terms before, so weighs half with a half-life of 3
+    weighted = combine_terms(terms, latest='2023-3', half_life=3)
+    assert weighted.count == pytest.approx(2.5)
+    assert weighted.quality == pytest.approx(9.5)
+
+
+def test_dates_are_parsed_and_stored(tmp_path):
+    body = (
+        b'{"data":{"node":{"ratings":{"edges":[{"node":{'
+        b'"id":"r1","helpfulRating":4,"difficultyRating":3,'
+        b'"comment":"ok","grade":"A","isForCredit":true,'
+        b'"isForOnlineClass":false,"attendanceMandatory":"",'
+        b'"textbookUse":-1,"ratingTags":"","thumbsUpTotal":0,'
+        b'"thumbsDownTotal":0,"date":"2023-05-02 18:47:59 +0000 UTC"}}],'
+        b'"pageInfo":{"endCursor":"x","hasNextPage":false}}}}}'
+    )
+    records, _, _ = parse_ratings_page(body)
+    assert records[0]['date'] == '2023-05-02'
+
+    path = str(tmp_path / 'snapshot')
+    write_snapshot(path, [professor('p1', 'COP3502')], [
+        ('p1', 'COP3502', rating('r1', date='2023-05-02')),
+        ('p1', 'COP3502', rating('r2')),
+    ])
+    assert [r.date for r in SnapshotStore(path).ratings('p1', 'COP3502')] \
+        == ['2023-05-02', None]
+
+
+def test_sections_rank_by_recent_rollups(lookup_db):
+    # p1 was great years ago; p2 is good now
+    store = MemoryStore()
+    store.replace_professors([
+        professor('p1', 'COP3502'),
+        professor('p2', 'COP3502'),
+    ])
+    store.write_ratings('p1', 'COP3502', [
+        rating('a%d' % i, quality=5, date='2015-10-01') for i in range(20)
+    ] + [rating('a-new', quality=2, date='2024-02-01')])
+    store.write_ratings('p2', 'COP3502', [
+        rating('b%d' % i, quality=4, date='2024-02-01') for i in range(5)
+    ])
+    for course, summaries in summarize_sections(store.all_ratings()).items():
+        store.put_document(summary_key(course), summaries)
+
+    lookup_db(store)
+
+    sections = lookup.collect_sections('COP3502')
+    assert [s.professor.id for s in sections] == ['p1', 'p2']
+    assert sections[0].recent is None
+
+    sections = lookup.collect_sections('COP3502', last_terms=6)
+    assert [s.professor.id for s in sections] == ['p2', 'p1']
+    assert sections[1].recent.count == 1
+    assert sections[1].recent.mean_quality == 2
@@ -0,0 +1,163 @@
+import gc
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from types import FunctionType, GetSetDescriptorType, ModuleType
+from typing import Any, Hashable
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['ResultCache', 'deep_size']
+
+_log = logging.getLogger(__name__)
+
+# Objects whose size sys.getsizeof reports in full (pandas objects count
+# their data, arrays their buffer if they own one)
+_OPAQUE = (
+    str,
+    bytes,
+    int,
+    float,
+    complex,
+    bool,
+    type(None),
+    np.ndarray,
+    np.generic,
+    pd.DataFrame,
+    pd.Series,
+    pd.Index,
+)
+
+# Objects that aren't data, e.g. an object's class
+_SKIPPED = (type, ModuleType, FunctionType)
+
+# Bytes around an object's inline attribute values
+_VALUES_HEADER = 16
+
+
+def deep_size(obj: Any) -> int:
+    """
+    Measures the bytes an object holds, following what it references
+    and counting shared objects once. Memory-mapped arrays (e.g. snapshot
+    columns) are file-backed, so only their headers count.
+    """
+
+    seen: set[int] = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, _OPAQUE):
+            continue
+
+        # Referents rather than vars(), which would allocate a dict for
+        # each object that doesn't have one yet
+        referents = gc.get_referents(obj)
+        stack.extend(referents)
+
+        # Attributes kept inline (without a dict) aren't in getsizeof:
+        # a pointer each (referents include the class) and a header
+        if _inline_attributes(obj, referents):
+            size += _VALUES_HEADER + 8 * (len(referents) - 1)
+    return size
+
+
+def _inline_attributes(obj: Any, referents: list) -> bool:
+    return (
+        isinstance(type(obj).__dict__.get('__dict__'), GetSetDescriptorType)
+        and not any(isinstance(r, dict) for r in referents)
+    )
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of lookup results with a memory budget: each
+    result's size is measured (deep_size) when it's added, and the least
+    recently used results are evicted once their total would exceed the
+    budget. Results larger than the whole budget aren't kept.
+    """
+
+    def __init__(self, *, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # Results and their sizes, least recently used first
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets a cached result, marking it recently used.
+        """
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """
+        Caches a result if it fits the budget, evicting as needed.
+        Returns the result.
+        """
+
+        if self.max_bytes <= 0:
+            return value
+
+        size = deep_size(value)
+        if size > self.max_bytes:
+            _log.debug("Not caching %r: %d bytes exceeds the %d byte budget",
+                       key, size, self.max_bytes)
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            while self._entries and self.nbytes + size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+            self._entries[key] = (value, size)
+            self.nbytes += size
+        return value
+
+    def clear(self):
+        """
+        Drops every cached result and resets the counts.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Gets the cache's size and hit/miss/eviction counts.
+        """
+
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,120 @@
+from bisect import bisect_left
+from typing import Iterable
+
+from understudy.api.rmp.rating import Rating
+
+__all__ = ['Catalog', 'build_catalog', 'catalog_key']
+
+
+def catalog_key() -> str:
+    """
+    Gets the store document key for the course catalog.
+    """
+
+    return 'catalog'
+
+
+class Catalog:
+    """
+    Every course with its rating and section (professor) counts, sorted
+    by code so a department prefix (e.g. 'COP') is a contiguous range.
+    """
+
+    def __init__(
+        self,
+        *,
+        courses: list[str],  # sorted course codes
+        ratings: list[int],  # number of ratings per course
+        sections: list[int],  # number of rated sections per course
+    ):
+        self.courses = courses
+        self.ratings = ratings
+        self.sections = sections
+
+        self._index = {course: i for i, course in enumerate(courses)}
+
+    def to_dict(self) -> dict:
+        """
+        Converts data to a dictionary for serialization.
+        """
+
+        return {
+            'courses': self.courses,
+            'ratings': self.ratings,
+            'sections': self.sections,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Catalog':
+        """
+        Creates an instance from a dictionary.
+        """
+
+        return cls(
+            courses=data['courses'],
+            ratings=data['ratings'],
+            sections=data['sections'],
+        )
+
+    def _range(self, prefix: str) -> range:
+        # Codes starting with the prefix sort between it and the prefix
+        # followed by the highest character
+        return range(
+            bisect_left(self.courses, prefix),
+            bisect_left(self.courses, prefix + '\uffff'),
+        )
+
+    def lookup(self, prefix: str = '', *, min_ratings: int = 0) -> list[str]:
+        """
+        Gets sorted course codes starting with a prefix (e.g. a
+        department) with at least the given number of ratings.
+        """
+
+        return [
+            self.courses[i]
+            for i in self._range(prefix.upper())
+            if self.ratings[i] >= min_ratings
+        ]
+
+    def departments(self, *, min_ratings: int = 0) -> dict[str, int]:
+        """
+        Gets each department prefix with its number of courses having at
+        least the given number of ratings, in order.
+        """
+
+        res: dict[str, int] = {}
+        for course, num in zip(self.courses, self.ratings):
+            if num >= min_ratings:
+                res[course[:3]] = res.get(course[:3], 0) + 1
+        return res
+
+    def stats(self, course: str) -> tuple[int, int]:
+        """
+        Gets a course's (ratings, sections) counts.
+        """
+
+        if course not in self._index:
+            return 0, 0
+
+        i = self._index[course]
+        return self.ratings[i], self.sections[i]
+
+
+def build_catalog(ratings: Iterable[tuple[str, str, Rating]]) -> Catalog:
+    """
+    Builds the course catalog from (professor_id, course, Rating).
+    """
+
+    # Ratings and rated professors per course
+    counts: dict[str, int] = {}
+    professors: dict[str, set[str]] = {}
+    for prof, course, _ in ratings:
+        counts[course] = counts.get(course, 0) + 1
+        professors.setdefault(course, set()).add(prof)
+
+    courses = sorted(counts)
+    return Catalog(
+        courses=courses,
+        ratings=[counts[course] for course in courses],
+        sections=[len(professors[course]) for course in courses],
+    )
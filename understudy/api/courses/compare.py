@@ -0,0 +1,152 @@
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+
+__all__ = ['METRICS', 'QUANTILES', 'compare_sections', 'comparison_key']
+
+
+# Section statistics compared within a course
+METRICS = ('quality', 'difficulty', 'take_again')
+
+# Quantiles (%) of each course-wide distribution
+QUANTILES = (10, 25, 50, 75, 90)
+
+
+def comparison_key(course: str) -> str:
+    """
+    Gets the store document key for a course's section comparisons.
+    """
+
+    return 'comparison:%s' % course
+
+
+def _percentile_ranks(
+    groups: np.ndarray,
+    values: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ranks values within their groups as percentiles (the % of the
+    group's values below each one, counting ties as half below).
+    Returns (ranks, sorted values, offsets of each group in them)
+    """
+
+    order = np.lexsort((values, groups))
+    groups, sorted_values = groups[order], values[order]
+    num_groups = int(groups.max()) + 1 if len(groups) else 0
+    offsets = np.searchsorted(groups, np.arange(num_groups + 1))
+
+    # Search each value in its own group's slice: offset each group's
+    # keys past the previous group's range
+    span = float(sorted_values.max() - sorted_values.min()) + 1 \
+        if len(sorted_values) else 1
+    keys = groups * span + (sorted_values - sorted_values.min(initial=0))
+    below = np.searchsorted(keys, keys, side='left')
+    above = np.searchsorted(keys, keys, side='right')
+    sizes = np.diff(offsets)[groups]
+    ranks = np.empty(len(values))
+    ranks[order] = ((below + above) / 2 - offsets[groups]) / sizes * 100
+    return ranks, sorted_values, offsets
+
+
+def compare_sections(
+    ratings: Iterable[tuple[str, str, Rating]],
+    professors: Iterable[Professor],
+) -> dict[str, dict]:
+    """
+    Ranks every section (professor's course) against the course's
+    others for mean quality, mean difficulty and would-take-again %,
+    and summarizes each course's distributions, vectorized over every
+    course at once.
+    Returns { course: { 'percentiles': { professor_id: { metric: % } },
+    'distributions': { metric: [quantile...] } } }
+    """
+
+    take_again = {prof.id: prof.take_again for prof in professors}
+
+    section_ids: dict[tuple[str, str], int] = {}
+    course_ids: dict[str, int] = {}
+
+    # Section per rating, and course and professor per section
+    rating_sections = array('i')
+    rating_quality = array('d')
+    rating_difficulty = array('d')
+    section_courses = array('i')
+    section_take_again = array('d')
+    for prof, course, rating in ratings:
+        section = section_ids.setdefault((course, prof), len(section_ids))
+        if section == len(section_courses):
+            section_courses.append(
+                course_ids.setdefault(course, len(course_ids)))
+            # RMP reports -1 when nobody answered
+            again = take_again.get(prof)
+            section_take_again.append(
+                np.nan if again is None or again < 0 else again)
+
+        rating_sections.append(section)
+        rating_quality.append(rating.quality)
+        rating_difficulty.append(rating.difficulty)
+
+    if not section_ids:
+        return {}
+
+    # Mean quality and difficulty per section
+    rows = np.frombuffer(rating_sections, dtype=np.int32)
+    counts = np.bincount(rows, minlength=len(section_ids))
+    stats = {
+        'quality': np.bincount(
+            rows, weights=np.frombuffer(rating_quality),
+            minlength=len(section_ids)) / counts,
+        'difficulty': np.bincount(
+            rows, weights=np.frombuffer(rating_difficulty),
+            minlength=len(section_ids)) / counts,
+        'take_again': np.frombuffer(section_take_again),
+    }
+    courses = np.frombuffer(section_courses, dtype=np.int32)
+
+    # Percentile ranks and quantiles per metric, over sections with it
+    ranks = {}
+    quantiles = {}
+    for metric, values in stats.items():
+        known = np.flatnonzero(~np.isnan(values))
+        ranks[metric] = np.full(len(values), np.nan)
+        metric_ranks, sorted_values, offsets = _percentile_ranks(
+            courses[known], values[known])
+        ranks[metric][known] = metric_ranks
+
+        # Nearest-rank quantiles of each course's sorted values
+        sizes = np.zeros(len(course_ids), dtype=np.int64)
+        sizes[:len(offsets) - 1] = np.diff(offsets)
+        starts = np.zeros(len(course_ids), dtype=np.int64)
+        starts[:len(offsets) - 1] = offsets[:-1]
+        quantiles[metric] = np.full((len(course_ids), len(QUANTILES)), np.nan)
+        if len(sorted_values):
+            picks = starts[:, None] + np.rint(
+                np.maximum(sizes - 1, 0)[:, None]
+                * np.array(QUANTILES) / 100).astype(np.int64)
+            quantiles[metric][sizes > 0] = sorted_values[picks[sizes > 0]]
+
+    # Unpack per course, rounded (and NaN to None) in bulk, for arrays of
+    # any shape
+    def unpack(values: np.ndarray, decimals: int) -> list:
+        res = np.round(values, decimals).astype(object)
+        res[np.isnan(values)] = None
+        return res.tolist()
+
+    distributions = {
+        metric: unpack(quantiles[metric], 3) for metric in METRICS}
+    res: dict[str, dict] = {
+        course: {
+            'percentiles': {},
+            'distributions': {
+                metric: distributions[metric][c] for metric in METRICS},
+        }
+        for c, course in enumerate(course_ids)
+    }
+    section_ranks = zip(*(unpack(ranks[metric], 1) for metric in METRICS))
+    for (course, prof), row in zip(section_ids, section_ranks):
+        res[course]['percentiles'][prof] = dict(zip(METRICS, row))
+    return res
@@ -1,44 +1,156 @@
-import json
+import os
+import threading
+from typing import Any, Callable, Hashable, TypeVar
+
+from understudy.api.courses.cache import ResultCache
+from understudy.api.courses.catalog import Catalog, catalog_key
+from understudy.api.courses.compare import comparison_key
 from understudy.api.courses.section import Section
-from understudy.api.mongo.client import db
-from understudy.api.rmp.professor import Professor
-from understudy.api.rmp.rating import Rating, RatingSet
-
-__all__ = ['collect_courses', 'collect_sections']
-
-
-def collect_courses(min_occurences: int) -> list[str]:
-    """
-    Returns a list of courses for which we have ratings data.
-    """
-
-    # return db.ratings.distinct('course')
-    return sorted([
-        doc['course']
-        for doc in db.ratings.aggregate([
-            {
-                '$group': {
-                    '_id': "$course",
-                    'count': {
-                        '$sum': 1
-                    }
-                }
-            },
-            {
-                '$match': {
-                    'count': {
-                        '$gte': min_occurences
-                    }
-                }
-            },
-            {
-                '$project': {
-                    '_id': 0,
-                    'course': "$_id"
-                }
-            }
-        ])
-    ])
+from understudy.api.courses.summary import summary_key
+from understudy.api.courses.terms import (
+    TermRollup,
+    combine_terms,
+    rollup_terms,
+)
+from understudy.api.rmp.rating import RatingSet
+from understudy.api.search.index import CommentMatch
+from understudy.api.search.names import NameMatch
+from understudy.api.store.client import db
+
+__all__ = [
+    'collect_catalog',
+    'collect_courses',
+    'collect_departments',
+    'collect_professor',
+    'collect_sections',
+    'comment_hits',
+    'result_cache',
+    'search_comments',
+    'search_professors',
+]
+
+T = TypeVar('T')
+
+
+class _Call:
+    """
+    An in-flight call, and its outcome once finished.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _SingleFlight:
+    """
+    Coalesces concurrent identical calls across threads (e.g. Streamlit
+    sessions): the first caller runs the call, and callers arriving while
+    it's in flight wait for it and share its result (or exception).
+    Nothing is kept once a call finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+# Lookups in flight, process-wide
+_flight = _SingleFlight()
+
+# Finished lookups, process-wide, within a memory budget (MiB)
+result_cache = ResultCache(max_bytes=int(
+    float(os.environ.get('UNDERSTUDY_CACHE_MB', 256)) * 2**20))
+
+_MISSING = object()
+
+
+def _shared(key: Hashable, fn: Callable[[], T]) -> T:
+    """
+    Runs a lookup once for concurrent identical callers and caches its
+    result. Keys include the data's generation, so results of a
+    replaced generation are never served and age out of the cache.
+    Unversioned data (no generation) can change in place, so its
+    results aren't cached.
+    """
+
+    if db.generation is None:
+        return _flight.do(key, fn)
+
+    res = result_cache.get(key, _MISSING)
+    if res is not _MISSING:
+        return res
+    return _flight.do(key, lambda: result_cache.put(key, fn()))
+
+
+def collect_catalog() -> Catalog | None:
+    """
+    Returns the course catalog precomputed by the prefetch, if any.
+    """
+
+    def load() -> Catalog | None:
+        doc = db.get_document(catalog_key())
+        return None if doc is None else Catalog.from_dict(doc)
+
+    return _shared(('catalog', db.generation), load)
+
+
+def collect_courses(min_occurences: int, *, prefix: str = '') -> list[str]:
+    """
+    Returns a list of courses for which we have ratings data, optionally
+    only those starting with a prefix (e.g. a department).
+    """
+
+    catalog = collect_catalog()
+    if catalog is not None:
+        return catalog.lookup(prefix, min_ratings=min_occurences)
+
+    # Without a catalog, group the ratings
+    courses = _shared(
+        ('courses', db.generation, min_occurences),
+        lambda: db.courses(min_occurences),
+    )
+    return [course for course in courses if course.startswith(prefix)]
+
+
+def collect_departments(min_occurences: int) -> dict[str, int]:
+    """
+    Returns each department prefix (e.g. 'COP') with its number of
+    courses for which we have ratings data.
+    """
+
+    catalog = collect_catalog()
+    if catalog is not None:
+        return catalog.departments(min_ratings=min_occurences)
+
+    res: dict[str, int] = {}
+    for course in collect_courses(min_occurences):
+        res[course[:3]] = res.get(course[:3], 0) + 1
+    return res
 
 
 def collect_sections(
@@ -48,34 +160,66 @@ def collect_sections(
     min_quality: float = 0,  # Min average quality rating (0-5)
     max_difficulty: float = 5,  # Max average difficulty rating (0-5)
     min_take_again: float = 0,  # Min % who would take professor again (0-100)
+    last_terms: int | None = None,  # Only rank by the course's last N terms
+    half_life: float | None = None,  # Halve ratings' weight every N terms
 ) -> list[Section]:
     """
     Collects professor sections for a course that meet criteria
     for review count, quality, difficulty, etc.
+
+    With last_terms and/or half_life, sections also get recent
+    statistics (combined from precomputed per-term rollups), which
+    they're ranked by.
+
+    Concurrent identical lookups (of the same generation of data) share
+    one query, and results are cached within UNDERSTUDY_CACHE_MB.
     """
 
-    professors = map(
-        Professor.from_dict,
-        db.professors.find({
-            'courses': course,
-            'take_again': {
-                '$gte': min_take_again,
-            },
-        }),
-    )
+    # Results are shared, so each caller gets its own list
+    return list(_shared(
+        (
+            'sections',
+            db.generation,
+            course,
+            min_reviews,
+            min_quality,
+            max_difficulty,
+            min_take_again,
+            last_terms,
+            half_life,
+        ),
+        lambda: _collect_sections(
+            course,
+            min_reviews=min_reviews,
+            min_quality=min_quality,
+            max_difficulty=max_difficulty,
+            min_take_again=min_take_again,
+            last_terms=last_terms,
+            half_life=half_life,
+        ),
+    ))
+
+
+def _collect_sections(
+    course: str,
+    *,
+    min_reviews: int,
+    min_quality: float,
+    max_difficulty: float,
+    min_take_again: float,
+    last_terms: int | None,
+    half_life: float | None,
+) -> list[Section]:
+    # Precomputed section summaries, keyed by professor ID
+    summaries = db.get_document(summary_key(course)) or {}
+
+    # Precomputed standing among the course's sections
+    comparison = db.get_document(comparison_key(course)) or {}
+    percentiles = comparison.get('percentiles', {})
 
     # Filtered sections
     res: list[Section] = []
-    for prof in professors:
-        # Retrieve ratings for this professor's section
-        ratings = map(
-            Rating.from_query_result,
-            db.ratings.find({
-                'professor': prof.id,
-                'course': course,
-            }),
-        )
-
+    for prof, ratings in db.sections(course, min_take_again=min_take_again):
         # Check if this section meets the filter criteria
         rating_set = RatingSet(ratings)
         if (
@@ -85,24 +229,137 @@ def collect_sections(
         ):
             continue
 
+        # Per-term rollups (from the ratings for older summaries)
+        summary = summaries.get(prof.id, {})
+        terms = {
+            term: TermRollup.from_dict(rollup)
+            for term, rollup in summary['terms'].items()
+        } if 'terms' in summary else rollup_terms(ratings)
+
         # Do the thing
         res.append(Section(
             course=course,
             professor=prof,
             ratings=rating_set,
+            keywords=summary.get('keywords'),
+            terms=terms,
+            percentiles=percentiles.get(prof.id),
+            distributions=comparison.get('distributions'),
         ))
 
     # Avoid zero division
     if len(res) == 0:
         return res
 
+    # Combine recent terms' rollups, up to the course's latest term
+    recency = last_terms is not None or half_life is not None
+    latest = max((t for section in res for t in section.terms), default=None)
+    if recency and latest is not None:
+        for section in res:
+            section.recent = combine_terms(
+                section.terms,
+                latest=latest,
+                last=last_terms,
+                half_life=half_life,
+            )
+
+    # Mean quality and number of ratings to rank a section by
+    def stats(section: Section) -> tuple[float, float]:
+        if section.recent is not None and section.recent.count:
+            return section.recent.mean_quality, section.recent.count
+        if section.recent is not None:
+            return 0, 0
+        return section.quality, section.num_ratings
+
     # Parameters for weighted scoring function
-    C = sum(section.quality for section in res) / len(res)
+    ranked = [stats(section) for section in res if stats(section)[1]]
+    C = sum(q for q, _ in ranked) / len(ranked) if ranked else 0
     m = 40  # arbitrary tuning parameter
 
     # Weighted score for sorting
     def score(section: Section) -> float:
-        return (section.quality * section.num_ratings + C * m) \
-            / (section.num_ratings + m)
+        quality, num = stats(section)
+        return (quality * num + C * m) / (num + m)
 
     return sorted(res, key=score, reverse=True)
+
+
+def search_comments(
+    query: str,
+    *,
+    course: str | None = None,
+    professor_id: str | None = None,
+    limit: int = 20,
+) -> list[CommentMatch]:
+    """
+    Returns ratings whose comments best match a search query, optionally
+    within a course and/or a professor's ratings.
+    """
+
+    return db.search_comments(
+        query,
+        course=course,
+        professor_id=professor_id,
+        limit=limit,
+    )
+
+
+def comment_hits(query: str, *, course: str) -> dict[str, int]:
+    """
+    Returns how many of each professor's ratings for a course have
+    comments matching a search query, keyed by professor ID.
+    """
+
+    return db.comment_hits(query, course=course)
+
+
+def search_professors(query: str, *, limit: int = 10) -> list[NameMatch]:
+    """
+    Returns professors whose names (and departments) best match a
+    search query, tolerating typos.
+    """
+
+    return db.search_professors(query, limit=limit)
+
+
+def collect_professor(professor_id: str) -> list[Section]:
+    """
+    Collects a professor's section for each of their courses with
+    ratings, most rated first, with the same precomputed aggregates as
+    collect_sections.
+    """
+
+    return list(_shared(
+        ('professor', db.generation, professor_id),
+        lambda: _collect_professor(professor_id),
+    ))
+
+
+def _collect_professor(professor_id: str) -> list[Section]:
+    prof = db.professor(professor_id)
+    if prof is None:
+        return []
+
+    res: list[Section] = []
+    for course in sorted(prof.courses):
+        ratings = db.ratings(professor_id, course)
+        if not ratings:
+            continue
+
+        summary = (db.get_document(summary_key(course)) or {}) \
+            .get(professor_id, {})
+        comparison = db.get_document(comparison_key(course)) or {}
+        res.append(Section(
+            course=course,
+            professor=prof,
+            ratings=RatingSet(ratings),
+            keywords=summary.get('keywords'),
+            terms={
+                term: TermRollup.from_dict(rollup)
+                for term, rollup in summary['terms'].items()
+            } if 'terms' in summary else rollup_terms(ratings),
+            percentiles=comparison.get('percentiles', {}).get(professor_id),
+            distributions=comparison.get('distributions'),
+        ))
+
+    return sorted(res, key=lambda section: section.num_ratings, reverse=True)
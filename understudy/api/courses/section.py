@@ -1,4 +1,5 @@
 from pandas import DataFrame
+from understudy.api.courses.terms import TermRollup
 from understudy.api.rmp.course import CourseMetaSet
 from understudy.api.rmp.professor import Professor
 from understudy.api.rmp.rating import RatingSet
@@ -18,9 +19,22 @@ class Section:
         course: str,
         professor: Professor,
         ratings: RatingSet,
+        keywords: list[str] | None = None,  # distinctive review terms
+        terms: dict[str, TermRollup] | None = None,  # rollups by term
+        recent: TermRollup | None = None,  # recent terms' ratings
+        percentiles: dict[str, float | None] | None = None,  # vs. course's
+        distributions: dict[str, list[float | None]] | None = None,
     ):
         self.course = course
         self.professor = professor
+        self.keywords = keywords or []
+        self.terms = terms or {}
+        self.recent = recent
+
+        # Standing among the course's sections, by metric (e.g. 'quality'),
+        # and the course-wide quantiles it's ranked against
+        self.percentiles = percentiles or {}
+        self.distributions = distributions or {}
 
         self.num_ratings = len(ratings)
         self.ratings = ratings
@@ -0,0 +1,60 @@
+from typing import Iterable, Iterator
+
+from understudy.api.courses.terms import TermRollup, term_of
+from understudy.api.rmp.rating import Rating
+from understudy.api.search.keywords import section_keywords
+
+__all__ = ['summary_key', 'summarize_sections']
+
+
+def summary_key(course: str) -> str:
+    """
+    Gets the store document key for a course's section summaries.
+    """
+
+    return 'sections:%s' % course
+
+
+def summarize_sections(
+    ratings: Iterable[tuple[str, str, Rating]],
+) -> dict[str, dict[str, dict]]:
+    """
+    Precomputes per-section aggregates for every course, from
+    (professor_id, course, Rating): distinctive review keywords and
+    per-term rollups of dated ratings.
+    Returns { course: { professor_id: { 'keywords', 'terms' } } }
+    """
+
+    # Term rollups keyed by course, professor and term, accumulated as
+    # the ratings stream past the keyword extraction
+    rollups: dict[str, dict[str, dict[str, TermRollup]]] = {}
+
+    def roll_up() -> Iterator[tuple[str, str, Rating]]:
+        for prof, course, rating in ratings:
+            term = term_of(rating.date)
+            if term is not None:
+                terms = rollups.setdefault(course, {}).setdefault(prof, {})
+                if term not in terms:
+                    terms[term] = TermRollup()
+                terms[term].add(rating)
+            yield prof, course, rating
+
+    keywords = section_keywords(roll_up())
+
+    return {
+        course: {
+            prof: {
+                'keywords': keywords.get(course, {}).get(prof, []),
+                'terms': {
+                    term: rollup.to_dict()
+                    for term, rollup in rollups.get(course, {})
+                    .get(prof, {}).items()
+                },
+            }
+            for prof in (
+                keywords.get(course, {}).keys()
+                | rollups.get(course, {}).keys()
+            )
+        }
+        for course in keywords.keys() | rollups.keys()
+    }
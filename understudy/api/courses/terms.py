@@ -0,0 +1,157 @@
+from typing import Iterable
+
+from understudy.api.rmp.rating import Rating
+
+__all__ = [
+    'TermRollup',
+    'combine_terms',
+    'rollup_terms',
+    'term_label',
+    'term_of',
+]
+
+
+# Academic terms by month: spring (1), summer (2) and fall (3)
+_SEASONS = (1, 1, 1, 1, 2, 2, 2, 3, 3, 3, 3, 3)
+_SEASON_NAMES = {1: "Spring", 2: "Summer", 3: "Fall"}
+
+
+def term_of(date: str | None) -> str | None:
+    """
+    Gets the academic term of an ISO date (YYYY-MM-DD) as a sortable
+    key, e.g. '2023-3' for fall 2023.
+    """
+
+    if not date:
+        return None
+
+    return '%s-%d' % (date[:4], _SEASONS[int(date[5:7]) - 1])
+
+
+def term_label(term: str) -> str:
+    """
+    Gets a term's display name, e.g. 'Fall 2023'.
+    """
+
+    year, season = term.split('-')
+    return "%s %s" % (_SEASON_NAMES[int(season)], year)
+
+
+def _term_number(term: str) -> int:
+    # Consecutive terms have consecutive numbers
+    year, season = term.split('-')
+    return int(year) * 3 + int(season) - 1
+
+
+class TermRollup:
+    """
+    Aggregates of a section's ratings (e.g. in one term): count, sums of
+    quality and difficulty, and tag counts. Rollups combine by adding
+    (optionally weighted), so multi-term statistics don't need the
+    ratings themselves.
+    """
+
+    def __init__(
+        self,
+        *,
+        count: float = 0,
+        quality: float = 0,  # sum
+        difficulty: float = 0,  # sum
+        tags: dict[str, float] | None = None,
+    ):
+        self.count = count
+        self.quality = quality
+        self.difficulty = difficulty
+        self.tags = tags or {}
+
+    def to_dict(self) -> dict:
+        """
+        Converts data to a dictionary for serialization.
+        """
+
+        return {
+            'count': self.count,
+            'quality': self.quality,
+            'difficulty': self.difficulty,
+            'tags': self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TermRollup':
+        """
+        Creates an instance from a dictionary.
+        """
+
+        return cls(
+            count=data['count'],
+            quality=data['quality'],
+            difficulty=data['difficulty'],
+            tags=dict(data['tags']),
+        )
+
+    def add(self, rating: Rating):
+        """
+        Adds a rating.
+        """
+
+        self.count += 1
+        self.quality += rating.quality
+        self.difficulty += rating.difficulty
+        for tag in rating.meta.tags:
+            self.tags[tag] = self.tags.get(tag, 0) + 1
+
+    def merge(self, other: 'TermRollup', weight: float = 1):
+        """
+        Adds another rollup, with its ratings weighted.
+        """
+
+        self.count += other.count * weight
+        self.quality += other.quality * weight
+        self.difficulty += other.difficulty * weight
+        for tag, num in other.tags.items():
+            self.tags[tag] = self.tags.get(tag, 0) + num * weight
+
+    @property
+    def mean_quality(self) -> float | None:
+        return self.quality / self.count if self.count else None
+
+    @property
+    def mean_difficulty(self) -> float | None:
+        return self.difficulty / self.count if self.count else None
+
+
+def rollup_terms(ratings: Iterable[Rating]) -> dict[str, TermRollup]:
+    """
+    Rolls up a section's dated ratings by term.
+    """
+
+    res: dict[str, TermRollup] = {}
+    for rating in ratings:
+        term = term_of(rating.date)
+        if term is not None:
+            if term not in res:
+                res[term] = TermRollup()
+            res[term].add(rating)
+    return res
+
+
+def combine_terms(
+    terms: dict[str, TermRollup],
+    *,
+    latest: str,
+    last: int | None = None,
+    half_life: float | None = None,
+) -> TermRollup:
+    """
+    Combines per-term rollups into one, optionally only the last terms
+    up to the latest one, and/or weighting each term's ratings by
+    recency (halving every half_life terms).
+    """
+
+    res = TermRollup()
+    for term, rollup in terms.items():
+        age = _term_number(latest) - _term_number(term)
+        if last is not None and age >= last:
+            continue
+        res.merge(rollup, 0.5 ** (age / half_life) if half_life else 1)
+    return res
@@ -1,22 +1,17 @@
 import streamlit as st
 from st_mongo_connection import MongoDBConnection
 
-__all__ = ['db']
+__all__ = ['connection']
 
 
-class db:
+def connection(collection: str) -> MongoDBConnection:
     """
-    MongoDB database connections.
+    Gets a connection to a collection in the configured Mongo database.
+    Connections are opened on first use (st.connection caches them).
     """
 
-    professors = st.connection(
+    return st.connection(
         'mongodb',
-        collection='professors',
-        type=MongoDBConnection,
-    )
-
-    ratings = st.connection(
-        'mongodb',
-        collection='ratings',
+        collection=collection,
         type=MongoDBConnection,
     )
@@ -0,0 +1,328 @@
+from typing import Any, Iterable
+
+__all__ = ['MemoryCollection']
+
+
+# Sentinel for missing document fields
+_MISSING = object()
+
+
+def _get(doc: dict, path: str) -> Any:
+    """
+    Gets a (possibly dotted) field from a document.
+    """
+
+    value: Any = doc
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _candidates(value: Any) -> list:
+    """
+    Values a filter is compared against (array fields match elementwise).
+    """
+
+    if isinstance(value, (list, tuple)):
+        return [value, *value]
+    return [value]
+
+
+# Comparison operators supported in filters
+_OPS = {
+    '$eq': lambda a, b: a == b,
+    '$ne': lambda a, b: a != b,
+    '$gt': lambda a, b: a is not None and a > b,
+    '$gte': lambda a, b: a is not None and a >= b,
+    '$lt': lambda a, b: a is not None and a < b,
+    '$lte': lambda a, b: a is not None and a <= b,
+    '$in': lambda a, b: a in b,
+}
+
+
+def _matches(doc: dict, filters: dict | None) -> bool:
+    """
+    Checks whether a document matches a Mongo-style filter.
+    """
+
+    for path, cond in (filters or {}).items():
+        value = _get(doc, path)
+        if value is _MISSING:
+            return False
+
+        if isinstance(cond, dict) and cond and all(
+                k.startswith('$') for k in cond):
+            for op, arg in cond.items():
+                if op not in _OPS:
+                    raise NotImplementedError("Unsupported operator %s" % op)
+                if op == '$ne':
+                    ok = all(_OPS[op](v, arg) for v in _candidates(value))
+                else:
+                    ok = any(_OPS[op](v, arg) for v in _candidates(value))
+                if not ok:
+                    return False
+        elif cond not in _candidates(value):
+            return False
+
+    return True
+
+
+def _resolve(doc: dict, expr: Any) -> Any:
+    """
+    Evaluates a '$field' reference (or literal) against a document.
+    """
+
+    if isinstance(expr, str) and expr.startswith('$'):
+        value = _get(doc, expr[1:])
+        return None if value is _MISSING else value
+    return expr
+
+
+class MemoryCollection:
+    """
+    In-memory stand-in for a Mongo collection connection, supporting the
+    subset of queries and aggregation stages this app uses. Useful for
+    benchmarks and local runs without a mongod.
+    """
+
+    def __init__(self, docs: Iterable[dict] = ()):
+        self.docs: list[dict] = []
+
+        # Single-field (multikey) equality indexes: field -> value -> docs
+        self.indexes: dict[str, dict[Any, list[dict]]] = {}
+
+        self.insert(list(docs))
+
+    def create_index(self, keys: str | list[tuple[str, int]], **kwargs):
+        """
+        Builds an equality index on a field (array fields index each item).
+        Driver-style compound keys index their leading field; options
+        (e.g. unique) are ignored.
+        """
+
+        field = keys if isinstance(keys, str) else keys[0][0]
+        index: dict[Any, list[dict]] = {}
+        for doc in self.docs:
+            self._index_doc(index, field, doc)
+        self.indexes[field] = index
+
+    def _index_doc(self, index: dict, field: str, doc: dict):
+        value = _get(doc, field)
+        if value is _MISSING:
+            return
+
+        keys = value if isinstance(value, (list, tuple)) else [value]
+        for key in set(keys):
+            index.setdefault(key, []).append(doc)
+
+    def _scan(self, filters: dict | None) -> Iterable[dict]:
+        """
+        Gets the smallest candidate set for a filter, using an index
+        where the filter has an equality condition on an indexed field.
+        """
+
+        best: list[dict] | None = None
+        for field, cond in (filters or {}).items():
+            if field not in self.indexes or isinstance(cond, dict):
+                continue
+
+            docs = self.indexes[field].get(cond, [])
+            if best is None or len(docs) < len(best):
+                best = docs
+
+        return self.docs if best is None else best
+
+    def find(self, filters: dict | None = None, **kwargs) -> list[dict]:
+        """
+        Finds documents matching the filter.
+        """
+
+        return [
+            doc for doc in self._scan(filters)
+            if _matches(doc, filters)
+        ]
+
+    def find_one(self, filters: dict | None = None, **kwargs) -> dict | None:
+        """
+        Finds the first document matching the filter.
+        """
+
+        return next(
+            (doc for doc in self._scan(filters) if _matches(doc, filters)),
+            None,
+        )
+
+    def count(self, filters: dict | None = None, **kwargs) -> int:
+        """
+        Counts documents matching the filter.
+        """
+
+        return len(self.find(filters))
+
+    def distinct(self, field: str, filters: dict | None = None,
+                 **kwargs) -> list:
+        """
+        Gets the distinct values of a field across matching documents.
+        """
+
+        values: dict = {}
+        for doc in self.find(filters):
+            value = _get(doc, field)
+            if value is _MISSING:
+                continue
+            for v in (value if isinstance(value, list) else [value]):
+                values[v] = None
+        return list(values)
+
+    def insert(self, data: list | dict, **kwargs) -> dict:
+        """
+        Inserts one document or a list of documents.
+        """
+
+        docs = [data] if isinstance(data, dict) else data
+        for doc in docs:
+            self.docs.append(doc)
+            for field, index in self.indexes.items():
+                self._index_doc(index, field, doc)
+
+        return {'inserted_count': len(docs)}
+
+    def insert_one(self, doc: dict, **kwargs) -> dict:
+        """
+        Inserts a document (driver-style name).
+        """
+
+        return self.insert(doc)
+
+    def insert_many(self, docs: list[dict], **kwargs) -> dict:
+        """
+        Inserts a list of documents (driver-style name).
+        """
+
+        return self.insert(list(docs))
+
+    def delete_many(self, filters: dict | None = None, **kwargs) -> dict:
+        """
+        Deletes documents matching the filter (driver-style name).
+        """
+
+        return self.delete(filters)
+
+    def delete(self, filters: dict | None = None, **kwargs) -> dict:
+        """
+        Deletes documents matching the filter.
+        """
+
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not _matches(doc, filters)]
+
+        # Rebuild indexes over the remaining documents
+        for field in list(self.indexes):
+            self.create_index(field)
+
+        return {'deleted_count': before - len(self.docs)}
+
+    def replace(
+        self,
+        filters: dict | None = None,
+        replacement: dict | None = None,
+        *,
+        upsert: bool = False,
+        **kwargs,
+    ) -> dict:
+        """
+        Replaces the first document matching the filter (inserting the
+        replacement if none match and upsert is set).
+        """
+
+        for i, doc in enumerate(self.docs):
+            if _matches(doc, filters):
+                self.docs[i] = replacement
+                for field in list(self.indexes):
+                    self.create_index(field)
+                return {'matched_count': 1, 'modified_count': 1}
+
+        if upsert:
+            self.insert(replacement)
+        return {'matched_count': 0, 'modified_count': 0}
+
+    def replace_one(
+        self,
+        filters: dict | None = None,
+        replacement: dict | None = None,
+        *,
+        upsert: bool = False,
+        **kwargs,
+    ) -> dict:
+        """
+        Replaces a document (driver-style name).
+        """
+
+        return self.replace(filters, replacement, upsert=upsert)
+
+    def drop(self):
+        """
+        Deletes the collection's documents and indexes.
+        """
+
+        self.docs = []
+        self.indexes = {}
+
+    def aggregate(self, pipeline: list[dict], **kwargs) -> list[dict]:
+        """
+        Runs an aggregation pipeline ($match, $group with $sum,
+        $project and $sort stages).
+        """
+
+        docs: list[dict] = self.docs
+        for i, stage in enumerate(pipeline):
+            (op, arg), = stage.items()
+
+            if op == '$match':
+                docs = (
+                    self.find(arg) if i == 0
+                    else [d for d in docs if _matches(d, arg)]
+                )
+
+            elif op == '$group':
+                groups: dict[Any, dict] = {}
+                for doc in docs:
+                    key = _resolve(doc, arg['_id'])
+                    group = groups.setdefault(key, {'_id': key})
+                    for field, acc in arg.items():
+                        if field == '_id':
+                            continue
+                        if set(acc) != {'$sum'}:
+                            raise NotImplementedError(
+                                "Unsupported accumulator %s" % acc)
+                        group[field] = (
+                            group.get(field, 0)
+                            + (_resolve(doc, acc['$sum']) or 0)
+                        )
+                docs = list(groups.values())
+
+            elif op == '$project':
+                docs = [
+                    {
+                        field: _resolve(
+                            doc, '$' + field if expr in (1, True) else expr)
+                        for field, expr in arg.items()
+                        if expr not in (0, False)
+                    }
+                    for doc in docs
+                ]
+
+            elif op == '$sort':
+                for field, order in reversed(list(arg.items())):
+                    docs = sorted(
+                        docs,
+                        key=lambda d: _resolve(d, '$' + field),
+                        reverse=order < 0,
+                    )
+
+            else:
+                raise NotImplementedError("Unsupported stage %s" % op)
+
+        return [dict(doc) for doc in docs]
@@ -1,22 +1,32 @@
 import asyncio
+import json
 import logging
-import re
-from typing import Any
+import string
+import time
+from typing import Any, AsyncIterator
 
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientSession
 
 import understudy.api.rmp.queries as queries
-from understudy.api.rmp.course import CourseMeta
+from understudy.api.rmp.parse import (
+    parse_ratings_page,
+    parse_teachers_page,
+    run_parse,
+)
 from understudy.api.rmp.professor import Professor
 from understudy.api.rmp.rating import Rating
+from understudy.api.rmp.school import DEFAULT_SCHOOL_ID
+from understudy.api.rmp.telemetry import telemetry
 
 __all__ = [
     'Result',
     'RMP',
     'count_professors',
+    'get_departments',
     'get_professors',
     'get_ratings_by_course',
     'get_ratings',
+    'stream_ratings',
 ]
 
 _log = logging.getLogger(__name__)
@@ -25,7 +35,20 @@ _log = logging.getLogger(__name__)
 # For some reason we can just copy a token from the browser and it works lol
 _RMP_ENDPOINT = "https://www.ratemyprofessors.com/graphql"
 _RMP_TOKEN = 'dGVzdDp0ZXN0'
-_SCHOOL_ID = "U2Nob29sLTEwODI="
+_SCHOOL_ID = DEFAULT_SCHOOL_ID
+
+# Max concurrent searches when enumerating professors
+_MAX_CONCURRENCY = 16
+
+# Name prefixes partitioning a listing when department searches fall short
+_NAME_PARTITIONS = string.ascii_lowercase
+
+# Ratings per page when streaming a professor's ratings
+_RATINGS_PAGE_SIZE = 250
+
+# Retry policy for failed queries (network errors, 429s and 5xxs)
+_MAX_RETRIES = 3
+_RETRY_BACKOFF = 0.5  # seconds, doubled after each attempt
 
 
 class Result(dict):
@@ -77,200 +100,316 @@ class RMP(ClientSession):
         Queries the RMP graphql endpoint.
         """
 
-        payload = {'query': query_str, 'variables': variables}
-        res = await self.post(_RMP_ENDPOINT, json=payload)
-        return Result(await res.json())
+        body = await self.query_raw(query_str, **variables)
+        return Result(json.loads(body))
+
+    async def query_raw(self, query_str: str, **variables: Any) -> bytes:
+        """
+        Queries the RMP graphql endpoint for the raw response body,
+        retrying transient failures. Latency (of failed attempts too),
+        payload sizes and errors are recorded in telemetry.
+        """
+
+        name = queries.name_of(query_str)
+        payload = json.dumps({'query': query_str, 'variables': variables})
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                async with self.post(
+                    _RMP_ENDPOINT,
+                    data=payload,
+                    headers={'content-type': 'application/json'},
+                ) as res:
+                    # Retry on rate limiting and server errors
+                    if res.status == 429 or res.status >= 500:
+                        res.raise_for_status()
+                    body = await res.read()
+            except (ClientError, asyncio.TimeoutError) as e:
+                telemetry.observe('rmp.latency.%s.failed' % name,
+                                  time.perf_counter() - start)
+                telemetry.count('rmp.errors')
+                telemetry.count('rmp.errors.%s' % type(e).__name__)
+                if attempt >= _MAX_RETRIES:
+                    raise
+
+                attempt += 1
+                telemetry.count('rmp.retries')
+                _log.debug("Retrying %s (%d) after %r", name, attempt, e)
+                await asyncio.sleep(_RETRY_BACKOFF * 2 ** (attempt - 1))
+                continue
+
+            telemetry.observe('rmp.latency.%s' % name,
+                              time.perf_counter() - start)
+            telemetry.count('rmp.requests')
+            telemetry.count('rmp.bytes_out', len(payload))
+            telemetry.count('rmp.bytes_in', len(body))
+            return body
+
+
+async def _count_professors(rmp: RMP, query: dict) -> int:
+    res = await rmp.query(queries.count_teachers, query=query)
+    return res['data.result.teachers.resultCount']
 
 
 async def count_professors(school_id: str = _SCHOOL_ID) -> int:
     async with RMP() as rmp:
-        res = await rmp.query(
-            queries.count_teachers,
+        return await _count_professors(rmp, {
+            'text': "",
+            'schoolID': school_id,
+            'fallback': True,
+        })
+
+
+async def get_departments(school_id: str = _SCHOOL_ID) -> dict[str, str]:
+    """
+    Gets the departments listed under the school ID.
+    Returns { department_id: name }
+    """
+
+    async with RMP() as rmp:
+        res = await rmp.query(queries.get_departments, id=school_id)
+        return {
+            dept['id']: dept['name']
+            for dept in res['data.node.departments'] or []
+        }
+
+
+async def _search_professors(
+    rmp: RMP,
+    query: dict,
+    records: dict[str, dict],
+):
+    """
+    Pages through a professor search, adding parsed professor records
+    to the map (keyed by ID).
+    """
+
+    # We can only query 1000 professors at a time, and can't start from
+    # an offset index (need a cursor ID), so each search is sequential
+    cursor: str | None = None
+    while True:
+        body = await rmp.query_raw(
+            queries.get_teachers,
             **{
-                'query': {
-                    'text': "",
-                    'schoolID': school_id,
-                    'fallback': True,
-                },
+                'count': 1_000,
+                'cursor': cursor,
+                'query': query,
             },
         )
-        return res['data.result.teachers.resultCount']
+        page, cursor, has_next = await run_parse(
+            'parse.professors', parse_teachers_page, body)
+        for record in page:
+            records[record['id']] = record
+
+        if not page or not has_next:
+            break
+
+
+async def _fill_by_name(
+    rmp: RMP,
+    school_id: str,
+    records: dict[str, dict],
+    limit: asyncio.Semaphore,
+):
+    """
+    Searches name-prefix partitions of a school's listing concurrently
+    for professors missing from the map, skipping partitions whose
+    professors have all been found already.
+    """
+
+    def query(prefix: str) -> dict:
+        return {'text': prefix, 'schoolID': school_id, 'fallback': False}
+
+    async def count(prefix: str) -> int:
+        async with limit:
+            return await _count_professors(rmp, query(prefix))
+
+    async def search(prefix: str):
+        async with limit:
+            await _search_professors(rmp, query(prefix), records)
+
+    counts = await asyncio.gather(*map(count, _NAME_PARTITIONS))
+
+    # Professors already found in each partition (by name initials)
+    found = dict.fromkeys(_NAME_PARTITIONS, 0)
+    for record in records.values():
+        for initial in {word[0] for word in record['name'].lower().split()}:
+            if initial in found:
+                found[initial] += 1
+
+    missing = [
+        prefix
+        for prefix, num in zip(_NAME_PARTITIONS, counts)
+        if num > found[prefix]
+    ]
+    telemetry.count('teachers.name_partitions', len(missing))
+    _log.debug("Searching %d name partitions with missing professors",
+               len(missing))
+    await asyncio.gather(*map(search, missing))
 
 
 async def get_professors(school_id: str = _SCHOOL_ID) -> dict[str, Professor]:
     """
     Gets all professors listed under the school ID.
+
+    The listing is partitioned into per-department searches that run
+    concurrently, with professors de-duplicated by ID. If the partitions
+    don't cover the school's professor count, name-prefix partitions
+    with professors missing are searched (also concurrently), and only
+    if those still fall short is the unpartitioned listing walked.
     """
 
-    # Number of professors listed under the school ID
-    num = await count_professors(school_id)
+    # Number of professors listed under the school ID, and departments
+    num, departments = await asyncio.gather(
+        count_professors(school_id),
+        get_departments(school_id),
+    )
 
-    # Fetched professor nodes, keyed by ID
-    nodes: dict[str, dict] = {}
+    # Fetched professor records, keyed by ID
+    records: dict[str, dict] = {}
 
-    # Unfortunately we can only query 1000 professors at a time,
-    # and can't start from an offset index (need a cursor ID) so
-    # we have to do chunked queries sequentially :(
-    _log.debug('Fetching %d professor nodes...', num)
+    _log.debug("Fetching %d professor nodes from %d departments...",
+               num, len(departments))
     async with RMP() as rmp:
-        # Get the cursor ID of the first professor
-        cursor: str = (
-            await rmp.query(
-                queries.get_teachers,
-                **{
-                    'count': 1,
-                    'cursor': None,
-                    'query': {
-                        'text': "",
-                        'schoolID': school_id,
-                        'fallback': True,
-                    },
-                },
-            )
-        )['data.result.teachers.pageInfo.endCursor']
+        limit = asyncio.Semaphore(_MAX_CONCURRENCY)
 
-        # Get professor nodes sequentially
-        while len(nodes) < num:
-            # TODO: this fucking sucks
-            res = await rmp.query(
-                queries.get_teachers,
-                **{
-                    'count': 1_000,
-                    'cursor': cursor,
-                    'query': {
+        async def search(dept_id: str):
+            async with limit:
+                await _search_professors(
+                    rmp,
+                    {
                         'text': "",
                         'schoolID': school_id,
-                        'fallback': True,
+                        'departmentID': dept_id,
+                        'fallback': False,
                     },
-                },
-            )
-
-            # Update cursor for next chunk
-            cursor = res['data.result.teachers.pageInfo.endCursor']
-
-            # Add professors to nodes
-            for node in res['data.result.teachers.edges']:
-                nodes[node['node']['id']] = node['node']
+                    records,
+                )
 
-            _log.debug(
-                "...fetched %d nodes (now %d)...",
-                len(res['data.result.teachers.edges']),
-                len(nodes),
+        await asyncio.gather(*map(search, departments))
+        telemetry.count('teachers.partitions', len(departments))
+        _log.debug("Found %d nodes in departments", len(records))
+
+        # Completeness check (e.g. professors without a department)
+        if len(records) < num:
+            _log.info(
+                "Department searches found %d of %d professors; "
+                "searching by name",
+                len(records),
+                num,
             )
-        _log.debug("Found %d nodes", len(nodes))
+            await _fill_by_name(rmp, school_id, records, limit)
+
+        # Last resort, as name searches may not match every listing
+        if len(records) < num:
+            _log.info(
+                "Name searches found %d of %d professors; "
+                "walking the full listing",
+                len(records),
+                num,
+            )
+            telemetry.count('teachers.full_walks')
+            await _search_professors(
+                rmp,
+                {
+                    'text': "",
+                    'schoolID': school_id,
+                    'fallback': True,
+                },
+                records,
+            )
+        _log.debug("Found %d nodes", len(records))
 
     # Professor objects keyed by ID
-    professors: dict[str, Professor] = {}
-
-    # Parse professor nodes
-    _log.debug("Parsing professor nodes...")
-    for id, node in nodes.items():
-        # Get course codes that have the correct format
-        # (we throw away reviews that specify an incorrect code)
-        courses: set[str] = set()
-        for course in node['courseCodes']:
-            code: str = course['courseName']
-            if code and re.match(r'^[A-Za-z]{3}\d{4}[A-Za-z]?$', code):
-                # If there's an extra letter on the end (H or C), just drop it
-                courses.add(code[:7].upper())
-
-        # Create the professor instance
-        professors[id] = Professor(
-            id=id,
-            name="%s %s" % (node['firstName'], node['lastName']),
-            dept=node['department'],
-            quality=node['avgRating'],
-            difficulty=node['avgDifficulty'],
-            take_again=node['wouldTakeAgainPercent'],
-            courses=courses,
-        )
+    professors = {
+        id: Professor.from_dict(record)
+        for id, record in records.items()
+    }
 
+    telemetry.count('professors', len(professors))
     _log.debug("Retrieved %d professors", len(professors))
     return professors
 
 
-async def get_ratings_by_course(
+async def stream_ratings(
     professor_id: str,
     course: str,
-) -> tuple[str, list[Rating]]:
+    *,
+    page_size: int | None = None,
+) -> AsyncIterator[list[Rating]]:
     """
-    Gets all of a professor's ratings for a given course.
-    Returns (course, [Rating...])
+    Streams a professor's ratings for a course (including its honors
+    and combined sections) page by page, following cursors. Each page's
+    successor is requested before the page is yielded, so it can be
+    processed while the next request is in flight.
     """
 
-    # Rating nodes keyed by their ID
-    nodes: dict[str, dict] = {}
+    # IDs of ratings already yielded
+    seen: set[str] = set()
 
-    # Fetch ratings for this course, including combined and honors sections
     async with RMP() as rmp:
-        for course_filter in (course, '%sH' % course, '%sC' % course):
-            _log.debug("Fetching ratings for %s...", course_filter)
-            res = await rmp.query(
+        async def fetch(
+            course_filter: str,
+            cursor: str | None,
+        ) -> tuple[list[dict], str | None, bool]:
+            body = await rmp.query_raw(
                 queries.get_ratings,
                 **{
                     'id': professor_id,
-                    'count': 1_000,
+                    'count': page_size or _RATINGS_PAGE_SIZE,
+                    'cursor': cursor,
                     'courseFilter': course_filter,
                 },
             )
 
-            # Update node map
-            for node in res['data.node.ratings.edges']:
-                nodes[node['node']['id']] = node['node']
+            # Parse off the event loop
+            return await run_parse('parse.ratings', parse_ratings_page, body)
 
-            _log.debug(
-                "...fetched %d nodes (now %d)",
-                len(res['data.node.ratings.edges']),
-                len(nodes),
-            )
+        for course_filter in (course, '%sH' % course, '%sC' % course):
+            _log.debug("Fetching ratings for %s...", course_filter)
+            pending: asyncio.Task | None = asyncio.create_task(
+                fetch(course_filter, None))
+            try:
+                while pending is not None:
+                    records, cursor, has_next = await pending
+                    pending = asyncio.create_task(
+                        fetch(course_filter, cursor),
+                    ) if records and has_next else None
+
+                    page = [
+                        Rating.from_dict(record)
+                        for record in records
+                        if record['id'] not in seen
+                    ]
+                    seen.update(rating.id for rating in page)
+                    telemetry.count('ratings', len(page))
+                    telemetry.count('ratings.pages')
+                    if page:
+                        yield page
+            finally:
+                # The consumer may stop early
+                if pending is not None:
+                    pending.cancel()
 
-    # Parsed ratings
-    ratings: list[Rating] = []
-
-    # Parse nodes into Rating objects
-    _log.debug("Parsing rating nodes...")
-    for id, node in nodes.items():
-        # Process course metadata from the review
-        meta = CourseMeta(
-            online=node['isForOnlineClass'],
-            attendance_required=(
-                True
-                if node['attendanceMandatory'] == "mandatory"
-                else (
-                    False
-                    if node['attendanceMandatory'] == "non mandatory"
-                    else None
-                )
-            ),
-            textbook_required=(
-                True
-                if node['textbookUse'] == 1
-                else (False if node['textbookUse'] == 0 else None)
-            ),
-            tags=set([
-                tag.strip().lower()
-                for tag in node['ratingTags'].split('--') if tag
-            ]),
-        )
 
-        # Construct the actual rating object
-        ratings.append(
-            Rating(
-                id=id,
-                quality=node['helpfulRating'],
-                difficulty=node['difficultyRating'],
-                comment=node['comment'],
-                grade=(None if node['grade'].isspace() else node['grade']),
-                for_credit=node['isForCredit'],
-                meta=meta,
-                votes=(
-                    node['thumbsUpTotal'],
-                    node['thumbsDownTotal'],
-                ),
-            )
-        )
+async def get_ratings_by_course(
+    professor_id: str,
+    course: str,
+) -> tuple[str, list[Rating]]:
+    """
+    Gets all of a professor's ratings for a given course.
+    Returns (course, [Rating...])
+    """
+
+    ratings = [
+        rating
+        async for page in stream_ratings(professor_id, course)
+        for rating in page
+    ]
 
-    _log.debug("Parsed %d ratings", len(ratings))
+    _log.debug("Fetched %d ratings", len(ratings))
     return course, ratings
 
 
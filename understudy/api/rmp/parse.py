@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+
+from understudy.api.rmp.telemetry import telemetry
+
+__all__ = [
+    'parse_pool',
+    'run_parse',
+    'parse_teachers_page',
+    'parse_ratings_page',
+]
+
+T = TypeVar('T')
+
+# Course codes with the correct format (optionally with an H/C suffix)
+_COURSE_CODE = re.compile(r'^[A-Za-z]{3}\d{4}[A-Za-z]?$')
+
+# Process pool for the parse stage, if one is running
+_pool: ProcessPoolExecutor | None = None
+
+
+@contextmanager
+def parse_pool(workers: int | None = None) -> Iterator[ProcessPoolExecutor]:
+    """
+    Runs the parse stage on a process pool for the duration of the
+    block, keeping CPU-bound parsing off the event loop thread.
+    Without a pool, parsing runs inline.
+    """
+
+    global _pool
+    with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+        _pool = pool
+        try:
+            yield pool
+        finally:
+            _pool = None
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> tuple[float, T]:
+    start = time.perf_counter()
+    res = fn(*args)
+    return time.perf_counter() - start, res
+
+
+async def run_parse(phase: str, fn: Callable[..., T], *args: Any) -> T:
+    """
+    Runs a parse function on the pool (or inline without one), adding
+    its time to the telemetry phase.
+    """
+
+    if _pool is None:
+        elapsed, res = _timed(fn, *args)
+    else:
+        loop = asyncio.get_running_loop()
+        elapsed, res = await loop.run_in_executor(_pool, _timed, fn, *args)
+
+    telemetry.add_phase(phase, elapsed)
+    return res
+
+
+def parse_teachers_page(body: bytes) -> tuple[list[dict], str | None, bool]:
+    """
+    Parses a raw teacher search response into professor records (in
+    Professor.to_dict form). Returns ([professor...], cursor, has_next)
+    """
+
+    teachers = json.loads(body)['data']['result']['teachers']
+
+    professors: list[dict] = []
+    for edge in teachers['edges']:
+        node = edge['node']
+
+        # Get course codes that have the correct format
+        # (we throw away reviews that specify an incorrect code)
+        courses: set[str] = set()
+        for course in node['courseCodes']:
+            code: str = course['courseName']
+            if code and _COURSE_CODE.match(code):
+                # If there's an extra letter on the end (H or C), just drop it
+                courses.add(code[:7].upper())
+
+        professors.append({
+            'id': node['id'],
+            'name': "%s %s" % (node['firstName'], node['lastName']),
+            'dept': node['department'],
+            'quality': node['avgRating'],
+            'difficulty': node['avgDifficulty'],
+            'take_again': node['wouldTakeAgainPercent'],
+            'courses': list(courses),
+        })
+
+    page = teachers['pageInfo']
+    return professors, page['endCursor'], bool(page.get('hasNextPage'))
+
+
+def parse_ratings_page(body: bytes) -> tuple[list[dict], str | None, bool]:
+    """
+    Parses a raw ratings response into rating records (in
+    Rating.to_dict form). Returns ([rating...], cursor, has_next)
+    """
+
+    data = json.loads(body)['data']['node']['ratings']
+
+    ratings: list[dict] = []
+    for edge in data['edges']:
+        node = edge['node']
+        attendance = node['attendanceMandatory']
+        textbook = node['textbookUse']
+
+        ratings.append({
+            'id': node['id'],
+            'quality': node['helpfulRating'],
+            'difficulty': node['difficultyRating'],
+            'comment': node['comment'],
+            'grade': None if node['grade'].isspace() else node['grade'],
+            'for_credit': node['isForCredit'],
+            'meta': {
+                'online': node['isForOnlineClass'],
+                'attendance_required': (
+                    True if attendance == "mandatory"
+                    else (False if attendance == "non mandatory" else None)
+                ),
+                'textbook_required': (
+                    True if textbook == 1
+                    else (False if textbook == 0 else None)
+                ),
+                'tags': list({
+                    tag.strip().lower()
+                    for tag in node['ratingTags'].split('--') if tag
+                }),
+            },
+            'votes': (node['thumbsUpTotal'], node['thumbsDownTotal']),
+            # e.g. '2023-05-02 18:47:59 +0000 UTC'
+            'date': (node.get('date') or '')[:10] or None,
+        })
+
+    page = data['pageInfo']
+    return ratings, page['endCursor'], bool(page.get('hasNextPage'))
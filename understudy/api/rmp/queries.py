@@ -1,6 +1,12 @@
 import os
 
-__all__ = ['count_teachers']
+__all__ = [
+    'count_teachers',
+    'get_teachers',
+    'get_departments',
+    'get_ratings',
+    'name_of',
+]
 
 
 # Absolute root path for GraphQL queries
@@ -9,6 +15,9 @@ _query_root: str = os.path.join(
     '../../static/queries',
 )
 
+# Query names keyed by query text (for metrics/logging)
+_names: dict[str, str] = {}
+
 
 def _load_query(filename: str) -> str:
     """
@@ -17,9 +26,21 @@ def _load_query(filename: str) -> str:
 
     path = os.path.join(_query_root, filename)
     with open(path, 'r') as f:
-        return f.read()
+        query = f.read()
+
+    _names[query] = os.path.splitext(filename)[0]
+    return query
+
+
+def name_of(query: str) -> str:
+    """
+    Gets the name of a loaded query (its filename without extension).
+    """
+
+    return _names.get(query, 'unknown')
 
 
 count_teachers = _load_query('count_teachers.gql')
 get_teachers = _load_query('get_teachers.gql')
+get_departments = _load_query('get_departments.gql')
 get_ratings = _load_query('get_ratings.gql')
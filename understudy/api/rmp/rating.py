@@ -22,6 +22,7 @@ class Rating:
         for_credit: bool,
         meta: CourseMeta,
         votes: tuple[int, int],  # (helpful, unhelpful)
+        date: str | None = None,  # ISO date (YYYY-MM-DD), if known
     ):
         self.id = id
         self.quality = quality
@@ -31,6 +32,7 @@ class Rating:
         self.for_credit = for_credit
         self.meta = meta
         self.votes = votes
+        self.date = date
 
     def to_dict(self) -> dict:
         """
@@ -46,6 +48,7 @@ class Rating:
             'for_credit': self.for_credit,
             'meta': self.meta.to_dict(),
             'votes': self.votes,
+            'date': self.date,
         }
 
     @classmethod
@@ -63,6 +66,7 @@ class Rating:
             for_credit=data['for_credit'],
             meta=CourseMeta.from_dict(data['meta']),
             votes=data['votes'],
+            date=data.get('date'),  # missing for older records
         )
     
     @classmethod
@@ -0,0 +1,40 @@
+import base64
+import binascii
+import re
+
+__all__ = ['DEFAULT_SCHOOL_ID', 'parse_school_id', 'school_namespace']
+
+# RMP node ID for UCF (School-1082), the school the app was built for
+DEFAULT_SCHOOL_ID = "U2Nob29sLTEwODI="
+
+
+def parse_school_id(value: str) -> str:
+    """
+    Gets an RMP school node ID from either a node ID or the numeric ID
+    in a school's RMP URL (e.g. 1082).
+    """
+
+    if value.isdigit():
+        return base64.b64encode(b'School-%s' % value.encode()).decode()
+    return value
+
+
+def school_namespace(school_id: str) -> str:
+    """
+    Gets the store namespace for a school's data (e.g. 'school_1082').
+    The default school keeps the root namespace, so existing
+    deployments read the same collections as before.
+    """
+
+    if school_id == DEFAULT_SCHOOL_ID:
+        return ''
+
+    try:
+        legacy = base64.b64decode(school_id, validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        legacy = ''
+
+    kind, _, num = legacy.partition('-')
+    if kind == 'School' and num.isdigit():
+        return 'school_%s' % num
+    return 'school_%s' % re.sub(r'\W', '_', school_id)
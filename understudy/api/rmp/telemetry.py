@@ -0,0 +1,195 @@
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator
+
+__all__ = ['Histogram', 'Telemetry', 'telemetry']
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of observed values (e.g. request latencies).
+    Cheap enough to update on every request, and mergeable across runs.
+    """
+
+    # Default bucket upper bounds, in seconds (roughly log-spaced)
+    BOUNDS: tuple[float, ...] = (
+        0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+    )
+
+    def __init__(self, bounds: tuple[float, ...] = BOUNDS):
+        self.bounds = bounds
+
+        # Counts per bucket; the last bucket catches overflow
+        self.counts: list[int] = [0] * (len(bounds) + 1)
+
+        self.num: int = 0
+        self.total: float = 0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, value: float):
+        """
+        Records an observed value.
+        """
+
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.num += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'Histogram'):
+        """
+        Adds another histogram's observations (with the same bounds).
+        """
+
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.num += other.num
+        self.total += other.total
+        mins = [v for v in (self.min, other.min) if v is not None]
+        maxes = [v for v in (self.max, other.max) if v is not None]
+        self.min = min(mins) if mins else None
+        self.max = max(maxes) if maxes else None
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Estimates the q-th quantile (0-1) as the upper bound of the
+        bucket containing it. Overflowing values report the max.
+        """
+
+        if self.num == 0:
+            return None
+
+        rank = q * self.num
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+
+        return self.max
+
+    def to_dict(self) -> dict:
+        """
+        Converts data to a dictionary for serialization.
+        """
+
+        return {
+            'num': self.num,
+            'mean': self.total / self.num if self.num else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {
+                ('<=%g' % bound if i < len(self.bounds) else 'inf'): count
+                for i, (bound, count) in enumerate(
+                    zip(self.bounds + (float('inf'),), self.counts))
+                if count
+            },
+        }
+
+
+class Telemetry:
+    """
+    Aggregate counters, histograms and phase timings for a prefetch run.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all recorded data and restarts the clock.
+        """
+
+        self.started = time.time()
+
+        # Histograms keyed by metric name
+        self.histograms: dict[str, Histogram] = {}
+
+        # Counters keyed by metric name (requests, bytes, errors, ...)
+        self.counters: dict[str, int] = {}
+
+        # Accumulated wall time per phase, in seconds
+        self.phases: dict[str, float] = {}
+
+    def observe(self, name: str, value: float):
+        """
+        Records a value in the named histogram.
+        """
+
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        self.histograms[name].add(value)
+
+    def count(self, name: str, num: int = 1):
+        """
+        Increments the named counter.
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + num
+
+    def add_phase(self, name: str, seconds: float):
+        """
+        Adds wall time to a phase (for work timed elsewhere).
+        """
+
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times a block of work, accumulating its wall time under the
+        phase name. Concurrent tasks in the same phase are summed.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def merge(self, other: 'Telemetry'):
+        """
+        Adds another run's data (e.g. from a worker process) to this one.
+        """
+
+        for name, hist in other.histograms.items():
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(hist.bounds)
+            self.histograms[name].merge(hist)
+        for name, num in other.counters.items():
+            self.count(name, num)
+        for name, seconds in other.phases.items():
+            self.add_phase(name, seconds)
+
+    def report(self) -> dict:
+        """
+        Summarizes the run as a JSON-serializable dictionary.
+        """
+
+        return {
+            'started': self.started,
+            'elapsed': time.time() - self.started,
+            'phases': {k: round(v, 3) for k, v in self.phases.items()},
+            'counters': dict(self.counters),
+            'histograms': {
+                k: v.to_dict() for k, v in self.histograms.items()
+            },
+        }
+
+    def write(self, path: str):
+        """
+        Writes the run report to a JSON file.
+        """
+
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, separators=(',', ':'))
+
+
+# Process-wide telemetry for the current run
+telemetry = Telemetry()
@@ -0,0 +1,209 @@
+import base64
+import zlib
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+from understudy.api.rmp.rating import Rating
+from understudy.api.search.index import CommentIndex, IndexBuilder
+
+__all__ = [
+    'CourseIndex',
+    'CourseIndexBuilder',
+    'index_courses',
+    'index_key',
+    'is_index_key',
+]
+
+
+# Prefix of course index document keys
+_KEY_PREFIX = 'search:'
+
+# Types of the stored arrays
+_DTYPES = {
+    'offsets': np.int64,
+    'docs': np.int32,
+    'freqs': np.uint16,
+    'lengths': np.int32,
+    'professors': np.int32,
+}
+
+
+def index_key(course: str) -> str:
+    """
+    Gets the store document key for a course's comment index.
+    """
+
+    return _KEY_PREFIX + course
+
+
+def is_index_key(key: str) -> bool:
+    """
+    Checks whether a store document key is a course's comment index.
+    """
+
+    return key.startswith(_KEY_PREFIX)
+
+
+def _pack(column: np.ndarray) -> str:
+    # Compressed and text-encoded, so any store can hold it compactly
+    return base64.b64encode(zlib.compress(column.tobytes())).decode()
+
+
+def _unpack(data: str, dtype: type) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(base64.b64decode(data)), dtype=dtype)
+
+
+class CourseIndex:
+    """
+    Comment index over a course's ratings, stored as a document so any
+    store serves searches without indexing ratings per query. Documents
+    are identified by professor and rating ID.
+    """
+
+    def __init__(
+        self,
+        *,
+        index: CommentIndex,
+        professor_ids: list[str],
+        professors: np.ndarray,  # index into professor_ids per document
+        rating_ids: list[str],
+    ):
+        self.index = index
+        self.professor_ids = professor_ids
+        self.professors = professors
+        self.rating_ids = rating_ids
+
+        self._prof_index = {p: i for i, p in enumerate(professor_ids)}
+
+    def to_dict(self) -> dict:
+        """
+        Converts data to a dictionary for serialization.
+        """
+
+        return {
+            'terms': self.index.terms,
+            'professor_ids': self.professor_ids,
+            'rating_ids': self.rating_ids,
+            **{
+                name: _pack(column)
+                for name, column in self.index.columns().items()
+            },
+            'professors': _pack(self.professors),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CourseIndex':
+        """
+        Creates an instance from a dictionary.
+        """
+
+        columns = {
+            name: _unpack(data[name], dtype)
+            for name, dtype in _DTYPES.items()
+        }
+        return cls(
+            index=CommentIndex(
+                terms=data['terms'],
+                offsets=columns['offsets'],
+                docs=columns['docs'],
+                freqs=columns['freqs'],
+                lengths=columns['lengths'],
+            ),
+            professor_ids=data['professor_ids'],
+            professors=columns['professors'],
+            rating_ids=data['rating_ids'],
+        )
+
+    def search(
+        self,
+        query: str,
+        *,
+        professor_id: str | None = None,
+        limit: int = 20,
+    ) -> list[tuple[str, str, float]]:
+        """
+        Ranks the course's ratings (optionally one professor's) by how
+        well their comments match a query.
+        Returns [(professor_id, rating_id, score)...], best first.
+        """
+
+        mask: np.ndarray | None = None
+        if professor_id is not None:
+            if professor_id not in self._prof_index:
+                return []
+            mask = self.professors == self._prof_index[professor_id]
+
+        return [
+            (
+                self.professor_ids[int(self.professors[doc])],
+                self.rating_ids[doc],
+                score,
+            )
+            for doc, score in self.index.search(query, mask=mask, limit=limit)
+        ]
+
+    def hits(self, query: str) -> dict[str, int]:
+        """
+        Counts each professor's ratings whose comments match a query.
+        """
+
+        counts = np.bincount(
+            self.professors[self.index.matching(query)],
+            minlength=len(self.professor_ids),
+        )
+        return {
+            self.professor_ids[p]: int(counts[p])
+            for p in np.flatnonzero(counts)
+        }
+
+
+class CourseIndexBuilder:
+    """
+    Builds a CourseIndex incrementally, one rating at a time.
+    """
+
+    def __init__(self):
+        self._builder = IndexBuilder()
+        self._prof_index: dict[str, int] = {}
+        self._professors = array('i')
+        self._rating_ids: list[str] = []
+
+    def add(self, professor_id: str, rating: Rating):
+        """
+        Indexes a professor's rating.
+        """
+
+        self._builder.add(rating.comment)
+        self._professors.append(
+            self._prof_index.setdefault(professor_id, len(self._prof_index)))
+        self._rating_ids.append(rating.id)
+
+    def build(self) -> CourseIndex:
+        """
+        Builds the index.
+        """
+
+        return CourseIndex(
+            index=self._builder.build(),
+            professor_ids=list(self._prof_index),
+            professors=np.frombuffer(self._professors, dtype=np.int32).copy(),
+            rating_ids=self._rating_ids,
+        )
+
+
+def index_courses(
+    ratings: Iterable[tuple[str, str, Rating]],
+) -> dict[str, CourseIndex]:
+    """
+    Builds a comment index per course from (professor_id, course, Rating).
+    """
+
+    builders: dict[str, CourseIndexBuilder] = {}
+    for prof, course, rating in ratings:
+        if course not in builders:
+            builders[course] = CourseIndexBuilder()
+        builders[course].add(prof, rating)
+
+    return {course: builder.build() for course, builder in builders.items()}
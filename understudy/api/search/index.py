@@ -0,0 +1,258 @@
+import re
+from array import array
+
+import numpy as np
+
+from understudy.api.rmp.rating import Rating
+
+__all__ = ['CommentIndex', 'CommentMatch', 'IndexBuilder', 'tokenize']
+
+
+# Runs of letters/digits; apostrophes are dropped first ("don't" -> "dont")
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Words too common in reviews to be worth indexing
+_STOPWORDS = frozenset("""
+    a an and are as at be but by for from had has have he her his i if in
+    is it its me my of on or our she so that the their them they this to
+    was we were what when which who will with you your
+""".split())
+
+# BM25 tuning parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def _stem(word: str) -> str:
+    # Fold simple plurals ("curves" -> "curve", "quizzes" -> "quiz")
+    if len(word) <= 3 or word[-1] != 's' or word[-2] in 'siu':
+        return word
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('zzes'):
+        return word[:-3]
+    if word.endswith(('ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    return word[:-1]
+
+
+def tokenize(text: str | None) -> list[str]:
+    """
+    Splits text into normalized search terms (lowercased, with
+    stopwords dropped and simple plurals folded).
+    """
+
+    if not text:
+        return []
+
+    return [
+        _stem(word)
+        for word in _TOKEN.findall(text.lower().replace("'", ''))
+        if word not in _STOPWORDS
+    ]
+
+
+class CommentMatch:
+    """
+    A rating whose comment matches a search, with its relevance score.
+    """
+
+    def __init__(
+        self,
+        *,
+        professor_id: str,
+        course: str,
+        rating: Rating,
+        score: float,
+    ):
+        self.professor_id = professor_id
+        self.course = course
+        self.rating = rating
+        self.score = score
+
+
+class CommentIndex:
+    """
+    Inverted index from terms to the documents (e.g. rating rows) whose
+    text contains them, ranked with BM25. Postings are compact arrays
+    (CSR by term), so an index can be saved and memory-mapped.
+    """
+
+    def __init__(
+        self,
+        *,
+        terms: list[str],  # sorted vocabulary
+        offsets: np.ndarray,  # postings offsets per term
+        docs: np.ndarray,  # document per posting (sorted within a term)
+        freqs: np.ndarray,  # term frequency per posting
+        lengths: np.ndarray,  # number of terms per document
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.freqs = freqs
+        self.lengths = lengths
+
+        self._term_index: dict[str, int] | None = None
+        self._avg_length = float(lengths.mean()) if len(lengths) else 0
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """
+        Gets the index's arrays, keyed by name, for saving.
+        """
+
+        return {
+            'offsets': self.offsets,
+            'docs': self.docs,
+            'freqs': self.freqs,
+            'lengths': self.lengths,
+        }
+
+    def matching(
+        self,
+        query: str,
+        *,
+        start: int = 0,
+        stop: int | None = None,
+    ) -> np.ndarray:
+        """
+        Gets every document matching any of the query's terms, optionally
+        restricted to a range of documents (sorted, unranked).
+        """
+
+        if self._term_index is None:
+            self._term_index = {t: i for i, t in enumerate(self.terms)}
+
+        stop = len(self.lengths) if stop is None else stop
+        matched: list[np.ndarray] = [np.empty(0, dtype=np.int32)]
+        for term in set(tokenize(query)):
+            t = self._term_index.get(term)
+            if t is None:
+                continue
+
+            postings = self.docs[int(self.offsets[t]):int(self.offsets[t + 1])]
+            matched.append(np.asarray(postings[
+                np.searchsorted(postings, start):
+                np.searchsorted(postings, stop)]))
+
+        return np.unique(np.concatenate(matched))
+
+    def search(
+        self,
+        query: str,
+        *,
+        start: int = 0,
+        stop: int | None = None,
+        mask: np.ndarray | None = None,
+        limit: int = 20,
+    ) -> list[tuple[int, float]]:
+        """
+        Ranks documents matching any of the query's terms, optionally
+        restricted to a range of documents and/or a boolean mask over
+        them. Returns [(document, score)...], best first.
+        """
+
+        if self._term_index is None:
+            self._term_index = {t: i for i, t in enumerate(self.terms)}
+
+        num_docs = len(self.lengths)
+        stop = num_docs if stop is None else stop
+
+        # Score each term's postings in the range
+        matched_docs: list[np.ndarray] = []
+        matched_scores: list[np.ndarray] = []
+        for term in set(tokenize(query)):
+            t = self._term_index.get(term)
+            if t is None:
+                continue
+
+            first, last = int(self.offsets[t]), int(self.offsets[t + 1])
+            postings = self.docs[first:last]
+            idf = np.log1p(
+                (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+
+            # Postings are sorted by document, so a range is a slice
+            lo = first + int(np.searchsorted(postings, start))
+            hi = first + int(np.searchsorted(postings, stop))
+            docs = np.asarray(self.docs[lo:hi])
+            freqs = np.asarray(self.freqs[lo:hi], dtype=np.float32)
+            if mask is not None:
+                keep = mask[docs]
+                docs, freqs = docs[keep], freqs[keep]
+
+            norm = _K1 * (
+                1 - _B + _B * self.lengths[docs] / (self._avg_length or 1))
+            matched_docs.append(docs)
+            matched_scores.append(idf * freqs * (_K1 + 1) / (freqs + norm))
+
+        if not matched_docs:
+            return []
+
+        # Sum scores per document, then take the top matches
+        docs, inverse = np.unique(
+            np.concatenate(matched_docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(matched_scores))
+        if len(docs) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            docs, scores = docs[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+
+        return list(zip(docs[order].tolist(), scores[order].tolist()))
+
+
+class IndexBuilder:
+    """
+    Builds a CommentIndex incrementally, one document at a time.
+    Postings are kept as flat (term, document) arrays until built.
+    """
+
+    def __init__(self):
+        self._term_ids: dict[str, int] = {}
+        self._post_terms = array('i')
+        self._post_docs = array('i')
+        self._lengths = array('i')
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, text: str | None) -> int:
+        """
+        Indexes a document's text, returning its document number.
+        """
+
+        doc = len(self._lengths)
+        tokens = tokenize(text)
+        for token in tokens:
+            if token not in self._term_ids:
+                self._term_ids[token] = len(self._term_ids)
+            self._post_terms.append(self._term_ids[token])
+        self._post_docs.extend([doc] * len(tokens))
+        self._lengths.append(len(tokens))
+        return doc
+
+    def build(self) -> CommentIndex:
+        """
+        Builds the index (postings sorted by term, then document).
+        """
+
+        terms = sorted(self._term_ids)
+        remap = np.empty(len(terms), dtype=np.int64)
+        remap[[self._term_ids[t] for t in terms]] = np.arange(len(terms))
+
+        # Count each (term, document) pair in one pass
+        num_docs = max(len(self._lengths), 1)
+        keys = remap[np.frombuffer(self._post_terms, dtype=np.int32)] \
+            * num_docs + np.frombuffer(self._post_docs, dtype=np.int32)
+        keys, freqs = np.unique(keys, return_counts=True)
+        post_terms = keys // num_docs
+
+        offsets = np.searchsorted(
+            post_terms, np.arange(len(terms) + 1)).astype(np.int64)
+        return CommentIndex(
+            terms=terms,
+            offsets=offsets,
+            docs=(keys % num_docs).astype(np.int32),
+            freqs=np.minimum(freqs, np.iinfo(np.uint16).max)
+            .astype(np.uint16),
+            lengths=np.frombuffer(self._lengths, dtype=np.int32).copy(),
+        )
@@ -0,0 +1,108 @@
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+from understudy.api.rmp.rating import Rating
+from understudy.api.search.index import tokenize
+
+__all__ = ['section_keywords']
+
+
+def section_keywords(
+    ratings: Iterable[tuple[str, str, Rating]],
+    *,
+    top: int = 8,
+    min_ratings: int = 2,
+) -> dict[str, dict[str, list[str]]]:
+    """
+    Finds the most distinctive terms in each section's (professor's
+    course) comments, by TF-IDF against all comments for the course.
+    Terms must appear in at least min_ratings of the section's ratings.
+
+    Ratings are (professor_id, course, Rating), streamed once; scoring
+    is vectorized over every section at once.
+    Returns { course: { professor_id: [term...] } }
+    """
+
+    term_ids: dict[str, int] = {}
+    section_ids: dict[tuple[str, str], int] = {}
+    course_ids: dict[str, int] = {}
+
+    # Term and rating per comment token, section per rating, and course
+    # per section (as flat arrays, to keep memory low)
+    token_terms = array('i')
+    token_ratings = array('i')
+    rating_sections = array('i')
+    section_courses = array('i')
+    for prof, course, rating in ratings:
+        section = section_ids.setdefault((course, prof), len(section_ids))
+        if section == len(section_courses):
+            section_courses.append(
+                course_ids.setdefault(course, len(course_ids)))
+
+        tokens = tokenize(rating.comment)
+        for token in tokens:
+            token_terms.append(term_ids.setdefault(token, len(term_ids)))
+        token_ratings.extend([len(rating_sections)] * len(tokens))
+        rating_sections.append(section)
+
+    if not token_terms:
+        return {}
+
+    num_terms = len(term_ids)
+    terms = np.frombuffer(token_terms, dtype=np.int32).astype(np.int64)
+    rows = np.frombuffer(token_ratings, dtype=np.int32).astype(np.int64)
+    row_sections = np.frombuffer(rating_sections, dtype=np.int32)
+    courses = np.frombuffer(section_courses, dtype=np.int32)
+
+    # Term counts per (section, term), and section lengths in terms
+    keys, counts = np.unique(
+        row_sections[rows] * num_terms + terms, return_counts=True)
+    lengths = np.bincount(row_sections[rows], minlength=len(section_ids))
+
+    # Ratings containing each term, per section and per course
+    pairs = np.unique(rows * num_terms + terms)
+    pair_sections = row_sections[pairs // num_terms]
+    pair_terms = pairs % num_terms
+    _, section_df = np.unique(
+        pair_sections * num_terms + pair_terms, return_counts=True)
+    course_keys, course_df = np.unique(
+        courses[pair_sections] * num_terms + pair_terms, return_counts=True)
+    course_ratings = np.bincount(courses[row_sections])
+
+    # Score each (section, term) against its course
+    sections = keys // num_terms
+    section_terms = keys % num_terms
+    section_course = courses[sections]
+    df = course_df[np.searchsorted(
+        course_keys, section_course * num_terms + section_terms)]
+    idf = np.log((1 + course_ratings[section_course]) / (1 + df))
+    scores = counts / lengths[sections] * idf
+
+    # Keep the top terms per section (ties broken by term order)
+    keep = np.flatnonzero((section_df >= min_ratings) & (idf > 0))
+    order = keep[np.lexsort((-scores[keep], sections[keep]))]
+    ordered = sections[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ranks = np.arange(len(order)) - np.repeat(starts, np.diff(
+        np.r_[starts, len(order)]))
+    order = order[ranks < top]
+
+    term_names = list(term_ids)
+    course_names = list(course_ids)
+    section_keys = list(section_ids)
+    res: dict[str, dict[str, list[str]]] = {}
+    for section, term in zip(
+        sections[order].tolist(),
+        section_terms[order].tolist(),
+    ):
+        course, prof = section_keys[section]
+        res.setdefault(course, {}).setdefault(prof, []).append(
+            term_names[term])
+
+    # Every course gets an entry, even if no section has keywords
+    for course in course_names:
+        res.setdefault(course, {})
+
+    return res
@@ -0,0 +1,253 @@
+import re
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.search.courses import _pack, _unpack
+
+__all__ = [
+    'NameIndex',
+    'NameMatch',
+    'build_name_index',
+    'names_key',
+    'trigrams',
+]
+
+
+# Weight of a query trigram found in a professor's department rather
+# than their name
+_DEPT_WEIGHT = 0.5
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def names_key() -> str:
+    """
+    Gets the store document key for the professor name index.
+    """
+
+    return 'names'
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Gets the trigrams of each word of some text (lowercased, padded so
+    word starts and ends count), e.g. 'Ann' -> {'  a', ' an', 'ann', 'nn '}.
+    """
+
+    return {
+        padded[i:i + 3]
+        for word in _WORD.findall(text.lower())
+        for padded in ('  %s ' % word,)
+        for i in range(len(padded) - 2)
+    }
+
+
+class NameMatch:
+    """
+    A professor whose name (or department) matches a search, with its
+    similarity score.
+    """
+
+    def __init__(
+        self,
+        *,
+        professor_id: str,
+        name: str,
+        dept: str,
+        score: float,
+    ):
+        self.professor_id = professor_id
+        self.name = name
+        self.dept = dept
+        self.score = score
+
+
+class _Postings:
+    """
+    Trigram postings (CSR by trigram) over a list of texts.
+    """
+
+    def __init__(
+        self,
+        *,
+        grams: list[str],  # sorted trigrams
+        offsets: np.ndarray,  # postings offsets per trigram
+        postings: np.ndarray,  # text indices, by trigram
+        sizes: np.ndarray,  # number of trigrams per text
+    ):
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+        self.sizes = sizes
+
+        self._gram_index = {gram: i for i, gram in enumerate(grams)}
+
+    @classmethod
+    def build(cls, texts: Iterable[str]) -> '_Postings':
+        by_gram: dict[str, array] = {}
+        sizes = array('i')
+        for i, text in enumerate(texts):
+            grams = trigrams(text)
+            sizes.append(len(grams))
+            for gram in grams:
+                by_gram.setdefault(gram, array('i')).append(i)
+
+        grams = sorted(by_gram)
+        lengths = np.array([len(by_gram[gram]) for gram in grams], np.int64)
+        postings = array('i')
+        for gram in grams:
+            postings.extend(by_gram[gram])
+        return cls(
+            grams=grams,
+            offsets=np.concatenate(([0], np.cumsum(lengths))),
+            postings=np.frombuffer(postings, dtype=np.int32).copy(),
+            sizes=np.frombuffer(sizes, dtype=np.int32).copy(),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'grams': self.grams,
+            'offsets': _pack(self.offsets.astype(np.int64)),
+            'postings': _pack(self.postings),
+            'sizes': _pack(self.sizes),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> '_Postings':
+        return cls(
+            grams=data['grams'],
+            offsets=_unpack(data['offsets'], np.int64),
+            postings=_unpack(data['postings'], np.int32),
+            sizes=_unpack(data['sizes'], np.int32),
+        )
+
+    def hits(self, grams: set[str]) -> np.ndarray:
+        """
+        Counts each text's trigrams among some trigrams.
+        """
+
+        found = [self._gram_index[g] for g in grams if g in self._gram_index]
+        if not found:
+            return np.zeros(len(self.sizes), dtype=np.int64)
+        return np.bincount(
+            np.concatenate([
+                self.postings[self.offsets[g]:self.offsets[g + 1]]
+                for g in found
+            ]),
+            minlength=len(self.sizes),
+        )
+
+
+class NameIndex:
+    """
+    Trigram index over professors' names and departments, for looking
+    professors up by (possibly misspelled) name.
+
+    Matches are scored by the trigram similarity of the query and name
+    (shared over combined trigrams), plus a smaller share for query
+    trigrams found in the department, e.g. 'smith physics'.
+    """
+
+    def __init__(
+        self,
+        *,
+        professor_ids: list[str],
+        names: list[str],
+        depts: list[str],  # distinct departments
+        professor_depts: np.ndarray,  # index into depts per professor
+        name_postings: _Postings,
+        dept_postings: _Postings,
+    ):
+        self.professor_ids = professor_ids
+        self.names = names
+        self.depts = depts
+        self.professor_depts = professor_depts
+        self.name_postings = name_postings
+        self.dept_postings = dept_postings
+
+    def to_dict(self) -> dict:
+        """
+        Converts data to a dictionary for serialization.
+        """
+
+        return {
+            'professor_ids': self.professor_ids,
+            'names': self.names,
+            'depts': self.depts,
+            'professor_depts': _pack(self.professor_depts),
+            'name_postings': self.name_postings.to_dict(),
+            'dept_postings': self.dept_postings.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'NameIndex':
+        """
+        Creates an instance from a dictionary.
+        """
+
+        return cls(
+            professor_ids=data['professor_ids'],
+            names=data['names'],
+            depts=data['depts'],
+            professor_depts=_unpack(data['professor_depts'], np.int32),
+            name_postings=_Postings.from_dict(data['name_postings']),
+            dept_postings=_Postings.from_dict(data['dept_postings']),
+        )
+
+    def search(self, query: str, *, limit: int = 10) -> list[NameMatch]:
+        """
+        Ranks professors by how well their name (and department) match
+        a query. Returns the best matches first.
+        """
+
+        grams = trigrams(query)
+        if not grams or not self.professor_ids or limit <= 0:
+            return []
+
+        shared = self.name_postings.hits(grams)
+        dept_shared = self.dept_postings.hits(grams)[self.professor_depts]
+        scores = (shared + _DEPT_WEIGHT * dept_shared) \
+            / (len(grams) + self.name_postings.sizes - shared)
+
+        # Top matches, without sorting every professor
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(
+                -scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [
+            NameMatch(
+                professor_id=self.professor_ids[p],
+                name=self.names[p],
+                dept=self.depts[self.professor_depts[p]],
+                score=float(scores[p]),
+            )
+            for p in candidates.tolist()
+        ]
+
+
+def build_name_index(professors: Iterable[Professor]) -> NameIndex:
+    """
+    Builds the name index over every professor.
+    """
+
+    professors = list(professors)
+    dept_index: dict[str, int] = {}
+    professor_depts = np.array(
+        [dept_index.setdefault(prof.dept, len(dept_index))
+         for prof in professors],
+        dtype=np.int32,
+    )
+
+    return NameIndex(
+        professor_ids=[prof.id for prof in professors],
+        names=[prof.name for prof in professors],
+        depts=list(dept_index),
+        professor_depts=professor_depts,
+        name_postings=_Postings.build(prof.name for prof in professors),
+        dept_postings=_Postings.build(dept_index),
+    )
@@ -0,0 +1,34 @@
+import argparse
+import logging
+
+from understudy.api.snapshot.snapshot import write_snapshot
+from understudy.api.store.client import db
+
+__all__ = ['export']
+
+_log = logging.getLogger(__name__)
+
+
+def export(path: str):
+    """
+    Writes a snapshot of the configured store's contents.
+    """
+
+    professors = list(db.all_professors())
+    _log.info("Exporting %d professors...", len(professors))
+    write_snapshot(path, professors, db.all_ratings(), db.all_documents())
+    _log.info("Wrote snapshot to %s", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exports the store to a columnar snapshot.",
+    )
+    parser.add_argument('path', nargs='?', default='snapshot')
+    args = parser.parse_args()
+    export(args.path)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,593 @@
+import functools
+import json
+import os
+import re
+import shutil
+import time
+from typing import Iterable
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from understudy.api.rmp.course import CourseMeta
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.search.courses import is_index_key
+from understudy.api.search.index import (
+    CommentIndex,
+    CommentMatch,
+    IndexBuilder,
+)
+from understudy.api.search.names import (
+    NameIndex,
+    build_name_index,
+    names_key,
+)
+
+__all__ = ['Snapshot', 'remove_snapshot', 'write_snapshot']
+
+
+# Bumped whenever the on-disk layout changes
+_FORMAT_VERSION = 5
+
+# Encoding for optional booleans in int8 columns
+_UNKNOWN = -1
+
+
+def _encode_bool(value: bool | None) -> int:
+    return _UNKNOWN if value is None else int(value)
+
+
+def _decode_bool(value: int) -> bool | None:
+    return None if value == _UNKNOWN else bool(value)
+
+
+def _load_column(path: str) -> np.ndarray:
+    """
+    Memory-maps a column (empty columns can't be mapped, so are read).
+    """
+
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        return np.load(path)
+
+
+def _document_file(key: str) -> str:
+    """
+    Gets the file name a document is stored under (its key, escaped).
+    """
+
+    return '%s.json' % quote(key, safe='')
+
+
+def _versions(path: str) -> list[str]:
+    """
+    Gets the paths of a snapshot's version directories, oldest first.
+    """
+
+    parent, name = os.path.split(path)
+    version = re.compile(r'^%s\.v\d+$' % re.escape(name))
+    return [
+        os.path.join(parent, entry)
+        for entry in sorted(os.listdir(parent or '.'))
+        if version.match(entry)
+    ]
+
+
+def remove_snapshot(path: str):
+    """
+    Removes a snapshot and all of its versions.
+    """
+
+    path = os.path.abspath(path)
+    if os.path.islink(path):
+        os.remove(path)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+    for version in _versions(path):
+        shutil.rmtree(version, ignore_errors=True)
+
+
+def _pack_strings(strings: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Packs strings into a UTF-8 blob and an offsets array.
+    """
+
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def write_snapshot(
+    path: str,
+    professors: Iterable[Professor],
+    ratings: Iterable[tuple[str, str, Rating]],
+    documents: Iterable[tuple[str, dict]] = (),
+):
+    """
+    Writes a read-only columnar snapshot of professors, their
+    (professor_id, course, Rating) ratings and any (key, document)
+    documents to a directory of .npy (and JSON) files, with a JSON file
+    per document.
+
+    Courses, professors, tags and grades are dictionary-encoded, and
+    ratings are sorted by course then professor so a section is a
+    contiguous slice. Comments get an inverted index over rating rows
+    for search.
+
+    Each write goes to a new version directory (e.g. 'snapshot.v<n>'),
+    and the path is a symlink atomically switched to the latest one.
+    """
+
+    professors = sorted(professors, key=lambda p: p.id)
+    prof_index = {p.id: i for i, p in enumerate(professors)}
+
+    # Group ratings by (course, professor), keeping their order
+    sections: dict[tuple[str, int], list[Rating]] = {}
+    for prof_id, course, rating in ratings:
+        if prof_id not in prof_index:
+            continue
+        sections.setdefault((course, prof_index[prof_id]), []).append(rating)
+
+    # Dictionaries for string values
+    courses = sorted(
+        {c for c, _ in sections}
+        | {c for p in professors for c in p.courses}
+    )
+    course_index = {c: i for i, c in enumerate(courses)}
+    tags = sorted({
+        tag
+        for section in sections.values()
+        for rating in section
+        for tag in rating.meta.tags
+    })
+    tag_index = {t: i for i, t in enumerate(tags)}
+    grades = sorted({
+        rating.grade
+        for section in sections.values()
+        for rating in section
+        if rating.grade is not None
+    })
+    grade_index = {g: i for i, g in enumerate(grades)}
+
+    # Flatten ratings in (course, professor) order
+    flat: list[tuple[int, int, Rating]] = [
+        (course_index[course], prof, rating)
+        for (course, prof) in sorted(
+            sections, key=lambda k: (course_index[k[0]], k[1]))
+        for rating in sections[(course, prof)]
+    ]
+    rating_courses = np.array([c for c, _, _ in flat], dtype=np.int32)
+    course_offsets = np.searchsorted(
+        rating_courses, np.arange(len(courses) + 1)).astype(np.int64)
+    rating_tags = [
+        sorted(tag_index[t] for t in r.meta.tags) for _, _, r in flat
+    ]
+    tag_offsets = np.zeros(len(flat) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in rating_tags], out=tag_offsets[1:])
+    id_blob, id_offsets = _pack_strings([r.id for _, _, r in flat])
+    comment_blob, comment_offsets = _pack_strings(
+        [r.comment or '' for _, _, r in flat])
+
+    # Index comments by rating row
+    builder = IndexBuilder()
+    for _, _, r in flat:
+        builder.add(r.comment)
+    index = builder.build()
+
+    # Professor courses (CSR, professor-major)
+    prof_courses = [
+        sorted(course_index[c] for c in p.courses) for p in professors
+    ]
+    prof_course_offsets = np.zeros(len(professors) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in prof_courses], out=prof_course_offsets[1:])
+
+    columns: dict[str, np.ndarray] = {
+        'course_offsets': course_offsets,
+        'prof_quality': np.array(
+            [p.quality for p in professors], dtype=np.float32),
+        'prof_difficulty': np.array(
+            [p.difficulty for p in professors], dtype=np.float32),
+        'prof_take_again': np.array(
+            [p.take_again for p in professors], dtype=np.float32),
+        'prof_course_offsets': prof_course_offsets,
+        'prof_course_ids': np.array(
+            [c for cs in prof_courses for c in cs], dtype=np.int32),
+        'rating_prof': np.array([p for _, p, _ in flat], dtype=np.int32),
+        'rating_quality': np.array(
+            [r.quality for _, _, r in flat], dtype=np.float32),
+        'rating_difficulty': np.array(
+            [r.difficulty for _, _, r in flat], dtype=np.float32),
+        'rating_grade': np.array(
+            [_UNKNOWN if r.grade is None else grade_index[r.grade]
+             for _, _, r in flat],
+            dtype=np.int16,
+        ),
+        'rating_for_credit': np.array(
+            [_encode_bool(r.for_credit) for _, _, r in flat], dtype=np.int8),
+        'rating_online': np.array(
+            [_encode_bool(r.meta.online) for _, _, r in flat], dtype=np.int8),
+        'rating_attendance': np.array(
+            [_encode_bool(r.meta.attendance_required) for _, _, r in flat],
+            dtype=np.int8,
+        ),
+        'rating_textbook': np.array(
+            [_encode_bool(r.meta.textbook_required) for _, _, r in flat],
+            dtype=np.int8,
+        ),
+        'rating_votes': np.array(
+            [r.votes for _, _, r in flat], dtype=np.int32).reshape(-1, 2),
+        'rating_date': np.array(
+            [r.date or 'NaT' for _, _, r in flat], dtype='datetime64[D]'),
+        'tag_offsets': tag_offsets,
+        'tag_ids': np.array(
+            [t for ts in rating_tags for t in ts], dtype=np.int16),
+        'id_blob': id_blob,
+        'id_offsets': id_offsets,
+        'comment_blob': comment_blob,
+        'comment_offsets': comment_offsets,
+        **{
+            'search_%s' % name: column
+            for name, column in index.columns().items()
+        },
+    }
+    meta = {
+        'version': _FORMAT_VERSION,
+        'created': time.time(),
+        'courses': courses,
+        'tags': tags,
+        'grades': grades,
+        'terms': index.terms,
+        'professors': {
+            'id': [p.id for p in professors],
+            'name': [p.name for p in professors],
+            'dept': [p.dept for p in professors],
+        },
+    }
+
+    # Write a new version directory
+    path = os.path.abspath(path)
+    version = '%s.v%d' % (path, time.time_ns())
+    tmp = '%s.tmp-%d' % (version, os.getpid())
+    os.makedirs(tmp)
+    for name, column in columns.items():
+        np.save(os.path.join(tmp, '%s.npy' % name), column)
+    # Course comment indexes are superseded by the snapshot's own
+    os.makedirs(os.path.join(tmp, 'documents'))
+    for key, doc in documents:
+        if is_index_key(key):
+            continue
+        with open(os.path.join(tmp, 'documents', _document_file(key)),
+                  'w') as f:
+            json.dump(doc, f, separators=(',', ':'))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, separators=(',', ':'))
+    os.rename(tmp, version)
+
+    # Snapshots from before versioning are plain directories, which
+    # can't be replaced atomically; move one aside (this once)
+    if os.path.isdir(path) and not os.path.islink(path):
+        legacy = '%s.old-%d' % (path, os.getpid())
+        os.rename(path, legacy)
+        shutil.rmtree(legacy, ignore_errors=True)
+    previous = os.path.realpath(path) if os.path.islink(path) else None
+
+    # Switch the path over, so readers always find a complete snapshot
+    link = '%s.link-%d' % (path, os.getpid())
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, path)
+
+    # Keep the previous version for readers still loading it
+    for old in _versions(path):
+        if old not in (version, previous):
+            shutil.rmtree(old, ignore_errors=True)
+
+
+class Snapshot:
+    """
+    A read-only, memory-mapped columnar snapshot of professors and
+    ratings. Pages are shared between processes mapping the same files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta['version'] != _FORMAT_VERSION:
+            raise ValueError(
+                "Unsupported snapshot version %s" % meta['version'])
+
+        self.created: float = meta['created']
+        self.course_names: list[str] = meta['courses']
+        self.tag_names: list[str] = meta['tags']
+        self.grade_names: list[str] = meta['grades']
+        self.terms: list[str] = meta['terms']
+        self.prof_ids: list[str] = meta['professors']['id']
+        self.prof_names: list[str] = meta['professors']['name']
+        self.prof_depts: list[str] = meta['professors']['dept']
+
+        self._course_index = {c: i for i, c in enumerate(self.course_names)}
+        self._prof_index = {p: i for i, p in enumerate(self.prof_ids)}
+
+        # Memory-map every column
+        self._cols: dict[str, np.ndarray] = {
+            name[:-len('.npy')]: _load_column(os.path.join(path, name))
+            for name in os.listdir(path)
+            if name.endswith('.npy')
+        }
+
+        # Comment search index over rating rows
+        self.index = CommentIndex(
+            terms=self.terms,
+            offsets=self._cols['search_offsets'],
+            docs=self._cols['search_docs'],
+            freqs=self._cols['search_freqs'],
+            lengths=self._cols['search_lengths'],
+        )
+
+        # Professors teaching each course (small; built in memory)
+        offsets = self._cols['prof_course_offsets']
+        self._course_profs: dict[int, list[int]] = {}
+        for prof in range(len(self.prof_ids)):
+            for course in self._cols['prof_course_ids'][
+                    offsets[prof]:offsets[prof + 1]]:
+                self._course_profs.setdefault(int(course), []).append(prof)
+
+    @functools.cached_property
+    def name_index(self) -> NameIndex:
+        """
+        Professor name index: the stored one, or one built from the
+        snapshot's professors. Loaded on first use.
+        """
+
+        doc = self.document(names_key())
+        if doc is not None:
+            return NameIndex.from_dict(doc)
+        return build_name_index(
+            self.professor(p) for p in range(len(self.prof_ids)))
+
+    def document(self, key: str) -> dict | None:
+        """
+        Gets a stored document (None if there isn't one), read from its
+        file when asked for.
+        """
+
+        try:
+            with open(os.path.join(
+                    self.path, 'documents', _document_file(key)), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def document_keys(self) -> list[str]:
+        """
+        Gets the keys of every stored document.
+        """
+
+        return sorted(
+            unquote(name[:-len('.json')])
+            for name in os.listdir(os.path.join(self.path, 'documents'))
+        )
+
+    def courses(self, min_ratings: int = 0) -> list[str]:
+        """
+        Gets sorted course codes with at least the given number of ratings.
+        """
+
+        counts = np.diff(self._cols['course_offsets'])
+        return [
+            self.course_names[i]
+            for i in np.flatnonzero(counts >= min_ratings)
+        ]
+
+    def professor(self, index: int) -> Professor:
+        """
+        Gets a professor by their index in the snapshot.
+        """
+
+        offsets = self._cols['prof_course_offsets']
+        return Professor(
+            id=self.prof_ids[index],
+            name=self.prof_names[index],
+            dept=self.prof_depts[index],
+            quality=float(self._cols['prof_quality'][index]),
+            difficulty=float(self._cols['prof_difficulty'][index]),
+            take_again=float(self._cols['prof_take_again'][index]),
+            courses={
+                self.course_names[c]
+                for c in self._cols['prof_course_ids'][
+                    offsets[index]:offsets[index + 1]]
+            },
+        )
+
+    def find_professor(self, professor_id: str) -> Professor | None:
+        """
+        Gets a professor by ID, if in the snapshot.
+        """
+
+        if professor_id not in self._prof_index:
+            return None
+        return self.professor(self._prof_index[professor_id])
+
+    def professors(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[Professor]:
+        """
+        Gets professors known to teach a course.
+        """
+
+        if course not in self._course_index:
+            return []
+
+        take_again = self._cols['prof_take_again']
+        return [
+            self.professor(p)
+            for p in self._course_profs.get(self._course_index[course], [])
+            if take_again[p] >= min_take_again
+        ]
+
+    def _section_slice(self, professor_id: str, course: str) -> slice:
+        """
+        Gets the slice of rating rows for a professor's course section.
+        """
+
+        if professor_id not in self._prof_index \
+                or course not in self._course_index:
+            return slice(0, 0)
+
+        c = self._course_index[course]
+        start, end = self._cols['course_offsets'][c:c + 2]
+        profs = self._cols['rating_prof'][start:end]
+        prof = self._prof_index[professor_id]
+        return slice(
+            int(start + np.searchsorted(profs, prof, side='left')),
+            int(start + np.searchsorted(profs, prof, side='right')),
+        )
+
+    def ratings(self, professor_id: str, course: str) -> list[Rating]:
+        """
+        Gets a professor's ratings for a course.
+        """
+
+        return self._rating_rows(self._section_slice(professor_id, course))
+
+    def search(
+        self,
+        query: str,
+        *,
+        course: str | None = None,
+        professor_id: str | None = None,
+        limit: int = 20,
+    ) -> list[CommentMatch]:
+        """
+        Searches rating comments, optionally within a course and/or a
+        professor's ratings. Returns the best matches first.
+        """
+
+        if (course is not None and course not in self._course_index) or (
+                professor_id is not None
+                and professor_id not in self._prof_index):
+            return []
+
+        # Restrict the search to the scope's rating rows
+        rows = slice(0, len(self._cols['rating_prof']))
+        mask: np.ndarray | None = None
+        if course is not None and professor_id is not None:
+            rows = self._section_slice(professor_id, course)
+        elif course is not None:
+            c = self._course_index[course]
+            start, end = self._cols['course_offsets'][c:c + 2].tolist()
+            rows = slice(start, end)
+        elif professor_id is not None:
+            mask = np.asarray(self._cols['rating_prof']) \
+                == self._prof_index[professor_id]
+
+        course_offsets = self._cols['course_offsets']
+        rating_prof = self._cols['rating_prof']
+        return [
+            CommentMatch(
+                professor_id=self.prof_ids[int(rating_prof[row])],
+                course=self.course_names[int(np.searchsorted(
+                    course_offsets, row, side='right')) - 1],
+                rating=self._rating_rows(slice(row, row + 1))[0],
+                score=score,
+            )
+            for row, score in self.index.search(
+                query,
+                start=rows.start,
+                stop=rows.stop,
+                mask=mask,
+                limit=limit,
+            )
+        ]
+
+    def comment_hits(self, query: str, *, course: str) -> dict[str, int]:
+        """
+        Counts each professor's ratings for a course whose comments
+        match a search. Returns { professor_id: count }
+        """
+
+        if course not in self._course_index:
+            return {}
+
+        c = self._course_index[course]
+        start, end = self._cols['course_offsets'][c:c + 2].tolist()
+        rows = self.index.matching(query, start=start, stop=end)
+        counts = np.bincount(
+            np.asarray(self._cols['rating_prof'])[rows],
+            minlength=len(self.prof_ids),
+        )
+        return {
+            self.prof_ids[p]: int(counts[p])
+            for p in np.flatnonzero(counts)
+        }
+
+    def _rating_rows(self, rows: slice) -> list[Rating]:
+        """
+        Builds Rating objects for a slice of rating rows.
+        """
+
+        if rows.start == rows.stop:
+            return []
+
+        # Read each column's slice in bulk, then build Rating objects
+        cols = self._cols
+        edges = slice(rows.start, rows.stop + 1)
+        id_offsets = cols['id_offsets'][edges].tolist()
+        text_offsets = cols['comment_offsets'][edges].tolist()
+        tag_offsets = cols['tag_offsets'][edges].tolist()
+        id_blob = bytes(cols['id_blob'][id_offsets[0]:id_offsets[-1]])
+        text_blob = bytes(
+            cols['comment_blob'][text_offsets[0]:text_offsets[-1]])
+        tag_ids = cols['tag_ids'][tag_offsets[0]:tag_offsets[-1]].tolist()
+        quality = cols['rating_quality'][rows].tolist()
+        difficulty = cols['rating_difficulty'][rows].tolist()
+        grades = cols['rating_grade'][rows].tolist()
+        for_credit = cols['rating_for_credit'][rows].tolist()
+        online = cols['rating_online'][rows].tolist()
+        attendance = cols['rating_attendance'][rows].tolist()
+        textbook = cols['rating_textbook'][rows].tolist()
+        votes = cols['rating_votes'][rows].tolist()
+        dates = cols['rating_date'][rows].astype(str).tolist()
+
+        ratings: list[Rating] = []
+        for i in range(rows.stop - rows.start):
+            ratings.append(Rating(
+                id=id_blob[
+                    id_offsets[i] - id_offsets[0]:
+                    id_offsets[i + 1] - id_offsets[0]
+                ].decode(),
+                quality=quality[i],
+                difficulty=difficulty[i],
+                comment=text_blob[
+                    text_offsets[i] - text_offsets[0]:
+                    text_offsets[i + 1] - text_offsets[0]
+                ].decode(),
+                grade=(
+                    None if grades[i] == _UNKNOWN
+                    else self.grade_names[grades[i]]
+                ),
+                for_credit=_decode_bool(for_credit[i]),
+                meta=CourseMeta(
+                    online=_decode_bool(online[i]),
+                    attendance_required=_decode_bool(attendance[i]),
+                    textbook_required=_decode_bool(textbook[i]),
+                    tags={
+                        self.tag_names[t]
+                        for t in tag_ids[
+                            tag_offsets[i] - tag_offsets[0]:
+                            tag_offsets[i + 1] - tag_offsets[0]
+                        ]
+                    },
+                ),
+                votes=tuple(votes[i]),
+                date=None if dates[i] == 'NaT' else dates[i],
+            ))
+
+        return ratings
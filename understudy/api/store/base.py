@@ -0,0 +1,322 @@
+import os
+from typing import Callable, Hashable, Iterable, TypeVar
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.search.courses import (
+    CourseIndex,
+    CourseIndexBuilder,
+    index_key,
+)
+from understudy.api.search.index import CommentMatch, IndexBuilder
+from understudy.api.search.names import (
+    NameIndex,
+    NameMatch,
+    build_name_index,
+    names_key,
+)
+
+__all__ = ['Store', 'scoped_path']
+
+T = TypeVar('T')
+
+# Search indexes kept per store
+_INDEX_CACHE_SIZE = 16
+
+
+class Store:
+    """
+    Repository interface over persisted professors, ratings, sections
+    (a professor's ratings for a course) and courses.
+
+    Implementations back this with Mongo, SQLite, memory, etc.
+    """
+
+    # Identifies an unchanging version of the store's contents (e.g. the
+    # published generation it reads), which its caches are keyed on;
+    # None if the contents can change in place, so nothing is cached
+    version: Hashable | None = None
+
+    # Whether writes persist where other processes (e.g. prefetch
+    # workers) see them
+    shared = True
+
+    def scoped(self, namespace: str) -> 'Store':
+        """
+        Gets the store for a namespace (e.g. a school's data) alongside
+        this one. The root namespace ('') is the unscoped store.
+        """
+
+        raise NotImplementedError
+
+    def drop(self):
+        """
+        Deletes everything in this store (e.g. an old generation).
+        """
+
+        raise NotImplementedError
+
+    def prepare(self):
+        """
+        Sets up a new store (e.g. a generation) before it's written, such
+        as the indexes its lookups need. Nothing by default.
+        """
+
+    # Professors
+
+    def professors(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[Professor]:
+        """
+        Gets professors known to teach a course.
+        """
+
+        raise NotImplementedError
+
+    def professor(self, professor_id: str) -> Professor | None:
+        """
+        Gets a professor by ID, if stored.
+        """
+
+        for prof in self.all_professors():
+            if prof.id == professor_id:
+                return prof
+        return None
+
+    def all_professors(self) -> Iterable[Professor]:
+        """
+        Gets every stored professor.
+        """
+
+        raise NotImplementedError
+
+    def replace_professors(self, professors: Iterable[Professor]):
+        """
+        Replaces all stored professors.
+        """
+
+        raise NotImplementedError
+
+    # Ratings
+
+    def ratings(self, professor_id: str, course: str) -> list[Rating]:
+        """
+        Gets a professor's ratings for a course.
+        """
+
+        raise NotImplementedError
+
+    def all_ratings(self) -> Iterable[tuple[str, str, Rating]]:
+        """
+        Gets every stored rating as (professor_id, course, Rating).
+        """
+
+        raise NotImplementedError
+
+    def write_ratings(
+        self,
+        professor_id: str,
+        course: str,
+        ratings: list[Rating],
+    ):
+        """
+        Adds a professor's ratings for a course.
+        """
+
+        raise NotImplementedError
+
+    def clear_ratings(self):
+        """
+        Deletes all stored ratings.
+        """
+
+        raise NotImplementedError
+
+    # Sections
+
+    def sections(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[tuple[Professor, list[Rating]]]:
+        """
+        Gets each professor teaching a course with their ratings for it.
+        """
+
+        return [
+            (prof, self.ratings(prof.id, course))
+            for prof in self.professors(course, min_take_again=min_take_again)
+        ]
+
+    # Documents
+
+    def get_document(self, key: str) -> dict | None:
+        """
+        Gets a stored document (e.g. precomputed aggregates) by key.
+        """
+
+        raise NotImplementedError
+
+    def all_documents(self) -> Iterable[tuple[str, dict]]:
+        """
+        Gets every stored document as (key, document).
+        """
+
+        raise NotImplementedError
+
+    def put_document(self, key: str, doc: dict):
+        """
+        Stores a document under a key, replacing any existing one.
+        """
+
+        raise NotImplementedError
+
+    # Search
+
+    def _cached(self, key: Hashable, load: Callable[[], T]) -> T:
+        """
+        Gets a search index (or similar) loaded for this version of the
+        store's contents, keeping the most recently loaded few. Stores
+        whose contents can change in place load it every time.
+        """
+
+        version = self.version
+        if version is None:
+            return load()
+
+        cache = self.__dict__.get('_index_cache')
+        if cache is None or cache[0] != version:
+            cache = self._index_cache = (version, {})
+        indexes = cache[1]
+        if key not in indexes:
+            indexes[key] = load()
+            while len(indexes) > _INDEX_CACHE_SIZE:
+                del indexes[next(iter(indexes))]
+        return indexes[key]
+
+    def _course_index(self, course: str) -> CourseIndex:
+        # The prefetched index, or one built from the course's ratings
+        def load() -> CourseIndex:
+            doc = self.get_document(index_key(course))
+            if doc is not None:
+                return CourseIndex.from_dict(doc)
+
+            builder = CourseIndexBuilder()
+            for prof, ratings in self.sections(course, min_take_again=-1):
+                for rating in ratings:
+                    builder.add(prof.id, rating)
+            return builder.build()
+
+        return self._cached(('search', course), load)
+
+    def search_comments(
+        self,
+        query: str,
+        *,
+        course: str | None = None,
+        professor_id: str | None = None,
+        limit: int = 20,
+    ) -> list[CommentMatch]:
+        """
+        Searches rating comments, optionally within a course and/or a
+        professor's ratings. Returns the best matches first.
+
+        Course searches use the course's prefetched comment index (or
+        build and keep one); others index the scope's ratings on the fly.
+        Stores with a prebuilt index of their own override this.
+        """
+
+        if course is not None:
+            found = self._course_index(course).search(
+                query, professor_id=professor_id, limit=limit)
+
+            # Look up the matched ratings, a section at a time
+            ratings: dict[tuple[str, str], Rating] = {}
+            for prof in {prof for prof, _, _ in found}:
+                for rating in self.ratings(prof, course):
+                    ratings[prof, rating.id] = rating
+
+            return [
+                CommentMatch(
+                    professor_id=prof,
+                    course=course,
+                    rating=ratings[prof, rating_id],
+                    score=score,
+                )
+                for prof, rating_id, score in found
+                if (prof, rating_id) in ratings
+            ]
+
+        builder = IndexBuilder()
+        docs: list[tuple[str, str, Rating]] = []
+        for doc in self.all_ratings():
+            if professor_id in (None, doc[0]):
+                builder.add(doc[2].comment)
+                docs.append(doc)
+
+        return [
+            CommentMatch(
+                professor_id=docs[i][0],
+                course=docs[i][1],
+                rating=docs[i][2],
+                score=score,
+            )
+            for i, score in builder.build().search(query, limit=limit)
+        ]
+
+    def comment_hits(self, query: str, *, course: str) -> dict[str, int]:
+        """
+        Counts each professor's ratings for a course whose comments
+        match a search. Returns { professor_id: count }
+        """
+
+        return self._course_index(course).hits(query)
+
+    def _name_index(self) -> NameIndex:
+        # The prefetched index, or one built from the professors
+        def load() -> NameIndex:
+            doc = self.get_document(names_key())
+            if doc is not None:
+                return NameIndex.from_dict(doc)
+            return build_name_index(self.all_professors())
+
+        return self._cached(('names',), load)
+
+    def search_professors(
+        self,
+        query: str,
+        *,
+        limit: int = 10,
+    ) -> list[NameMatch]:
+        """
+        Searches professors by (possibly misspelled) name, optionally
+        with their department. Returns the best matches first.
+        """
+
+        return self._name_index().search(query, limit=limit)
+
+    # Courses
+
+    def courses(self, min_ratings: int = 0) -> list[str]:
+        """
+        Gets sorted course codes with at least the given number of ratings.
+        """
+
+        raise NotImplementedError
+
+
+def scoped_path(path: str, namespace: str) -> str:
+    """
+    Gets the path for a namespaced sibling of a file or directory,
+    e.g. ('understudy.db', 'school_1') -> 'understudy.school_1.db'.
+    """
+
+    if not namespace:
+        return path
+
+    root, ext = os.path.splitext(path.rstrip(os.sep))
+    return '%s.%s%s' % (root, namespace, ext)
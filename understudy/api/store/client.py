@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from typing import Any
+
+from understudy.api.rmp.school import (
+    DEFAULT_SCHOOL_ID,
+    parse_school_id,
+    school_namespace,
+)
+from understudy.api.store.base import Store
+from understudy.api.store.generations import (
+    current_generation,
+    generation_namespace,
+)
+from understudy.api.store.memory import MemoryStore
+from understudy.api.store.mongo import MongoStore
+from understudy.api.store.snapshot import SnapshotStore
+from understudy.api.store.sqlite import SqliteStore
+
+__all__ = ['db', 'open_store']
+
+# How often to check for a newly published generation, in seconds
+_GENERATION_TTL = 30
+
+
+def open_store(spec: str) -> Store:
+    """
+    Opens a store from a spec: 'mongo', 'memory', 'sqlite:<path>'
+    or 'snapshot:<path>' (read-only).
+    """
+
+    kind, _, path = spec.partition(':')
+    if kind == 'mongo':
+        return MongoStore()
+    if kind == 'memory':
+        return MemoryStore()
+    if kind == 'sqlite':
+        return SqliteStore(path or 'understudy.db')
+    if kind == 'snapshot':
+        return SnapshotStore(path or 'snapshot')
+
+    raise ValueError("Unknown store %r" % spec)
+
+
+class _Db:
+    """
+    The configured store (UNDERSTUDY_STORE, Mongo by default), opened
+    on first use and scoped to the configured school (UNDERSTUDY_SCHOOL,
+    UCF by default). Swap in another backend with db.use(store).
+
+    Reads go to the school's published generation, re-checked every
+    few seconds, so a prefetch's switchover is picked up without a
+    restart and readers never see a half-written generation. A thread
+    can pin its reads to one generation (e.g. for a page render) so
+    they don't straddle a switchover.
+    """
+
+    def __init__(self):
+        self._root: Store | None = None
+
+        # The school's base store and namespace
+        self._base: Store | None = None
+        self._namespace = ''
+
+        # Store for the current generation, and when it was checked
+        self._store: Store | None = None
+        self._generation: str | None = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+        # Per-thread pinned (store, generation), if any
+        self._local = threading.local()
+
+    def use(self, store: Store):
+        self._root = self._base = store
+        self._namespace = ''
+        self._store = None
+        self._local = threading.local()
+
+    def scoped(self, namespace: str) -> Store:
+        """
+        Gets the configured store for a namespace (e.g. another school).
+        """
+
+        if self._root is None:
+            self._root = open_store(
+                os.environ.get('UNDERSTUDY_STORE', 'mongo'))
+        return self._root if not namespace else self._root.scoped(namespace)
+
+    @property
+    def generation(self) -> str | None:
+        """
+        The generation being read (None for unversioned data), e.g. for
+        keying caches.
+        """
+
+        return self._current()[1]
+
+    def pin(self) -> str | None:
+        """
+        Pins the calling thread's reads to the current generation until
+        it pins again, so e.g. a page render reads one consistent
+        generation. Returns the generation.
+        """
+
+        self._local.pinned = None
+        self._local.pinned = self._current()
+        return self._local.pinned[1]
+
+    def _current(self) -> tuple[Store, str | None]:
+        pinned = getattr(self._local, 'pinned', None)
+        if pinned is not None:
+            return pinned
+
+        with self._lock:
+            if self._base is None:
+                school_id = parse_school_id(
+                    os.environ.get('UNDERSTUDY_SCHOOL', DEFAULT_SCHOOL_ID))
+                self._namespace = school_namespace(school_id)
+                self._base = self.scoped(self._namespace)
+
+            # Follow the generation pointer, switching stores if it moved
+            now = time.monotonic()
+            if self._store is None or now - self._checked > _GENERATION_TTL:
+                generation = current_generation(self._base)
+                if self._store is None or generation != self._generation:
+                    self._store = self._base if generation is None \
+                        else self._base.scoped(
+                            generation_namespace(self._namespace, generation))
+
+                    # Published generations don't change
+                    if generation is not None:
+                        self._store.version = generation
+                    self._generation = generation
+                self._checked = now
+
+            return self._store, self._generation
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._current()[0], name)
+
+
+db = _Db()
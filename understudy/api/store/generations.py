@@ -0,0 +1,104 @@
+import logging
+import time
+
+from understudy.api.store.base import Store
+
+__all__ = [
+    'begin_generation',
+    'collect_generations',
+    'current_generation',
+    'generation_namespace',
+    'publish_generation',
+]
+
+_log = logging.getLogger(__name__)
+
+# Key of the pointer document in a namespace's base store:
+# { 'current': str | None, 'previous': str | None, 'generations': [...] }
+_POINTER_KEY = 'generation'
+
+
+def generation_namespace(namespace: str, generation: str) -> str:
+    """
+    Gets the store namespace holding a generation of a namespace's data.
+    """
+
+    return '%s.%s' % (namespace, generation) if namespace else generation
+
+
+def _pointer(base: Store) -> dict:
+    return base.get_document(_POINTER_KEY) or {
+        'current': None,
+        'previous': None,
+        'generations': [],
+    }
+
+
+def current_generation(base: Store) -> str | None:
+    """
+    Gets the published generation of a base store's data, if any.
+    """
+
+    return _pointer(base)['current']
+
+
+def begin_generation(base: Store) -> str:
+    """
+    Registers a new (unpublished) generation, returning its name.
+    Generation names sort by creation time.
+    """
+
+    pointer = _pointer(base)
+    generation = time.strftime('g%Y%m%d%H%M%S', time.gmtime())
+    while generation in pointer['generations']:
+        generation += '_'
+
+    pointer['generations'].append(generation)
+    base.put_document(_POINTER_KEY, pointer)
+    return generation
+
+
+def publish_generation(base: Store, generation: str):
+    """
+    Points readers at a completed generation. The pointer is a single
+    document, so the switch is atomic.
+    """
+
+    pointer = _pointer(base)
+    if generation not in pointer['generations']:
+        pointer['generations'].append(generation)
+    pointer['previous'] = pointer['current']
+    pointer['current'] = generation
+    base.put_document(_POINTER_KEY, pointer)
+
+
+def collect_generations(base: Store, namespace: str) -> list[str]:
+    """
+    Drops generations older than the current one (and abandoned runs),
+    keeping the previous one for readers still using it. Returns the
+    dropped generations.
+    """
+
+    pointer = _pointer(base)
+    if pointer['current'] is None:
+        return []
+
+    keep = {pointer['current'], pointer['previous']}
+    dropped = [
+        generation
+        for generation in pointer['generations']
+        if generation < pointer['current'] and generation not in keep
+    ]
+    for generation in dropped:
+        _log.info("Dropping generation %s", generation)
+        base.scoped(generation_namespace(namespace, generation)).drop()
+
+    # Re-read in case another run registered a generation meanwhile
+    pointer = _pointer(base)
+    pointer['generations'] = [
+        generation
+        for generation in pointer['generations']
+        if generation not in dropped
+    ]
+    base.put_document(_POINTER_KEY, pointer)
+    return dropped
@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Iterable
+
+from understudy.api.rmp.rating import Rating
+
+__all__ = ['Journal']
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT  -- JSON-encoded
+);
+CREATE TABLE IF NOT EXISTS sections (
+    namespace TEXT,
+    professor TEXT,
+    course TEXT,
+    ratings BLOB,  -- zlib-compressed JSON list of Rating dicts
+    PRIMARY KEY (namespace, professor, course)
+) WITHOUT ROWID;
+"""
+
+
+class Journal:
+    """
+    On-disk journal of a prefetch run (a SQLite file), recording run
+    metadata and each completed professor x course result as it
+    finishes, so an interrupted run can resume where it left off.
+    Safe to write from several processes at once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def reset(self):
+        """
+        Clears the journal for a new run.
+        """
+
+        with self._conn as conn:
+            conn.execute('DELETE FROM meta')
+            conn.execute('DELETE FROM sections')
+
+    def get_meta(self, key: str) -> Any:
+        """
+        Gets a run metadata value (None if unset).
+        """
+
+        row = self._conn.execute(
+            'SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set_meta(self, key: str, value: Any):
+        """
+        Sets a run metadata value.
+        """
+
+        with self._conn as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                (key, json.dumps(value)),
+            )
+
+    def record(
+        self,
+        namespace: str,
+        professor_id: str,
+        course: str,
+        ratings: list[Rating],
+    ):
+        """
+        Records a professor's fetched ratings for a course.
+        """
+
+        data = zlib.compress(
+            json.dumps([r.to_dict() for r in ratings]).encode())
+        with self._conn as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sections VALUES (?, ?, ?, ?)',
+                (namespace, professor_id, course, data),
+            )
+
+    def completed(self, namespace: str) -> set[tuple[str, str]]:
+        """
+        Gets the (professor_id, course) pairs recorded for a namespace.
+        """
+
+        return set(self._conn.execute(
+            'SELECT professor, course FROM sections WHERE namespace = ?',
+            (namespace,),
+        ))
+
+    def replay(
+        self,
+        namespace: str,
+    ) -> Iterable[tuple[str, str, list[Rating]]]:
+        """
+        Streams the recorded (professor_id, course, [Rating...]) results
+        for a namespace.
+        """
+
+        for prof, course, data in self._conn.execute(
+            'SELECT professor, course, ratings FROM sections '
+            'WHERE namespace = ?',
+            (namespace,),
+        ):
+            yield prof, course, [
+                Rating.from_dict(r)
+                for r in json.loads(zlib.decompress(data))
+            ]
+
+    def remove(self):
+        """
+        Deletes the journal file (e.g. after a completed run).
+        """
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
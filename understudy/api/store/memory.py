@@ -0,0 +1,115 @@
+from typing import Iterable
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.store.base import Store
+
+__all__ = ['MemoryStore']
+
+
+class MemoryStore(Store):
+    """
+    Store held in process memory, indexed for the app's lookups.
+    Contents are lost when the process exits.
+    """
+
+    shared = False
+
+    def __init__(self, *, namespace: str = ''):
+        self.namespace = namespace
+        self._professors: dict[str, Professor] = {}
+
+        # Professor IDs keyed by course
+        self._course_profs: dict[str, list[str]] = {}
+
+        # Ratings keyed by (professor_id, course)
+        self._ratings: dict[tuple[str, str], list[Rating]] = {}
+
+        # Number of ratings keyed by course
+        self._course_counts: dict[str, int] = {}
+
+        # Documents keyed by key
+        self._documents: dict[str, dict] = {}
+
+        # Stores keyed by namespace, shared by all of them
+        self._scopes: dict[str, MemoryStore] = {'': self}
+
+    def scoped(self, namespace: str) -> 'MemoryStore':
+        if namespace not in self._scopes:
+            store = MemoryStore(namespace=namespace)
+            store._scopes = self._scopes
+            self._scopes[namespace] = store
+        return self._scopes[namespace]
+
+    def drop(self):
+        self.replace_professors([])
+        self.clear_ratings()
+        self._documents = {}
+        if self.namespace:
+            self._scopes.pop(self.namespace, None)
+
+    def professors(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[Professor]:
+        return [
+            self._professors[id]
+            for id in self._course_profs.get(course, [])
+            if self._professors[id].take_again >= min_take_again
+        ]
+
+    def professor(self, professor_id: str) -> Professor | None:
+        return self._professors.get(professor_id)
+
+    def all_professors(self) -> Iterable[Professor]:
+        return list(self._professors.values())
+
+    def replace_professors(self, professors: Iterable[Professor]):
+        self._professors = {prof.id: prof for prof in professors}
+        self._course_profs = {}
+        for prof in self._professors.values():
+            for course in prof.courses:
+                self._course_profs.setdefault(course, []).append(prof.id)
+
+    def ratings(self, professor_id: str, course: str) -> list[Rating]:
+        return list(self._ratings.get((professor_id, course), []))
+
+    def all_ratings(self) -> Iterable[tuple[str, str, Rating]]:
+        return [
+            (prof, course, rating)
+            for (prof, course), ratings in self._ratings.items()
+            for rating in ratings
+        ]
+
+    def write_ratings(
+        self,
+        professor_id: str,
+        course: str,
+        ratings: list[Rating],
+    ):
+        self._ratings.setdefault((professor_id, course), []).extend(ratings)
+        self._course_counts[course] = (
+            self._course_counts.get(course, 0) + len(ratings)
+        )
+
+    def clear_ratings(self):
+        self._ratings = {}
+        self._course_counts = {}
+
+    def get_document(self, key: str) -> dict | None:
+        return self._documents.get(key)
+
+    def all_documents(self) -> Iterable[tuple[str, dict]]:
+        return list(self._documents.items())
+
+    def put_document(self, key: str, doc: dict):
+        self._documents[key] = doc
+
+    def courses(self, min_ratings: int = 0) -> list[str]:
+        return sorted(
+            course
+            for course, num in self._course_counts.items()
+            if num >= min_ratings and num > 0
+        )
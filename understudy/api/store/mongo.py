@@ -0,0 +1,212 @@
+from typing import Any, Callable, Iterable
+
+from pymongo import ASCENDING
+
+from understudy.api.mongo.client import connection
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.store.base import Store
+
+__all__ = ['MongoStore']
+
+
+def _driver(collection: Any) -> Any:
+    """
+    Gets the driver's collection behind a Streamlit connection, or the
+    collection itself.
+
+    Streamlit connections cache query results keyed only on the query,
+    not the collection (so e.g. find({}) on two collections collides)
+    and for an hour, which would serve stale generations. The store
+    reads and writes through the driver instead.
+    """
+
+    return getattr(collection, '_instance', collection)
+
+
+class MongoStore(Store):
+    """
+    Store backed by Mongo collections.
+
+    Collections are opened by name through the configured Streamlit
+    Mongo connection by default, but any factory for driver collections
+    or objects with the same interface (e.g. MemoryCollection) can be
+    supplied instead.
+    Namespaced collections are prefixed, e.g. 'school_1.ratings'.
+    """
+
+    def __init__(
+        self,
+        *,
+        collection: Callable[[str], Any] = connection,
+        namespace: str = '',
+    ):
+        self.collection = collection
+        self.namespace = namespace
+
+        # Opened collections keyed by (unprefixed) name
+        self._collections: dict[str, Any] = {}
+
+    def scoped(self, namespace: str) -> 'MongoStore':
+        return MongoStore(collection=self.collection, namespace=namespace)
+
+    def drop(self):
+        for name in ('professors', 'ratings', 'documents'):
+            self._collection(name).drop()
+
+    def prepare(self):
+        # Every generation gets fresh collections, so the lookups'
+        # indexes are created along with them
+        self.ratings_collection.create_index(
+            [('course', ASCENDING), ('professor', ASCENDING)])
+        self.professors_collection.create_index([('courses', ASCENDING)])
+        self.professors_collection.create_index([('id', ASCENDING)])
+        self.documents_collection.create_index(
+            [('key', ASCENDING)], unique=True)
+
+    def _collection(self, name: str) -> Any:
+        if name not in self._collections:
+            self._collections[name] = _driver(self.collection(
+                '%s.%s' % (self.namespace, name) if self.namespace else name))
+        return self._collections[name]
+
+    @property
+    def professors_collection(self) -> Any:
+        return self._collection('professors')
+
+    @property
+    def ratings_collection(self) -> Any:
+        return self._collection('ratings')
+
+    @property
+    def documents_collection(self) -> Any:
+        return self._collection('documents')
+
+    def professors(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[Professor]:
+        return [
+            Professor.from_dict(doc)
+            for doc in self.professors_collection.find({
+                'courses': course,
+                'take_again': {
+                    '$gte': min_take_again,
+                },
+            })
+        ]
+
+    def professor(self, professor_id: str) -> Professor | None:
+        doc = self.professors_collection.find_one({'id': professor_id})
+        return None if doc is None else Professor.from_dict(doc)
+
+    def all_professors(self) -> Iterable[Professor]:
+        return map(Professor.from_dict, self.professors_collection.find({}))
+
+    def replace_professors(self, professors: Iterable[Professor]):
+        docs = [prof.to_dict() for prof in professors]
+        self.professors_collection.delete_many({})
+        if docs:
+            # Empty docs list fails for some reason
+            self.professors_collection.insert_many(docs)
+
+    def ratings(self, professor_id: str, course: str) -> list[Rating]:
+        return [
+            Rating.from_query_result(doc)
+            for doc in self.ratings_collection.find({
+                'professor': professor_id,
+                'course': course,
+            })
+        ]
+
+    def all_ratings(self) -> Iterable[tuple[str, str, Rating]]:
+        return (
+            (doc['professor'], doc['course'], Rating.from_query_result(doc))
+            for doc in self.ratings_collection.find({})
+        )
+
+    def write_ratings(
+        self,
+        professor_id: str,
+        course: str,
+        ratings: list[Rating],
+    ):
+        if len(ratings) == 0:
+            # Empty docs list fails for some reason
+            return
+
+        self.ratings_collection.insert_many([
+            {
+                'professor': professor_id,
+                'course': course,
+                'rating': r.to_dict()
+            }
+            for r in ratings
+        ])
+
+    def clear_ratings(self):
+        self.ratings_collection.delete_many({})
+
+    def get_document(self, key: str) -> dict | None:
+        res = self.documents_collection.find_one({'key': key})
+        return None if res is None else res['doc']
+
+    def all_documents(self) -> Iterable[tuple[str, dict]]:
+        return (
+            (res['key'], res['doc'])
+            for res in self.documents_collection.find({})
+        )
+
+    def put_document(self, key: str, doc: dict):
+        # A single-document replace, so readers see the old or new one
+        self.documents_collection.replace_one(
+            {'key': key},
+            {'key': key, 'doc': doc},
+            upsert=True,
+        )
+
+    def sections(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[tuple[Professor, list[Rating]]]:
+        # One query for the whole course instead of one per professor
+        professors = self.professors(course, min_take_again=min_take_again)
+        by_prof: dict[str, list[Rating]] = {prof.id: [] for prof in professors}
+        for doc in self.ratings_collection.find({'course': course}):
+            if doc['professor'] in by_prof:
+                by_prof[doc['professor']].append(
+                    Rating.from_query_result(doc))
+
+        return [(prof, by_prof[prof.id]) for prof in professors]
+
+    def courses(self, min_ratings: int = 0) -> list[str]:
+        return sorted([
+            doc['course']
+            for doc in self.ratings_collection.aggregate([
+                {
+                    '$group': {
+                        '_id': "$course",
+                        'count': {
+                            '$sum': 1
+                        }
+                    }
+                },
+                {
+                    '$match': {
+                        'count': {
+                            '$gte': min_ratings
+                        }
+                    }
+                },
+                {
+                    '$project': {
+                        '_id': 0,
+                        'course': "$_id"
+                    }
+                }
+            ])
+        ])
@@ -0,0 +1,113 @@
+import os
+from typing import Iterable
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.search.index import CommentMatch
+from understudy.api.search.names import NameMatch
+from understudy.api.snapshot.snapshot import Snapshot, remove_snapshot
+from understudy.api.store.base import Store, scoped_path
+
+__all__ = ['SnapshotStore']
+
+
+class SnapshotStore(Store):
+    """
+    Read-only store serving from a memory-mapped columnar snapshot,
+    reloaded whenever the snapshot is replaced. Namespaces are kept in
+    sibling snapshots.
+    """
+
+    shared = False
+
+    def __init__(self, path: str, *, namespace: str = ''):
+        self.root = path
+        self.path = scoped_path(path, namespace)
+
+        # Loaded snapshot and the version directory it was loaded from
+        self._loaded: tuple[str, Snapshot] | None = None
+
+    def scoped(self, namespace: str) -> 'SnapshotStore':
+        return SnapshotStore(self.root, namespace=namespace)
+
+    def drop(self):
+        self._loaded = None
+        remove_snapshot(self.path)
+
+    @property
+    def snapshot(self) -> Snapshot:
+        # Load from the version the path points at, so a swap mid-load
+        # can't mix files from two versions
+        version = os.path.realpath(self.path)
+        if self._loaded is None or self._loaded[0] != version:
+            try:
+                self._loaded = (version, Snapshot(version))
+            except FileNotFoundError:
+                # Collected mid-load; keep serving the loaded snapshot
+                if self._loaded is None:
+                    raise
+        return self._loaded[1]
+
+    def professors(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[Professor]:
+        return self.snapshot.professors(course, min_take_again=min_take_again)
+
+    def professor(self, professor_id: str) -> Professor | None:
+        return self.snapshot.find_professor(professor_id)
+
+    def all_professors(self) -> Iterable[Professor]:
+        snapshot = self.snapshot
+        return [snapshot.professor(i) for i in range(len(snapshot.prof_ids))]
+
+    def ratings(self, professor_id: str, course: str) -> list[Rating]:
+        return self.snapshot.ratings(professor_id, course)
+
+    def all_ratings(self) -> Iterable[tuple[str, str, Rating]]:
+        snapshot = self.snapshot
+        for course in snapshot.courses():
+            for prof in snapshot.professors(course, min_take_again=-1):
+                for rating in snapshot.ratings(prof.id, course):
+                    yield prof.id, course, rating
+
+    def get_document(self, key: str) -> dict | None:
+        return self.snapshot.document(key)
+
+    def all_documents(self) -> Iterable[tuple[str, dict]]:
+        snapshot = self.snapshot
+        return [
+            (key, snapshot.document(key)) for key in snapshot.document_keys()
+        ]
+
+    def search_comments(
+        self,
+        query: str,
+        *,
+        course: str | None = None,
+        professor_id: str | None = None,
+        limit: int = 20,
+    ) -> list[CommentMatch]:
+        return self.snapshot.search(
+            query,
+            course=course,
+            professor_id=professor_id,
+            limit=limit,
+        )
+
+    def comment_hits(self, query: str, *, course: str) -> dict[str, int]:
+        return self.snapshot.comment_hits(query, course=course)
+
+    def search_professors(
+        self,
+        query: str,
+        *,
+        limit: int = 10,
+    ) -> list[NameMatch]:
+        # The loaded version's index, replaced with the snapshot
+        return self.snapshot.name_index.search(query, limit=limit)
+
+    def courses(self, min_ratings: int = 0) -> list[str]:
+        return self.snapshot.courses(min_ratings)
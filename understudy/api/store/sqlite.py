@@ -0,0 +1,241 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.store.base import Store, scoped_path
+
+__all__ = ['SqliteStore']
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS professors (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    dept TEXT,
+    quality REAL,
+    difficulty REAL,
+    take_again REAL
+);
+CREATE TABLE IF NOT EXISTS professor_courses (
+    course TEXT,
+    professor TEXT,
+    PRIMARY KEY (course, professor)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ratings (
+    course TEXT,
+    professor TEXT,
+    rating TEXT  -- JSON-encoded Rating
+);
+CREATE INDEX IF NOT EXISTS ratings_section ON ratings (course, professor);
+CREATE TABLE IF NOT EXISTS documents (
+    key TEXT PRIMARY KEY,
+    doc TEXT  -- JSON-encoded document
+);
+"""
+
+
+class SqliteStore(Store):
+    """
+    Store backed by a local SQLite database file.
+    Each thread (e.g. Streamlit script run) gets its own connection.
+    Namespaces are kept in sibling database files.
+    """
+
+    def __init__(self, path: str, *, namespace: str = ''):
+        self.root = path
+        self.path = scoped_path(path, namespace)
+        self._local = threading.local()
+
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def scoped(self, namespace: str) -> 'SqliteStore':
+        return SqliteStore(self.root, namespace=namespace)
+
+    def drop(self):
+        # Connections on other threads fail on their next use
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _professor_rows(
+        self,
+        rows: Iterable[tuple],
+    ) -> dict[str, Professor]:
+        """
+        Builds professors from (id, name, dept, quality, difficulty,
+        take_again) rows, filling in their courses.
+        """
+
+        professors = {
+            row[0]: Professor(
+                id=row[0],
+                name=row[1],
+                dept=row[2],
+                quality=row[3],
+                difficulty=row[4],
+                take_again=row[5],
+                courses=set(),
+            )
+            for row in rows
+        }
+        if not professors:
+            return professors
+
+        ids = list(professors)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for course, prof in self._conn.execute(
+                'SELECT course, professor FROM professor_courses '
+                'WHERE professor IN (%s)' % ','.join('?' * len(chunk)),
+                chunk,
+            ):
+                professors[prof].add_courses(course)
+
+        return professors
+
+    def professors(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[Professor]:
+        return list(self._professor_rows(self._conn.execute(
+            'SELECT p.id, p.name, p.dept, p.quality, p.difficulty, '
+            'p.take_again FROM professor_courses pc '
+            'JOIN professors p ON p.id = pc.professor '
+            'WHERE pc.course = ? AND p.take_again >= ?',
+            (course, min_take_again),
+        )).values())
+
+    def professor(self, professor_id: str) -> Professor | None:
+        return self._professor_rows(self._conn.execute(
+            'SELECT id, name, dept, quality, difficulty, take_again '
+            'FROM professors WHERE id = ?',
+            (professor_id,),
+        )).get(professor_id)
+
+    def all_professors(self) -> Iterable[Professor]:
+        return list(self._professor_rows(self._conn.execute(
+            'SELECT id, name, dept, quality, difficulty, take_again '
+            'FROM professors'
+        )).values())
+
+    def replace_professors(self, professors: Iterable[Professor]):
+        professors = list(professors)
+        with self._conn as conn:
+            conn.execute('DELETE FROM professors')
+            conn.execute('DELETE FROM professor_courses')
+            conn.executemany(
+                'INSERT INTO professors VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (p.id, p.name, p.dept, p.quality, p.difficulty,
+                     p.take_again)
+                    for p in professors
+                ],
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO professor_courses VALUES (?, ?)',
+                [(c, p.id) for p in professors for c in p.courses],
+            )
+
+    def ratings(self, professor_id: str, course: str) -> list[Rating]:
+        return [
+            Rating.from_dict(json.loads(data))
+            for data, in self._conn.execute(
+                'SELECT rating FROM ratings '
+                'WHERE course = ? AND professor = ? ORDER BY rowid',
+                (course, professor_id),
+            )
+        ]
+
+    def all_ratings(self) -> Iterable[tuple[str, str, Rating]]:
+        return (
+            (prof, course, Rating.from_dict(json.loads(data)))
+            for prof, course, data in self._conn.execute(
+                'SELECT professor, course, rating FROM ratings ORDER BY rowid')
+        )
+
+    def write_ratings(
+        self,
+        professor_id: str,
+        course: str,
+        ratings: list[Rating],
+    ):
+        with self._conn as conn:
+            conn.executemany(
+                'INSERT INTO ratings VALUES (?, ?, ?)',
+                [
+                    (course, professor_id, json.dumps(r.to_dict()))
+                    for r in ratings
+                ],
+            )
+
+    def clear_ratings(self):
+        with self._conn as conn:
+            conn.execute('DELETE FROM ratings')
+
+    def get_document(self, key: str) -> dict | None:
+        row = self._conn.execute(
+            'SELECT doc FROM documents WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def all_documents(self) -> Iterable[tuple[str, dict]]:
+        return [
+            (key, json.loads(doc))
+            for key, doc in self._conn.execute(
+                'SELECT key, doc FROM documents ORDER BY key')
+        ]
+
+    def put_document(self, key: str, doc: dict):
+        with self._conn as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO documents VALUES (?, ?)',
+                (key, json.dumps(doc)),
+            )
+
+    def sections(
+        self,
+        course: str,
+        *,
+        min_take_again: float = 0,
+    ) -> list[tuple[Professor, list[Rating]]]:
+        # One query for the whole course instead of one per professor
+        professors = self.professors(course, min_take_again=min_take_again)
+        by_prof: dict[str, list[Rating]] = {prof.id: [] for prof in professors}
+        for prof, data in self._conn.execute(
+            'SELECT professor, rating FROM ratings '
+            'WHERE course = ? ORDER BY rowid',
+            (course,),
+        ):
+            if prof in by_prof:
+                by_prof[prof].append(Rating.from_dict(json.loads(data)))
+
+        return [(prof, by_prof[prof.id]) for prof in professors]
+
+    def courses(self, min_ratings: int = 0) -> list[str]:
+        return [
+            course
+            for course, in self._conn.execute(
+                'SELECT course FROM ratings GROUP BY course '
+                'HAVING COUNT(*) >= ? ORDER BY course',
+                (min_ratings,),
+            )
+        ]
@@ -0,0 +1,251 @@
+import argparse
+import logging
+import string
+from typing import Any
+
+import numpy as np
+
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating
+from understudy.api.store.base import Store
+
+__all__ = ['generate', 'load']
+
+_log = logging.getLogger(__name__)
+
+
+# Vocabulary for synthetic values (roughly what shows up on RMP)
+_TAGS = (
+    'tough grader', 'get ready to read', 'participation matters',
+    'extra credit', 'group projects', 'amazing lectures',
+    'clear grading criteria', 'gives good feedback', 'inspirational',
+    'lots of homework', 'hilarious', 'beware of pop quizzes',
+    'so many papers', 'caring', 'respected', 'lecture heavy', 'test heavy',
+    'graded by few things', 'accessible outside class', 'online savvy',
+)
+_GRADES = (
+    'A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F',
+    'Not sure yet', 'Rather not say', 'Audit/No Grade', 'Drop/Withdrawal', ' ',
+)
+_WORDS = (
+    'the', 'class', 'professor', 'exams', 'lectures', 'homework', 'curve',
+    'easy', 'hard', 'tests', 'quizzes', 'helpful', 'boring', 'great', 'and',
+    'grading', 'fair', 'projects', 'office', 'hours', 'recommend', 'avoid',
+    'notes', 'textbook', 'attendance', 'online', 'labs', 'assignments', 'is',
+    'material', 'really', 'not', 'very', 'final', 'midterm', 'study', 'you',
+    'learn', 'lot', 'explains', 'well', 'confusing', 'slides', 'extra',
+    'credit', 'participation', 'papers', 'reading', 'harsh', 'nice', 'but',
+)
+_DEPTS = (
+    'Computer Science', 'Mathematics', 'Physics', 'Chemistry', 'Biology',
+    'English', 'History', 'Psychology', 'Economics', 'Engineering',
+    'Philosophy', 'Sociology', 'Political Science', 'Statistics', 'Music',
+)
+
+
+def _zipf_weights(n: int, skew: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Shuffled, normalized Zipf-like weights for n items.
+    """
+
+    weights = 1 / np.arange(1, n + 1) ** skew
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate(
+    *,
+    num_professors: int = 5_000,
+    num_ratings: int = 500_000,
+    num_courses: int = 3_000,
+    skew: float = 0.7,  # Zipf exponent for course popularity
+    seed: int = 0,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Generates synthetic professor and rating documents, in the shapes
+    prefetch writes to the professors and ratings collections.
+    Returns ([professor...], [rating...])
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # Course codes and their (skewed) popularity
+    prefixes = [
+        ''.join(rng.choice(list(string.ascii_uppercase), 3))
+        for _ in range(max(1, num_courses // 40))
+    ]
+    courses = sorted({
+        '%s%d' % (rng.choice(prefixes), rng.integers(1000, 7000))
+        for _ in range(num_courses)
+    })
+    course_weights = _zipf_weights(len(courses), skew, rng)
+
+    # Professors teach a handful of courses, picked by popularity
+    course_profs: list[list[int]] = [[] for _ in courses]
+    prof_courses: list[list[str]] = []
+    for p in range(num_professors):
+        k = min(len(courses), 1 + rng.geometric(0.4))
+        picked = rng.choice(len(courses), k, replace=False, p=course_weights)
+        prof_courses.append([courses[c] for c in picked])
+        for c in picked:
+            course_profs[c].append(p)
+
+    # Distribute ratings across courses, then across each course's
+    # professors (some get many more reviews than others)
+    popularity = rng.lognormal(0, 1, num_professors)
+    taught = np.array([len(profs) > 0 for profs in course_profs])
+    weights = course_weights * taught
+    sections: list[tuple[int, int]] = []  # (professor, course)
+    counts: list[int] = []
+    for c, num in enumerate(rng.multinomial(
+            num_ratings, weights / weights.sum())):
+        profs = course_profs[c]
+        if not profs:
+            continue
+        split = popularity[profs] / popularity[profs].sum()
+        for p, n in zip(profs, rng.multinomial(num, split)):
+            sections.append((p, c))
+            counts.append(n)
+
+    # Per-professor tendencies
+    prof_quality = np.clip(rng.normal(3.6, 0.8, num_professors), 1, 5)
+    prof_difficulty = np.clip(rng.normal(3.0, 0.7, num_professors), 1, 5)
+
+    # Vectorized per-rating fields
+    owners = np.repeat(np.arange(len(sections)), counts)
+    n = len(owners)
+    rating_profs = np.array([p for p, _ in sections], dtype=np.int64)[owners]
+    quality = np.clip(np.rint(
+        rng.normal(prof_quality[rating_profs], 1.0)), 1, 5).astype(int)
+    difficulty = np.clip(np.rint(
+        rng.normal(prof_difficulty[rating_profs], 1.0)), 1, 5).astype(int)
+    comment_lengths = rng.integers(8, 60, n)
+    words = rng.choice(
+        len(_WORDS),
+        comment_lengths.sum(),
+        p=_zipf_weights(len(_WORDS), 1.0, rng),
+    )
+    offsets = np.concatenate(([0], np.cumsum(comment_lengths))).tolist()
+    num_tags = rng.integers(0, 4, n).tolist()
+    tags = rng.integers(0, len(_TAGS), (n, 3)).tolist()
+    flags = rng.integers(0, 3, (n, 3)).tolist()  # false/true/unknown
+    grades = rng.integers(0, len(_GRADES), n).tolist()
+    votes = rng.poisson(1.5, (n, 2)).tolist()
+    dates = (np.datetime64('2024-12-31') - rng.integers(0, 3650, n)) \
+        .astype(str).tolist()
+    words = [_WORDS[w] for w in words.tolist()]
+    quality, difficulty = quality.tolist(), difficulty.tolist()
+
+    # Build rating documents
+    ratings: list[dict] = []
+    tristate: tuple[Any, ...] = (False, True, None)
+    prof_sums: dict[int, list[float]] = {}
+    for i, s in enumerate(owners.tolist()):
+        p, c = sections[s]
+        grade = _GRADES[grades[i]]
+        ratings.append({
+            'professor': 'prof-%d' % p,
+            'course': courses[c],
+            'rating': {
+                'id': 'rating-%d' % i,
+                'quality': quality[i],
+                'difficulty': difficulty[i],
+                'comment': ' '.join(words[offsets[i]:offsets[i + 1]]),
+                'grade': None if grade.isspace() else grade,
+                'for_credit': True,
+                'meta': {
+                    'online': tristate[flags[i][0]],
+                    'attendance_required': tristate[flags[i][1]],
+                    'textbook_required': tristate[flags[i][2]],
+                    'tags': list({_TAGS[t] for t in tags[i][:num_tags[i]]}),
+                },
+                'votes': votes[i],
+                'date': dates[i],
+            },
+        })
+
+        # Track sums for professor-level averages
+        sums = prof_sums.setdefault(p, [0, 0, 0, 0])
+        sums[0] += quality[i]
+        sums[1] += difficulty[i]
+        sums[2] += quality[i] >= 4
+        sums[3] += 1
+
+    # Build professor documents
+    professors: list[dict] = []
+    for p in range(num_professors):
+        q, d, again, n = prof_sums.get(p, [0, 0, 0, 0])
+        professors.append({
+            'id': 'prof-%d' % p,
+            'name': '%s %s' % (
+                ''.join(rng.choice(list(string.ascii_lowercase), 6)).title(),
+                ''.join(rng.choice(list(string.ascii_lowercase), 8)).title(),
+            ),
+            'dept': str(rng.choice(_DEPTS)),
+            'quality': round(float(q / n), 1) if n else 0,
+            'difficulty': round(float(d / n), 1) if n else 0,
+            'take_again': round(float(again / n * 100)) if n else -1,
+            'courses': prof_courses[p],
+        })
+
+    return professors, ratings
+
+
+def load(professors: list[dict], ratings: list[dict], store: Store):
+    """
+    Replaces the contents of a store with generated documents.
+    """
+
+    store.replace_professors(map(Professor.from_dict, professors))
+    store.clear_ratings()
+
+    # Group ratings into sections, keeping their order
+    sections: dict[tuple[str, str], list[Rating]] = {}
+    for doc in ratings:
+        sections.setdefault((doc['professor'], doc['course']), []).append(
+            Rating.from_query_result(doc))
+    for (prof, course), section in sections.items():
+        store.write_ratings(prof, course, section)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generates a synthetic dataset into a local mongod.",
+    )
+    parser.add_argument('--professors', type=int, default=5_000)
+    parser.add_argument('--ratings', type=int, default=500_000)
+    parser.add_argument('--courses', type=int, default=3_000)
+    parser.add_argument('--skew', type=float, default=0.7)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mongo-url', default='mongodb://localhost:27017')
+    parser.add_argument('--database', default='understudy_bench')
+    args = parser.parse_args()
+
+    from pymongo import ASCENDING, MongoClient
+
+    _log.info("Generating %d professors, %d ratings...",
+              args.professors, args.ratings)
+    professors, ratings = generate(
+        num_professors=args.professors,
+        num_ratings=args.ratings,
+        num_courses=args.courses,
+        skew=args.skew,
+        seed=args.seed,
+    )
+
+    _log.info("Loading into %s/%s...", args.mongo_url, args.database)
+    database = MongoClient(args.mongo_url)[args.database]
+    for name, docs in (('professors', professors), ('ratings', ratings)):
+        database[name].delete_many({})
+        for start in range(0, len(docs), 10_000):
+            database[name].insert_many(docs[start:start + 10_000])
+
+    database['professors'].create_index([('courses', ASCENDING)])
+    database['ratings'].create_index(
+        [('professor', ASCENDING), ('course', ASCENDING)])
+    _log.info("Done")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
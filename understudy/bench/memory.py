@@ -0,0 +1,361 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import tracemalloc
+from typing import Any
+
+import pandas as pd
+
+from understudy.api.courses import lookup
+from understudy.api.courses.cache import deep_size
+from understudy.api.courses.compare import compare_sections, comparison_key
+from understudy.api.courses.section import Section
+from understudy.api.courses.summary import summarize_sections, summary_key
+from understudy.api.store.base import Store
+from understudy.api.store.client import db
+from understudy.api.store.generations import (
+    begin_generation,
+    generation_namespace,
+    publish_generation,
+)
+from understudy.api.store.memory import MemoryStore
+from understudy.api.store.sqlite import SqliteStore
+from understudy.bench.generate import generate, load
+
+__all__ = ['profile']
+
+_log = logging.getLogger(__name__)
+
+# Allocations left out of the top sites (the profiling's own)
+_SITE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+def _open_generation(
+    backend: str,
+    professors: list[dict],
+    ratings: list[dict],
+) -> Store:
+    """
+    Loads the data, with its precomputed summaries and comparisons, into
+    a published generation of a new store (so lookups are cached as in
+    the app). Returns the base store.
+    """
+
+    if backend == 'memory':
+        base = MemoryStore()
+    elif backend == 'sqlite':
+        base = SqliteStore(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    else:
+        raise ValueError("Unknown backend %r" % backend)
+
+    generation = begin_generation(base)
+    store = base.scoped(generation_namespace('', generation))
+    load(professors, ratings, store)
+    for course, summaries in summarize_sections(store.all_ratings()).items():
+        store.put_document(summary_key(course), summaries)
+    for course, comparison in compare_sections(
+        store.all_ratings(),
+        store.all_professors(),
+    ).items():
+        store.put_document(comparison_key(course), comparison)
+    publish_generation(base, generation)
+    return base
+
+
+def _render(sections: list[Section]) -> list[dict]:
+    """
+    Builds what the page builds per section (box plot frame, tag badges,
+    standing), as a render holds it.
+    """
+
+    return [
+        {
+            'frame': pd.DataFrame(
+                [(r.quality, 'quality') for r in section.ratings] +
+                [(r.difficulty, 'difficulty') for r in section.ratings],
+                columns=['value', 'type'],
+            ),
+            'tags': [
+                "<span class='tag-badge'>%s</span>" % tag
+                for tag in section.meta.tags
+            ],
+            'standing': {
+                metric: "%.0f%%" % rank
+                for metric, rank in section.percentiles.items()
+                if rank is not None
+            },
+        }
+        for section in sections
+    ]
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _profile_course(course: str, num_ratings: int, *, top: int) -> dict:
+    """
+    Measures the memory a course's sections take to collect and keep,
+    and to render.
+    """
+
+    before = tracemalloc.take_snapshot().filter_traces(_SITE_FILTERS) \
+        if top else None
+    start = _traced()
+    tracemalloc.reset_peak()
+    sections = lookup.collect_sections(course, min_reviews=0, min_take_again=-1)
+    collect_peak = tracemalloc.get_traced_memory()[1] - start
+    retained = _traced() - start
+
+    sites = []
+    if before is not None:
+        sites = [
+            str(stat)
+            for stat in tracemalloc.take_snapshot().filter_traces(
+                _SITE_FILTERS).compare_to(before, 'lineno')[:top]
+        ]
+
+    render_start = _traced()
+    tracemalloc.reset_peak()
+    rendered = _render(sections)
+    render_peak = tracemalloc.get_traced_memory()[1] - render_start
+    render_retained = _traced() - render_start
+
+    res = {
+        'course': course,
+        'ratings': num_ratings,
+        'sections': len(sections),
+        'retained_bytes': retained,
+        'peak_bytes': collect_peak,
+        'measured_bytes': deep_size(sections),
+        'bytes_per_section': retained / max(len(sections), 1),
+        'bytes_per_rating': retained / max(num_ratings, 1),
+        'render_bytes': render_retained,
+        'render_peak_bytes': render_peak,
+        'sites': sites,
+    }
+    del sections, rendered
+    return res
+
+
+def _simulate_sessions(
+    courses: list[str],
+    weights: list[int],
+    *,
+    num_sessions: int,
+    renders: int,
+    seed: int,
+) -> dict:
+    """
+    Runs concurrent sessions that each render a few courses (picked by
+    popularity), holding their last page as Streamlit sessions do.
+    Measures what they hold altogether, cache included.
+    """
+
+    held: list[Any] = [None] * num_sessions
+
+    def session(i: int):
+        rng = random.Random(seed + i)
+        for course in rng.choices(courses, weights=weights, k=renders):
+            db.pin()
+            sections = lookup.collect_sections(course)
+            held[i] = (sections, _render(sections))
+
+    start = _traced()
+    tracemalloc.reset_peak()
+    threads = [
+        threading.Thread(target=session, args=(i,))
+        for i in range(num_sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    peak = tracemalloc.get_traced_memory()[1] - start
+    retained = _traced() - start
+
+    cache = lookup.result_cache.stats()
+    return {
+        'sessions': num_sessions,
+        'renders': renders,
+        'retained_bytes': retained,
+        'peak_bytes': peak,
+        'bytes_per_session': (retained - cache['bytes']) / num_sessions,
+        'cache': cache,
+    }
+
+
+def profile(
+    *,
+    num_professors: int,
+    num_ratings: int,
+    backend: str = 'sqlite',
+    num_courses: int = 10,
+    num_sessions: int = 8,
+    renders: int = 5,
+    cache_mb: float = 256,
+    top: int = 0,
+    seed: int = 0,
+) -> dict:
+    """
+    Generates a dataset, loads it into a store backend and profiles the
+    memory the app's lookups and renders take, per course and section
+    and under simulated concurrent sessions sharing the result cache.
+    """
+
+    _log.info("Generating %d professors, %d ratings...",
+              num_professors, num_ratings)
+    professors, ratings = generate(
+        num_professors=num_professors,
+        num_ratings=num_ratings,
+        seed=seed,
+    )
+
+    _log.info("Loading into %s store...", backend)
+    db.use(_open_generation(backend, professors, ratings))
+
+    # Courses by popularity, profiling a spread of them
+    counts: dict[str, int] = {}
+    for doc in ratings:
+        counts[doc['course']] = counts.get(doc['course'], 0) + 1
+    del professors, ratings
+    by_count = sorted(counts, key=counts.get, reverse=True)
+    step = max(len(by_count) // num_courses, 1)
+    picks = by_count[::step][:num_courses]
+
+    tracemalloc.start()
+    try:
+        # Per course, without caching so each lookup is measured whole
+        lookup.result_cache.clear()
+        lookup.result_cache.max_bytes = 0
+        _log.info("Profiling %d courses...", len(picks))
+        courses = [
+            _profile_course(course, counts[course], top=top)
+            for course in picks
+        ]
+
+        lookup.result_cache.clear()
+        lookup.result_cache.max_bytes = int(cache_mb * 2**20)
+        _log.info("Simulating %d sessions...", num_sessions)
+        sessions = _simulate_sessions(
+            by_count,
+            [counts[course] for course in by_count],
+            num_sessions=num_sessions,
+            renders=renders,
+            seed=seed,
+        )
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'professors': num_professors,
+        'ratings': num_ratings,
+        'backend': backend,
+        'courses': courses,
+        'sessions': sessions,
+    }
+
+
+def _print_report(report: dict):
+    """
+    Prints a memory profile as tables.
+    """
+
+    print("\n%d professors, %d ratings (%s)" % (
+        report['professors'], report['ratings'], report['backend']))
+    print("%-10s %8s %8s %12s %12s %12s %10s %10s %12s" % (
+        'course', 'ratings', 'sections', 'kept KiB', 'peak KiB',
+        'measured KiB', 'B/section', 'B/rating', 'render KiB'))
+    for res in report['courses']:
+        print("%-10s %8d %8d %12.1f %12.1f %12.1f %10.0f %10.0f %12.1f" % (
+            res['course'],
+            res['ratings'],
+            res['sections'],
+            res['retained_bytes'] / 1024,
+            res['peak_bytes'] / 1024,
+            res['measured_bytes'] / 1024,
+            res['bytes_per_section'],
+            res['bytes_per_rating'],
+            res['render_bytes'] / 1024,
+        ))
+        for site in res['sites']:
+            print("    %s" % site)
+
+    sessions = report['sessions']
+    cache = sessions['cache']
+    print("\n%d sessions x %d renders: %.1f KiB kept (%.1f KiB peak), "
+          "%.1f KiB per session" % (
+              sessions['sessions'],
+              sessions['renders'],
+              sessions['retained_bytes'] / 1024,
+              sessions['peak_bytes'] / 1024,
+              sessions['bytes_per_session'] / 1024,
+          ))
+    print("cache: %d entries, %.1f of %.1f KiB, %d hits, %d misses, "
+          "%d evictions" % (
+              cache['entries'],
+              cache['bytes'] / 1024,
+              cache['max_bytes'] / 1024,
+              cache['hits'],
+              cache['misses'],
+              cache['evictions'],
+          ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profiles the memory course lookups and renders take.",
+    )
+    parser.add_argument('--professors', type=int, default=500)
+    parser.add_argument('--ratings', type=int, default=50_000)
+    parser.add_argument(
+        '--backend',
+        default='sqlite',
+        help="store backend to load into (sqlite, or memory, whose "
+             "lookups share the store's rating objects)",
+    )
+    parser.add_argument('--courses', type=int, default=10,
+                        help="number of courses to profile")
+    parser.add_argument('--sessions', type=int, default=8,
+                        help="number of concurrent sessions to simulate")
+    parser.add_argument('--renders', type=int, default=5,
+                        help="courses each session renders")
+    parser.add_argument('--cache-mb', type=float, default=256,
+                        help="result cache budget for the sessions")
+    parser.add_argument('--top', type=int, default=0,
+                        help="show each course's top allocation sites")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    report = profile(
+        num_professors=args.professors,
+        num_ratings=args.ratings,
+        backend=args.backend,
+        num_courses=args.courses,
+        num_sessions=args.sessions,
+        renders=args.renders,
+        cache_mb=args.cache_mb,
+        top=args.top,
+        seed=args.seed,
+    )
+    _print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from understudy.api.courses.lookup import collect_courses, collect_sections
+from understudy.api.courses.section import Section
+from understudy.api.mongo.memory import MemoryCollection
+from understudy.api.rmp.professor import Professor
+from understudy.api.rmp.rating import Rating, RatingSet
+from understudy.api.snapshot.snapshot import write_snapshot
+from understudy.api.store.base import Store
+from understudy.api.store.client import db
+from understudy.api.store.memory import MemoryStore
+from understudy.api.store.mongo import MongoStore
+from understudy.api.store.snapshot import SnapshotStore
+from understudy.api.store.sqlite import SqliteStore
+from understudy.bench.generate import generate, load
+
+__all__ = ['bench', 'run']
+
+_log = logging.getLogger(__name__)
+
+
+def bench(fn: Callable[[], Any], *, repeat: int = 5) -> dict:
+    """
+    Times a function and measures its memory use.
+    The first call is reported separately (cold caches).
+    """
+
+    start = time.perf_counter()
+    fn()
+    cold = time.perf_counter() - start
+
+    # Memory: peak allocation during a call, and size of what it returns
+    # (traced separately, since tracing slows everything down)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    # Timing over repeated (warm) calls
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return {
+        'cold': cold,
+        'median': statistics.median(times),
+        'min': min(times),
+        'peak_bytes': peak - before,
+        'result_bytes': current - before,
+    }
+
+
+def _open_backend(
+    backend: str,
+    professors: list[dict],
+    ratings: list[dict],
+    *,
+    mongo_url: str | None = None,
+) -> Store:
+    """
+    Opens a store of the given kind, loaded with the benchmark data.
+    """
+
+    if backend == 'mongo':
+        # Load straight into mongod, then read through the Mongo store
+        from pymongo import ASCENDING, MongoClient
+
+        database = MongoClient(mongo_url)['understudy_bench']
+        for name, docs in (('professors', professors), ('ratings', ratings)):
+            database[name].delete_many({})
+            for start in range(0, len(docs), 10_000):
+                database[name].insert_many(
+                    [dict(doc) for doc in docs[start:start + 10_000]])
+        database['professors'].create_index([('courses', ASCENDING)])
+        database['ratings'].create_index(
+            [('professor', ASCENDING), ('course', ASCENDING)])
+        database['ratings'].create_index([('course', ASCENDING)])
+        return MongoStore(collection=database.get_collection)
+
+    if backend == 'mongo-memory':
+        # Mongo store over in-memory stand-in collections
+        store = MongoStore(collection=lambda name: MemoryCollection())
+        store.professors_collection.create_index('courses')
+        store.ratings_collection.create_index('professor')
+        store.ratings_collection.create_index('course')
+    elif backend == 'memory':
+        store = MemoryStore()
+    elif backend == 'sqlite':
+        store = SqliteStore(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    elif backend == 'snapshot':
+        # Snapshots are read-only, so build one from a memory store
+        source = MemoryStore()
+        load(professors, ratings, source)
+        path = os.path.join(tempfile.mkdtemp(), 'snapshot')
+        write_snapshot(path, source.all_professors(), source.all_ratings())
+        return SnapshotStore(path)
+    else:
+        raise ValueError("Unknown backend %r" % backend)
+
+    load(professors, ratings, store)
+    return store
+
+
+def run(
+    *,
+    num_professors: int,
+    num_ratings: int,
+    backend: str = 'memory',
+    repeat: int = 5,
+    mongo_url: str | None = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Generates a dataset at the given scale, loads it into a store
+    backend and benchmarks the lookup functions against it.
+    """
+
+    _log.info("Generating %d professors, %d ratings...",
+              num_professors, num_ratings)
+    professors, ratings = generate(
+        num_professors=num_professors,
+        num_ratings=num_ratings,
+        seed=seed,
+    )
+
+    # Point the app at the benchmark data
+    _log.info("Loading into %s store...", backend)
+    db.use(_open_backend(backend, professors, ratings, mongo_url=mongo_url))
+
+    # Pick the most popular, median and a tail course to look up
+    counts: dict[str, int] = {}
+    for doc in ratings:
+        counts[doc['course']] = counts.get(doc['course'], 0) + 1
+    by_count = sorted(counts, key=counts.get, reverse=True)
+    picks = {
+        'top': by_count[0],
+        'median': by_count[len(by_count) // 2],
+        'tail': by_count[-1],
+    }
+
+    # Ratings for the largest section, for construction benchmarks
+    section_counts: dict[tuple[str, str], int] = {}
+    for doc in ratings:
+        key = (doc['professor'], doc['course'])
+        section_counts[key] = section_counts.get(key, 0) + 1
+    prof_id, course = max(section_counts, key=section_counts.get)
+    section_ratings = [
+        Rating.from_query_result(doc) for doc in ratings
+        if doc['professor'] == prof_id and doc['course'] == course
+    ]
+    professor = Professor.from_dict(
+        next(p for p in professors if p['id'] == prof_id))
+
+    results: dict[str, dict] = {
+        'collect_courses': bench(
+            lambda: collect_courses(min_occurences=10), repeat=repeat),
+    }
+    for label, code in picks.items():
+        results['collect_sections[%s:%d]' % (label, counts[code])] = bench(
+            lambda: collect_sections(code, min_reviews=0, min_take_again=-1),
+            repeat=repeat,
+        )
+    results['RatingSet[%d]' % len(section_ratings)] = bench(
+        lambda: RatingSet(section_ratings), repeat=repeat)
+    results['Section[%d]' % len(section_ratings)] = bench(
+        lambda: Section(
+            course=course,
+            professor=professor,
+            ratings=RatingSet(section_ratings),
+        ),
+        repeat=repeat,
+    )
+
+    return {
+        'professors': num_professors,
+        'ratings': num_ratings,
+        'backend': backend,
+        'results': results,
+    }
+
+
+def _print_report(report: dict):
+    """
+    Prints a benchmark report as a table.
+    """
+
+    print("\n%d professors, %d ratings (%s)" % (
+        report['professors'], report['ratings'], report['backend']))
+    print("%-32s %10s %10s %10s %12s %12s" % (
+        'benchmark', 'cold ms', 'median ms', 'min ms',
+        'peak KiB', 'result KiB'))
+    for name, res in report['results'].items():
+        print("%-32s %10.2f %10.2f %10.2f %12.1f %12.1f" % (
+            name,
+            res['cold'] * 1000,
+            res['median'] * 1000,
+            res['min'] * 1000,
+            res['peak_bytes'] / 1024,
+            res['result_bytes'] / 1024,
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks course lookups across dataset sizes.",
+    )
+    parser.add_argument(
+        '--scales',
+        default='500:50000,5000:500000',
+        help="comma-separated professors:ratings dataset sizes",
+    )
+    parser.add_argument(
+        '--backends',
+        default='memory',
+        help="comma-separated store backends to compare (memory, "
+             "mongo-memory, sqlite, snapshot, mongo)",
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--mongo-url',
+        default='mongodb://localhost:27017',
+        help="mongod to use for the mongo backend",
+    )
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    reports = []
+    for scale in args.scales.split(','):
+        num_professors, num_ratings = map(int, scale.split(':'))
+        for backend in args.backends.split(','):
+            report = run(
+                num_professors=num_professors,
+                num_ratings=num_ratings,
+                backend=backend,
+                repeat=args.repeat,
+                mongo_url=args.mongo_url,
+                seed=args.seed,
+            )
+            reports.append(report)
+            _print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -3,13 +3,30 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from understudy.api.courses.lookup import collect_courses, collect_sections
+from understudy.api.courses.lookup import (
+    collect_courses,
+    collect_departments,
+    collect_professor,
+    collect_sections,
+    comment_hits,
+    search_comments,
+    search_professors,
+)
+from understudy.api.store.client import db
 
 
 # Min thresholds for displaying tags/courses
 _TAG_THRESHOLD = 10
 _COURSE_THRESHOLD = 10
 
+# Review search matches to show per section
+_SEARCH_SHOWN = 3
+
+
+# Read one generation of data for the whole page, even if a prefetch
+# publishes a new one mid-render
+db.pin()
+
 
 # Hacky styling
 _static_root: str = os.path.join(os.path.dirname(__file__), 'static')
@@ -22,10 +39,90 @@ st.title("understudy", anchor=False)
 st.header("choose professors, wisely.", anchor=False)
 st.divider()
 
-# Course code selection
-course = st.selectbox(
+# Look up a course's sections, or a professor's courses
+view = st.radio(
+    "Look up:",
+    options=["Course", "Professor"],
+    horizontal=True,
+)
+
+# Professor lookup by name, typos and all
+if view == "Professor":
+    name_query = st.text_input(
+        "Professor name:",
+        placeholder="e.g. Leinecker, or Smith physics...",
+    )
+    prof_matches = {
+        match.professor_id: match
+        for match in (search_professors(name_query) if name_query else [])
+    }
+    professor_id = st.selectbox(
+        "Select a professor:",
+        options=list(prof_matches),
+        index=None,
+        format_func=lambda id: "%s (%s)" % (
+            prof_matches[id].name, prof_matches[id].dept),
+        placeholder="Pick a match...",
+    )
+    if not professor_id:
+        st.stop()
+
+    # Their section of each course they've been rated for
+    prof_sections = collect_professor(professor_id)
+    st.divider()
+    st.header(prof_matches[professor_id].name, anchor=False)
+    if not prof_sections:
+        st.write("No ratings found for this professor.")
+        st.stop()
+
+    prof = prof_sections[0].professor
+    if prof.take_again >= 0:
+        st.write("**%.0f%%** would take again" % prof.take_again)
+    st.dataframe(
+        pd.DataFrame(
+            [
+                (
+                    section.course,
+                    section.num_ratings,
+                    section.quality,
+                    section.difficulty,
+                    section.percentiles.get('quality'),
+                    section.percentiles.get('difficulty'),
+                    ', '.join(section.keywords),
+                )
+                for section in prof_sections
+            ],
+            columns=[
+                "Course",
+                "Ratings",
+                "Quality",
+                "Difficulty",
+                "Quality percentile",
+                "Difficulty percentile",
+                "Reviews often mention",
+            ],
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.stop()
+
+# Course code selection, optionally narrowed to a department
+departments = collect_departments(min_occurences=_COURSE_THRESHOLD)
+l, r = st.columns([1, 3])
+department = l.selectbox(
+    "Department:",
+    options=list(departments),
+    index=None,
+    format_func=lambda dept: "%s (%d)" % (dept, departments[dept]),
+    placeholder="Any",
+)
+course = r.selectbox(
     "Select a course:",
-    options=collect_courses(min_occurences=_COURSE_THRESHOLD),
+    options=collect_courses(
+        min_occurences=_COURSE_THRESHOLD,
+        prefix=department or '',
+    ),
     index=None,
     placeholder="Enter a course code...",
 )
@@ -72,6 +169,15 @@ with st.expander(
         step=5,
     )
 
+    # Rank by recent terms' reviews (three terms a year)
+    recent_years = st.select_slider(
+        "Rank by reviews from:",
+        options=[0, 5, 3, 2, 1],
+        format_func=lambda years: (
+            "all time" if not years else "the last %d year%s"
+            % (years, '' if years == 1 else 's')),
+    )
+
     # Collect sections for the selected course
     sections = collect_sections(
         course=course,
@@ -79,6 +185,7 @@ with st.expander(
         min_quality=min_quality,
         max_difficulty=max_difficulty,
         min_take_again=min_take_again,
+        last_terms=recent_years * 3 or None,
     )
 
     # Find set of all tags any section has
@@ -95,6 +202,17 @@ with st.expander(
         tags,
     )
 
+    # Filter sections by what their reviews mention
+    review_query = st.text_input(
+        "Search reviews:",
+        placeholder="e.g. curve, group project...",
+    )
+
+# Number of matching reviews keyed by professor ID
+review_hits: dict[str, int] = {}
+if review_query:
+    review_hits = comment_hits(review_query, course=course)
+
 
 # Render search results
 st.divider()
@@ -104,6 +222,8 @@ for section in sections:
     # Filter by the selected tags
     if not all(tag in section.meta.tags for tag in tag_filter):
         continue
+    if review_query and section.professor.id not in review_hits:
+        continue
     matches += 1
 
     # Create a box plot for quality and difficulty
@@ -155,6 +275,11 @@ for section in sections:
             )
             st.divider()
 
+        # Display what this section's reviews distinctively mention
+        if section.keywords:
+            st.write("Reviews often mention: %s" % ', '.join(
+                "*%s*" % keyword for keyword in section.keywords))
+
         # Display section metadata
         l, r = st.columns([1, 2])
         l.write("Mean quality rating: **%.2f**" % section.quality)
@@ -173,8 +298,50 @@ for section in sections:
             % len(section.ratings),
             unsafe_allow_html=True
         )
+
+        # Display where the section stands among the course's sections
+        standing = [
+            "%s than **%.0f%%**" % (label, section.percentiles[metric])
+            for metric, label in (
+                ('quality', "Higher quality"),
+                ('difficulty', "harder"),
+                ('take_again', "more would take again"),
+            )
+            if section.percentiles.get(metric) is not None
+        ]
+        if standing:
+            st.caption("%s of %s sections." % ('; '.join(standing), course))
+
+        # Display the recent terms' ratings the section is ranked by
+        if section.recent is not None:
+            if section.recent.count:
+                st.write(
+                    "In the last %s: quality **%.2f**, difficulty **%.2f** "
+                    "(from %d ratings)" % (
+                        "year" if recent_years == 1
+                        else "%d years" % recent_years,
+                        section.recent.mean_quality,
+                        section.recent.mean_difficulty,
+                        section.recent.count,
+                    ))
+            else:
+                st.write("No ratings in the last %d year%s."
+                         % (recent_years, '' if recent_years == 1 else 's'))
         st.divider()
 
+        # Display the best reviews matching the search
+        if review_query:
+            st.write("**%d** reviews mention *%s*:"
+                     % (review_hits[section.professor.id], review_query))
+            for match in search_comments(
+                review_query,
+                course=course,
+                professor_id=section.professor.id,
+                limit=_SEARCH_SHOWN,
+            ):
+                st.caption("> %s" % match.rating.comment)
+            st.divider()
+
         # Display the box plot
         st.plotly_chart(
             fig,
@@ -1,63 +1,457 @@
+import argparse
 import asyncio
+import json
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from understudy.api.mongo.client import db
-from understudy.api.rmp.data import get_professors, get_ratings
+from understudy.api.courses.catalog import build_catalog, catalog_key
+from understudy.api.courses.compare import compare_sections, comparison_key
+from understudy.api.courses.summary import summarize_sections, summary_key
+from understudy.api.rmp.data import get_professors, stream_ratings
+from understudy.api.rmp.parse import parse_pool
+from understudy.api.rmp.professor import Professor
 from understudy.api.rmp.rating import Rating
+from understudy.api.rmp.school import (
+    DEFAULT_SCHOOL_ID,
+    parse_school_id,
+    school_namespace,
+)
+from understudy.api.rmp.telemetry import Telemetry, telemetry
+from understudy.api.search.courses import index_courses, index_key
+from understudy.api.search.names import build_name_index, names_key
+from understudy.api.snapshot.snapshot import write_snapshot
+from understudy.api.store.base import Store, scoped_path
+from understudy.api.store.client import db
+from understudy.api.store.generations import (
+    begin_generation,
+    collect_generations,
+    current_generation,
+    generation_namespace,
+    publish_generation,
+)
+from understudy.api.store.journal import Journal
 
-logging.basicConfig(level=logging.DEBUG)
+# Per-request logs are at debug level; the run report has the aggregates
+logging.basicConfig(level=os.environ.get('PREFETCH_LOG_LEVEL', 'INFO'))
+_log = logging.getLogger(__name__)
 
+# Where to write the JSON run report
+_REPORT_PATH = os.environ.get('PREFETCH_REPORT', 'prefetch-report.json')
 
-async def main() -> None:
+# Where to write the columnar snapshot for in-process serving
+_SNAPSHOT_PATH = os.environ.get('PREFETCH_SNAPSHOT', 'snapshot')
+
+# Where to journal run progress, for resuming interrupted runs
+_JOURNAL_PATH = os.environ.get('PREFETCH_JOURNAL', 'prefetch-journal.db')
+
+# Professors per ratings shard; larger schools are split across workers
+_SHARD_SIZE = 500
+
+# Parse processes per shard worker. Parsing on its own process keeps a
+# worker's event loop free to keep requests in flight meanwhile
+_PARSE_WORKERS = 1
+
+
+async def fetch_professors(
+    school_ids: list[str],
+) -> dict[str, dict[str, Professor]]:
     """
-    Prefetches RMP data and loads it into the Mongo database.
+    Fetches all professors for each school concurrently.
+    Returns { school_id: { professor_id: Professor } }
     """
 
-    # Fetch all professors
-    professors = await get_professors()
+    res = await asyncio.gather(*map(get_professors, school_ids))
+    return dict(zip(school_ids, res))
+
 
-    # Drop stale data and write professors to the Mongo database
-    db.professors.delete({})
-    db.professors.insert([
-        prof.to_dict()
-        for prof in professors.values()
-    ])
+async def _fetch_section(
+    professor_id: str,
+    course: str,
+    store: Store,
+    page_size: int | None,
+) -> tuple[str, str, list[Rating]]:
+    # Write each page as it arrives, while the next is in flight
+    ratings: list[Rating] = []
+    async for page in stream_ratings(
+        professor_id, course, page_size=page_size):
+        with telemetry.phase('write'):
+            store.write_ratings(professor_id, course, page)
+        ratings.extend(page)
+    return professor_id, course, ratings
 
-    # Map of professor -> { course -> [Rating...] }
-    prof_ratings: dict[str, dict[str, list[Rating]]] = {}
+
+async def fetch_ratings(
+    work: list[tuple[str, list[str]]],
+    store: Store,
+    journal: Journal,
+    namespace: str,
+    *,
+    page_size: int | None = None,
+):
+    """
+    Fetches ratings for (professor_id, [course...]) work items, writing
+    them to the store page by page, and journaling each professor x
+    course result as soon as it finishes.
+    """
 
     # Fetch ratings for professors asynchronously
     # We do this in batches to avoid running out of memory
     batch_size = 10
-    for start in range(0, len(professors), batch_size):
-        tasks = []
-        for id, prof in list(professors.items())[start:start + batch_size]:
-            tasks.append(asyncio.create_task(get_ratings(id, prof.courses)))
-        res = await asyncio.gather(*tasks)
-        for id, ratings_by_course in res:
-            prof_ratings[id] = ratings_by_course
+    for start in range(0, len(work), batch_size):
+        with telemetry.phase('ratings'):
+            for res in asyncio.as_completed([
+                _fetch_section(prof, course, store, page_size)
+                for prof, courses in work[start:start + batch_size]
+                for course in courses
+            ]):
+                prof, course, ratings = await res
+                with telemetry.phase('write'):
+                    journal.record(namespace, prof, course, ratings)
 
         # Artificial throttling to avoid DNS issues
         await asyncio.sleep(0.1)
 
-    # Drop old ratings data
-    db.ratings.delete({})
-
-    # Write ratings to the Mongo database
-    for prof, ratings_by_course in prof_ratings.items():
-        for course, ratings in ratings_by_course.items():
-            if len(ratings) == 0:
-                # Empty docs list fails for some reason
-                continue
-
-            db.ratings.insert([
-                {
-                    'professor': prof,
-                    'course': course,
-                    'rating': r.to_dict()
-                }
-                for r in ratings
+
+def _run_shard(
+    namespace: str,
+    work: list[tuple[str, list[str]]],
+    journal_path: str,
+    parse_workers: int = _PARSE_WORKERS,
+    page_size: int | None = None,
+) -> Telemetry:
+    """
+    Fetches ratings for a shard of a school's professors in a worker
+    process (on its own event loop, with its own parse pool), writing
+    them to the store namespace and the journal. Returns the shard's
+    telemetry.
+    """
+
+    telemetry.reset()
+    store = db.scoped(namespace)
+    journal = Journal(journal_path)
+    with parse_pool(parse_workers):
+        asyncio.run(fetch_ratings(
+            work, store, journal, namespace, page_size=page_size))
+    return telemetry
+
+
+def _start_run(
+    school_ids: list[str],
+    journal: Journal,
+    *,
+    workers: int | None = None,
+) -> dict:
+    """
+    Fetches professors and starts a new generation for each school,
+    writing professors to it. Returns the run's journal record:
+    { 'schools': { school_id: { 'generation', 'professors' } } }
+    """
+
+    journal.reset()
+
+    # Fetch all professors, parsing responses on all cores
+    with telemetry.phase('teachers'), parse_pool(workers):
+        schools = asyncio.run(fetch_professors(school_ids))
+
+    # Start a new generation per school, so readers keep seeing the
+    # previous one until this run completes
+    run: dict = {'schools': {}}
+    with telemetry.phase('write'):
+        for school_id, professors in schools.items():
+            namespace = school_namespace(school_id)
+            generation = begin_generation(db.scoped(namespace))
+            store = db.scoped(generation_namespace(namespace, generation))
+            store.prepare()
+            store.replace_professors(professors.values())
+            run['schools'][school_id] = {
+                'generation': generation,
+                'professors': [prof.to_dict() for prof in professors.values()],
+            }
+
+    # Only journaled once professors are written
+    journal.set_meta('run', run)
+    return run
+
+
+def _unpublished(run: dict) -> dict:
+    """
+    Leaves out the schools of an interrupted run whose generations were
+    already published (they're complete, and readers may be on them).
+    Returns the rest of the run.
+    """
+
+    schools = {}
+    for school_id, school in run['schools'].items():
+        namespace = school_namespace(school_id)
+        if current_generation(db.scoped(namespace)) == school['generation']:
+            _log.info("Generation %s for %s is already published",
+                      school['generation'], namespace or 'default school')
+        else:
+            schools[school_id] = school
+    return {**run, 'schools': schools}
+
+
+def _replay(run: dict, journal: Journal):
+    """
+    Replays an interrupted run's journaled results into its generations
+    (which may hold partial writes from before the interruption).
+    """
+
+    with telemetry.phase('replay'):
+        for school_id, school in run['schools'].items():
+            namespace = generation_namespace(
+                school_namespace(school_id), school['generation'])
+            store = db.scoped(namespace)
+            store.clear_ratings()
+
+            num = 0
+            for prof, course, ratings in journal.replay(namespace):
+                store.write_ratings(prof, course, ratings)
+                num += 1
+            telemetry.count('replayed', num)
+            _log.info("Replayed %d journaled sections into %s",
+                      num, namespace)
+
+
+def _finish_run(run: dict):
+    """
+    Runs the phases after ratings are fetched: precomputes summaries,
+    section comparisons, the course catalog and search indexes and
+    writes a snapshot from each school's new generation, then publishes
+    the generations.
+    """
+
+    targets = {
+        school_id: generation_namespace(
+            school_namespace(school_id), school['generation'])
+        for school_id, school in run['schools'].items()
+    }
+
+    # Precompute section summaries (e.g. review keywords), sections'
+    # standing within their courses and the course catalog per school
+    with telemetry.phase('summaries'):
+        for school_id in run['schools']:
+            store = db.scoped(targets[school_id])
+            for course, summaries in summarize_sections(
+                store.all_ratings(),
+            ).items():
+                store.put_document(summary_key(course), summaries)
+            for course, comparison in compare_sections(
+                store.all_ratings(),
+                store.all_professors(),
+            ).items():
+                store.put_document(comparison_key(course), comparison)
+            store.put_document(
+                catalog_key(), build_catalog(store.all_ratings()).to_dict())
+
+    # Index each course's rating comments and professors' names for
+    # search
+    with telemetry.phase('search'):
+        for school_id in run['schools']:
+            store = db.scoped(targets[school_id])
+            for course, index in index_courses(store.all_ratings()).items():
+                store.put_document(index_key(course), index.to_dict())
+            store.put_document(
+                names_key(),
+                build_name_index(store.all_professors()).to_dict(),
+            )
+
+    # Write each school's read-only snapshot for in-process serving
+    with telemetry.phase('snapshot'):
+        for school_id in run['schools']:
+            store = db.scoped(targets[school_id])
+            write_snapshot(
+                scoped_path(_SNAPSHOT_PATH, school_namespace(school_id)),
+                store.all_professors(),
+                store.all_ratings(),
+                store.all_documents(),
+            )
+
+    # Switch readers over to the new generations, then drop old ones
+    with telemetry.phase('publish'):
+        for school_id, school in run['schools'].items():
+            namespace = school_namespace(school_id)
+            base = db.scoped(namespace)
+            publish_generation(base, school['generation'])
+            _log.info("Published generation %s for %s",
+                      school['generation'], namespace or 'default school')
+            collect_generations(base, namespace)
+
+
+def _prefetch(
+    school_ids: list[str],
+    *,
+    workers: int | None,
+    shard_size: int,
+    parse_workers: int,
+    page_size: int | None,
+    resume: bool,
+):
+    """
+    Runs a prefetch (see main), without the run report.
+    """
+
+    # Workers write straight to the store, so they must all see it
+    root = db.scoped('')
+    if not root.shared:
+        raise ValueError(
+            "Can't prefetch into %s: its worker processes need a shared, "
+            "writable store (mongo or sqlite:<path>)" % type(root).__name__)
+
+    journal = Journal(_JOURNAL_PATH)
+    run = journal.get_meta('run') if resume else None
+    if run is None:
+        if resume:
+            _log.warning("No run to resume in %s; starting a new one",
+                         _JOURNAL_PATH)
+        run = _start_run(school_ids, journal, workers=workers)
+    else:
+        _log.info("Resuming run for %d schools", len(run['schools']))
+        run = _unpublished(run)
+        _replay(run, journal)
+
+    # Each school's generation namespace and professors
+    targets = {
+        school_id: generation_namespace(
+            school_namespace(school_id), school['generation'])
+        for school_id, school in run['schools'].items()
+    }
+    schools = {
+        school_id: [Professor.from_dict(p) for p in school['professors']]
+        for school_id, school in run['schools'].items()
+    }
+
+    # Split schools' remaining professor x course work into shards,
+    # biggest schools first
+    shards: list[tuple[str, list[tuple[str, list[str]]]]] = []
+    for school_id, professors in sorted(
+        schools.items(),
+        key=lambda item: len(item[1]),
+        reverse=True,
+    ):
+        done = journal.completed(targets[school_id])
+        work = [
+            (prof.id, [
+                course for course in sorted(prof.courses)
+                if (prof.id, course) not in done
             ])
+            for prof in professors
+        ]
+        work = [(prof, courses) for prof, courses in work if courses]
+        for start in range(0, len(work), shard_size):
+            shards.append((targets[school_id], work[start:start + shard_size]))
+
+    # Fetch ratings shard by shard across worker processes, each writing
+    # straight to the store. Workers are spawned rather than forked so
+    # they don't share the parent's database connections
+    _log.info("Fetching ratings for %d schools in %d shards",
+              len(schools), len(shards))
+    with telemetry.phase('shards'), ProcessPoolExecutor(
+        workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as pool:
+        futures = [
+            pool.submit(
+                _run_shard,
+                namespace,
+                work,
+                _JOURNAL_PATH,
+                parse_workers,
+                page_size,
+            )
+            for namespace, work in shards
+        ]
+        for future in as_completed(futures):
+            telemetry.merge(future.result())
+            telemetry.count('shards')
+
+    _finish_run(run)
+
+    # The run is complete, so there's nothing left to resume
+    journal.remove()
+
+
+def main(
+    school_ids: list[str],
+    *,
+    workers: int | None = None,
+    shard_size: int = _SHARD_SIZE,
+    parse_workers: int = _PARSE_WORKERS,
+    page_size: int | None = None,
+    resume: bool = False,
+) -> None:
+    """
+    Prefetches RMP data for each school and loads it into a new
+    generation of the school's namespace in the configured store, then
+    switches readers over to it.
+
+    Progress is journaled, so with resume an interrupted run picks up
+    where it left off instead of starting over.
+    """
+
+    try:
+        _prefetch(
+            school_ids,
+            workers=workers,
+            shard_size=shard_size,
+            parse_workers=parse_workers,
+            page_size=page_size,
+            resume=resume,
+        )
+    except BaseException:
+        telemetry.count('failed')
+        raise
+    finally:
+        # Emit the run report, including for runs that failed partway
+        report = telemetry.report()
+        _log.info("Run report: %s",
+                  json.dumps(report, separators=(',', ':')))
+        telemetry.write(_REPORT_PATH)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(
+        description="Prefetches RMP data into the configured store.",
+    )
+    parser.add_argument(
+        'schools',
+        nargs='*',
+        default=[DEFAULT_SCHOOL_ID],
+        help="RMP school node IDs or numeric IDs (default: UCF)",
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="worker processes (default: one per core)",
+    )
+    parser.add_argument('--shard-size', type=int, default=_SHARD_SIZE)
+    parser.add_argument(
+        '--parse-workers',
+        type=int,
+        default=_PARSE_WORKERS,
+        help="parse processes per worker (default: %d)" % _PARSE_WORKERS,
+    )
+    parser.add_argument(
+        '--page-size',
+        type=int,
+        default=None,
+        help="ratings per request when paging through a professor's "
+             "ratings",
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="resume an interrupted run from its journal",
+    )
+    args = parser.parse_args()
+
+    main(
+        list(dict.fromkeys(map(parse_school_id, args.schools))),
+        workers=args.workers,
+        shard_size=args.shard_size,
+        parse_workers=args.parse_workers,
+        page_size=args.page_size,
+        resume=args.resume,
+    )